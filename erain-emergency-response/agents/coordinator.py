@@ -2,18 +2,39 @@ from uagents import Agent, Context, Protocol, Model
 from uagents.setup import fund_agent_if_low
 from datetime import datetime
 from uuid import uuid4
-from typing import Dict, List
+from typing import Dict, List, Optional
+import logging
+import os
 import random
 import json
+import sys
+import time
 from uagents_core.contrib.protocols.chat import (
     ChatAcknowledgement,
     ChatMessage,
     EndSessionContent,
+    MetadataContent,
     StartSessionContent,
     TextContent,
     chat_protocol_spec,
 )
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from knowledge.analysis_cache import AnalysisCache
+from knowledge.keyword_classifier import EMERGENCY_PATTERNS, classify_description
+from runtime.batching import AlertBatcher
+from runtime.dedup import ReportDeduplicator
+from runtime.deployment import agent_options, peer_address
+from runtime.dispatch import Dispatcher
+from runtime.events import EventLogger
+from runtime.incidents import CLOSED, IncidentStore
+from runtime.latency import LatencyTracker
+from runtime.recording import MessageRecorder
+from runtime.scheduler import DispatchScheduler
+from runtime.sessions import SessionStore
+from runtime.sharding import ShardRouter
+from runtime.ingestion import WorkerPool
+
 class EmergencyAlert(Model):
     alert_id: str
     timestamp: str
@@ -30,21 +51,97 @@ class EmergencyResponse(Model):
     teams_assigned: int
     details: str
 
+class EmergencyAlertBatch(Model):
+    alerts: List[EmergencyAlert]
+
+class EmergencyResponseBatch(Model):
+    responses: List[EmergencyResponse]
+
+# Messages between coordinator instances sharing the geographic shards
+class ShardForward(Model):
+    citizen: str
+    text: str
+    location: Dict[str, float]
+
+class ShardReply(Model):
+    citizen: str
+    text: str
+
+class ShardResponse(Model):
+    agent: str
+    response: EmergencyResponse
+
+class ShardIncident(Model):
+    alert: EmergencyAlert
+    state: str
+    expected: List[str]
+    responses: Dict[str, str]
+    reports: int
+    located: bool = True
+    stages: Dict[str, float] = {}  # seconds since each latency stage, see LatencyTracker.hand_off
+
+class ShardHandoff(Model):
+    incidents: List[ShardIncident]
+
+class ShardMembership(Model):
+    joining: bool
+
+# Each instance needs its own seed; ERAIN_COORDINATOR_PORT and
+# ERAIN_LOCAL_ENDPOINTS run it on localhost, as test_sharding.py does
 agent = Agent(
     name="emergency_coordinator",
-    seed="emergency_coordinator_seed_2024"
+    seed=os.environ.get("ERAIN_COORDINATOR_SEED", "emergency_coordinator_seed_2024"),
+    **agent_options("coordinator")
+)
+
+# Funding needs the ledger; offline runs (benchmark.py) skip it
+if not os.environ.get("ERAIN_OFFLINE"):
+    fund_agent_if_low(agent.wallet.address())
+
+# Other agent addresses from Agentverse, unless ERAIN_<NAME>_AGENT points
+# elsewhere (run_bureau.py points colocated agents at their local instances)
+MEDICAL_AGENT = peer_address("medical", "agent1qgxzuzrukxv5sxp05vf4ma2l3u2u79t74nn5mkxw5fazqlyk3mkuulu7ykz")
+RESOURCE_AGENT = peer_address("resource", "agent1q2hlqe2jcmdea0c97k0h2tfk8fsunfxmrspuwv4uulh4nugwqk6astqd35r")
+SHELTER_AGENT = peer_address("shelter", "agent1qwk8vrza032yre08rchhf74jfnmekswq8r20gvam22csz5av6x8ksjzntte")
+
+# Sends alerts to downstream agents concurrently with per-agent timeouts,
+# coalescing alerts per agent for peers listed in ERAIN_BATCH_PEERS
+dispatcher = Dispatcher.from_env()
+batcher = AlertBatcher.from_env(
+    dispatcher,
+    lambda alerts: EmergencyAlertBatch(alerts=alerts),
+    peer_aliases={"medical": MEDICAL_AGENT, "resource": RESOURCE_AGENT, "shelter": SHELTER_AGENT},
+    flush_now=lambda alert: alert.severity == "CRITICAL",
+    on_error=lambda alert, error: events.emit("dispatch_followup_failed", logging.ERROR,
+                                              alert_id=alert.alert_id, error=str(error))
 )
 
-fund_agent_if_low(agent.wallet.address())
+# One structured record per handling event, written off the event loop
+events = EventLogger.from_env("coordinator")
 
-# Other agent addresses from Agentverse
-MEDICAL_AGENT = "agent1qgxzuzrukxv5sxp05vf4ma2l3u2u79t74nn5mkxw5fazqlyk3mkuulu7ykz"
-RESOURCE_AGENT = "agent1q2hlqe2jcmdea0c97k0h2tfk8fsunfxmrspuwv4uulh4nugwqk6astqd35r"
-SHELTER_AGENT = "agent1qwk8vrza032yre08rchhf74jfnmekswq8r20gvam22csz5av6x8ksjzntte"
+# Every message in and out, when ERAIN_RECORD_DIR is set (see replay.py)
+recorder = MessageRecorder.from_env("coordinator")
 
-# Store active emergencies and citizen sessions
-active_emergencies = {}
-citizen_sessions = {}
+# Geographic shard ownership across coordinator instances (ERAIN_SHARD_PEERS)
+router = ShardRouter.from_env(agent.address)
+
+# Stage timestamps and per-agent latency histograms, correlated by alert_id
+latency = LatencyTracker.from_env(
+    agent_names={MEDICAL_AGENT: "medical", RESOURCE_AGENT: "resource", SHELTER_AGENT: "shelter"}
+)
+
+# Analyzed incidents wait for a dispatch slot in severity order, not arrival order
+scheduler = DispatchScheduler.from_env()
+
+# Incident lifecycle (open -> dispatched -> confirmed -> closed) and citizen sessions
+incidents = IncidentStore.from_env()
+citizen_sessions = SessionStore.from_env()
+
+# Repeat reports of the same incident (nearby, recent, similar wording) merge
+# into it instead of dispatching again
+deduplicator = ReportDeduplicator.from_env(
+    is_retained=lambda alert_id: alert_id in incidents
+)
 
 # Initialize the chat protocol with the standard chat spec
 chat_proto = Protocol(spec=chat_protocol_spec)
@@ -61,82 +158,270 @@ def create_text_chat(text: str, end_session: bool = False) -> ChatMessage:
     )
 
 # MeTTa Knowledge Graph Integration - Semantic reasoning
-def analyze_with_metta(emergency_desc: str) -> Dict:
-    """MeTTa semantic reasoning for emergency analysis"""
-
-    # Semantic patterns for emergency type inference
-    semantic_patterns = {
-        "fire": {
-            "keywords": ["fire", "burning", "smoke", "flames", "blaze", "fuel", "leak"],
-            "severity_modifiers": {"trapped": +2, "explosion": +3, "spreading": +2, "fuel": +2},
-            "resources": ["fire_equipment", "emergency_teams", "water_supply"],
-            "escalation": ["chemical_spill", "structural_collapse"]
-        },
-        "flood": {
-            "keywords": ["flood", "water", "drowning", "tsunami", "overflow"],
-            "severity_modifiers": {"rising": +2, "evacuation": +2, "dam": +3},
-            "resources": ["rescue_boats", "emergency_teams", "shelters"],
-            "escalation": ["medical", "disease_outbreak"]
-        },
-        "medical": {
-            "keywords": ["injured", "heart", "bleeding", "unconscious", "accident", "injuries", "pile-up", "crash", "collision"],
-            "severity_modifiers": {"multiple": +2, "critical": +3, "mass": +3},
-            "resources": ["ambulance", "medical_supplies", "trauma_team"],
-            "escalation": []
-        },
-        "chemical": {
-            "keywords": ["chemical", "toxic", "hazmat", "spill", "contamination"],
-            "severity_modifiers": {"leak": +2, "exposure": +3, "spreading": +2},
-            "resources": ["hazmat_team", "decontamination", "medical_supplies"],
-            "escalation": ["medical", "environmental"]
-        }
+# Resources and escalation risks per emergency type; keywords and severity
+# modifiers live in the shared keyword classifier
+semantic_patterns = {
+    "fire": {
+        "resources": ["fire_equipment", "emergency_teams", "water_supply"],
+        "escalation": ["chemical_spill", "structural_collapse"]
+    },
+    "flood": {
+        "resources": ["rescue_boats", "emergency_teams", "shelters"],
+        "escalation": ["medical", "disease_outbreak"]
+    },
+    "medical": {
+        "resources": ["ambulance", "medical_supplies", "trauma_team"],
+        "escalation": []
+    },
+    "chemical": {
+        "resources": ["hazmat_team", "decontamination", "medical_supplies"],
+        "escalation": ["medical", "environmental"]
+    },
+    "earthquake": {
+        "resources": ["emergency_teams", "ambulance", "medical_supplies", "shelters"],
+        "escalation": ["fire", "medical"]
     }
+}
 
-    desc_lower = emergency_desc.lower()
+# Near-identical reports share one analysis until it expires
+analysis_cache = AnalysisCache.from_env()
 
-    # Score each emergency type
-    type_scores = {}
-    for etype, patterns in semantic_patterns.items():
-        score = sum(2 for keyword in patterns["keywords"] if keyword in desc_lower)
-        type_scores[etype] = score
-
-    # Get the best match - default to medical if no matches
-    best_type = max(type_scores, key=type_scores.get) if max(type_scores.values()) > 0 else "medical"
+def analyze_with_metta(emergency_desc: str) -> Dict:
+    """MeTTa semantic reasoning for emergency analysis"""
+    return analysis_cache.get_or_compute(emergency_desc, _analyze_description)
 
-    # Calculate severity
-    base_severity = 5.0
-    if best_type in semantic_patterns:
-        pattern = semantic_patterns[best_type]
-        for modifier, points in pattern["severity_modifiers"].items():
-            if modifier in desc_lower:
-                base_severity += points
+def _analyze_description(emergency_desc: str) -> Dict:
+    # One scan of the description scores every emergency type
+    classification = classify_description(emergency_desc)
+    best_type = classification["inferred_type"]
+    matched_keywords = classification["keyword_counts"][best_type]
 
     # Get resources and risks
     resources = semantic_patterns.get(best_type, {}).get("resources", ["emergency_teams"])
     risks = semantic_patterns.get(best_type, {}).get("escalation", [])
 
     # Fixed confidence calculation
-    if best_type in semantic_patterns and type_scores.get(best_type, 0) > 0:
+    if matched_keywords > 0:
         # Calculate confidence based on keyword matches
-        matched_keywords = type_scores.get(best_type, 0) / 2  # Each match scores 2
-        total_keywords = len(semantic_patterns[best_type]["keywords"])
+        total_keywords = len(EMERGENCY_PATTERNS[best_type]["keywords"])
         confidence = min(0.95, (matched_keywords / total_keywords) + 0.5)  # Base 50% + match ratio
     else:
         confidence = 0.75  # Default confidence for fallback matches
 
     return {
         "inferred_type": best_type,
-        "severity_score": min(10.0, base_severity),
+        "severity_score": classification["severity_score"],
         "required_resources": resources,
         "escalation_risk": risks,
         "confidence": confidence
     }
 
+DEFAULT_LOCATION = {"lat": 40.7128, "lng": -74.0060}
+
+def shared_location(metadata: Dict[str, str]) -> Optional[Dict[str, float]]:
+    """Coordinates a chat client shared as "lat"/"lng" metadata, or None if absent or malformed"""
+    try:
+        lat, lng = float(metadata["lat"]), float(metadata["lng"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+        return None
+    return {"lat": lat, "lng": lng}
+
+def needs_medical(analysis: Dict) -> bool:
+    """Casualties expected: an ambulance is among the resources, or the emergency is medical"""
+    return "ambulance" in analysis["required_resources"] or analysis["inferred_type"] == "medical"
+
+def report_targets(analysis: Dict) -> Dict[str, str]:
+    """Agents to alert for a citizen report, with the team name shown to the citizen"""
+    targets = {}
+    if needs_medical(analysis):
+        targets[MEDICAL_AGENT] = "🏥 Medical Response"
+
+    if any(r in analysis["required_resources"] for r in ["fire_equipment", "hazmat_team"]):
+        targets[RESOURCE_AGENT] = "📦 Resource Allocation"
+
+    if analysis["escalation_risk"] or analysis["severity_score"] > 6:
+        targets[SHELTER_AGENT] = "🏠 Shelter Coordinator"
+    return targets
+
+def alert_targets(analysis: Dict, affected_count: int) -> Dict[str, str]:
+    """Agents to alert for a direct or generated EmergencyAlert"""
+    targets = {}
+    if needs_medical(analysis):
+        targets[MEDICAL_AGENT] = "Medical Response Team"
+
+    if any(r in analysis['required_resources'] for r in ["fire_equipment", "rescue_boats"]):
+        targets[RESOURCE_AGENT] = "Resource Allocation Unit"
+
+    if affected_count > 20 or analysis['escalation_risk']:
+        targets[SHELTER_AGENT] = "Shelter Coordination"
+    return targets
+
+async def reply_to_citizen(report: Dict, text: str):
+    """Answer a citizen directly, or through the instance that forwarded their report"""
+    if report.get("origin"):
+        await report["ctx"].send(report["origin"], ShardReply(citizen=report["sender"], text=text))
+    else:
+        await report["ctx"].send(report["sender"], create_text_chat(text))
+
+async def process_report(report: Dict):
+    """Analyze a queued citizen report, dispatch it and reply to the citizen"""
+    ctx, sender, text = report["ctx"], report["sender"], report["text"]
+    # Chat reports are located only if the citizen's client shared a position;
+    # unlocated ones are handled where they arrive and never deduplicated
+    location = report.get("location")
+    picked_up = time.monotonic()
+
+    # Reports for another instance's region go to that instance unanalyzed;
+    # forwarded reports are never forwarded again
+    if not report.get("origin") and location is not None and not router.owns(location):
+        owner = router.owner(location)
+        delivery = await dispatcher.send(ctx, owner, ShardForward(citizen=sender, text=text, location=location))
+        if delivery.delivered:
+            router.forwarded += 1
+            events.emit("report_forwarded", region=router.region(location), shard=owner)
+            return
+        events.emit("shard_unreachable", logging.WARNING, shard=owner, error=str(delivery.error))
+
+    # MeTTa semantic analysis
+    analysis = analyze_with_metta(text)
+
+    decision = deduplicator.check(location, analysis["inferred_type"], text)
+    if decision.duplicate_of is not None:
+        incident = incidents.merge_report(decision.duplicate_of, 1)
+        events.emit("report_merged", alert_id=decision.duplicate_of, severity=incident.alert.severity,
+                    similarity=decision.similarity, cell=decision.cell, candidates=decision.candidates,
+                    lookup_us=round(decision.lookup_time * 1e6), reports=incident.reports,
+                    affected=incident.alert.affected_count)
+        await reply_to_citizen(report,
+            f"✅ Linked to Emergency Alert #{decision.duplicate_of[-6:]}\n"
+            f"━━━━━━━━━━━━━━━━━━━━━\n"
+            f"This incident has already been reported and responders are on it.\n"
+            f"• Status: {'ALL TEAMS RESPONDED' if incident.state == CLOSED else incident.state.upper()}\n"
+            f"• Reports received: {incident.reports}\n\n"
+            f"📞 Stay on the line for updates"
+        )
+        return
+
+    # Create emergency
+    emergency = EmergencyAlert(
+        alert_id=f"CHAT{int(datetime.now().timestamp())}{uuid4().hex[:6]}",
+        timestamp=datetime.now().isoformat(),
+        location=location or DEFAULT_LOCATION,
+        emergency_type=analysis["inferred_type"],
+        severity="CRITICAL" if analysis["severity_score"] > 7 else "HIGH" if analysis["severity_score"] > 5 else "MEDIUM",
+        description=text,
+        affected_count=1
+    )
+
+    incidents.open(emergency, located=location is not None)
+    deduplicator.register(decision, emergency.alert_id)
+    latency.start(emergency.alert_id, report.get("received_at", picked_up), picked_up)
+
+    # Smart dispatch based on MeTTa
+    targets = report_targets(analysis)
+
+    # Alerts enter the batcher in severity order; the slot and this worker are
+    # free once the alert is queued, and the citizen is answered on delivery
+    await scheduler.run(
+        lambda: batcher.queue_all(ctx, targets, emergency,
+                                  lambda deliveries: answer_report(report, emergency, analysis, targets,
+                                                                   decision, deliveries)),
+        analysis["severity_score"], emergency.affected_count, emergency.severity
+    )
+
+async def answer_report(report: Dict, emergency: EmergencyAlert, analysis: Dict, targets: Dict,
+                        decision, deliveries: Dict):
+    """Record a chat report's dispatch once its alerts are delivered and reply to the citizen"""
+    record_dispatch(emergency, deliveries)
+    log_dispatch(emergency, analysis, targets, deliveries, source="chat", cell=decision.cell,
+                 candidates=decision.candidates)
+    dispatched = []
+    for destination, team in targets.items():
+        delivery = deliveries[destination]
+        dispatched.append(team if delivery.delivered else f"{team} (delivery failed)")
+
+    # Detailed response
+    response_text = (
+        f"✅ Emergency Alert #{emergency.alert_id[-6:]}\n"
+        f"━━━━━━━━━━━━━━━━━━━━━\n"
+        f"📊 AI Analysis:\n"
+        f"• Type: {analysis['inferred_type'].upper()}\n"
+        f"• Severity: {'🔴' if emergency.severity == 'CRITICAL' else '🟡'} {emergency.severity}\n"
+        f"• Score: {analysis['severity_score']:.1f}/10\n\n"
+        f"🚀 Deployed Resources:\n"
+    )
+
+    for resource in analysis['required_resources']:
+        response_text += f"• {resource.replace('_', ' ').title()}\n"
+
+    response_text += f"\n📡 Dispatched to:\n"
+    for team in dispatched:
+        response_text += f"{team}\n"
+
+    if analysis['escalation_risk']:
+        response_text += f"\n⚠️ Risk Monitoring:\n"
+        for risk in analysis['escalation_risk']:
+            response_text += f"• {risk.replace('_', ' ').title()} risk\n"
+
+    response_text += f"\n⏱️ ETA: 5-10 minutes\n"
+    response_text += f"📞 Stay on the line for updates"
+
+    await reply_to_citizen(report, response_text)
+
+def record_dispatch(emergency: EmergencyAlert, deliveries: Dict):
+    """Move an incident to dispatched; with nothing to wait for it closes right away"""
+    if not deliveries:
+        incidents.close(emergency.alert_id)
+        return
+    delivered = [destination for destination, delivery in deliveries.items() if delivery.delivered]
+    incidents.mark_dispatched(emergency.alert_id, delivered)
+    latency.delivered(emergency.alert_id, delivered)
+
+def log_dispatch(emergency: EmergencyAlert, analysis: Dict, targets: Dict, deliveries: Dict, **fields):
+    """One alert_dispatched record; failed deliveries raise it to WARNING"""
+    failed = {team: str(deliveries[destination].error) for destination, team in targets.items()
+              if not deliveries[destination].delivered}
+    events.emit(
+        "alert_dispatched", logging.WARNING if failed else logging.INFO,
+        alert_id=emergency.alert_id, severity=emergency.severity, emergency_type=emergency.emergency_type,
+        severity_score=analysis["severity_score"], confidence=analysis["confidence"],
+        resources=analysis["required_resources"], escalation_risk=analysis["escalation_risk"],
+        affected=emergency.affected_count,
+        delivered={team: round(deliveries[destination].latency * 1000) for destination, team in targets.items()
+                   if deliveries[destination].delivered},
+        failed=failed,
+        **fields
+    )
+
+def is_urgent_report(text: str) -> bool:
+    """High-severity keywords earn priority admission to the ingestion queue"""
+    classification = classify_description(text)
+    return classification["severity_level"] in ("critical", "high") or classification["severity_score"] > 7
+
+def _report_failed(report: Dict, error: Exception):
+    report["ctx"].logger.info(f"❌ Report processing failed: {error}")
+
+# Bounded queue and worker pool between chat handlers and analysis/dispatch
+ingestion = WorkerPool.from_env(process_report, on_error=_report_failed)
+
+QUEUED_TEXT = (
+    "📥 Report received, queued.\n"
+    "Our responders are handling a surge of reports; yours is in line "
+)
+
+REJECTED_TEXT = (
+    "⚠️ Report not accepted - system at capacity.\n"
+    "We are receiving more reports than we can analyze right now. "
+    "Please send your report again in a minute. "
+    "If anyone is in immediate danger, call 911."
+)
+
 # Handle incoming chat messages
 @chat_proto.on_message(ChatMessage)
+@recorder.handler
 async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
-    ctx.logger.info(f"📱 ASI:One message from citizen {sender[:8]}...")
-
     # Always send back an acknowledgement when a message is received
     await ctx.send(sender, ChatAcknowledgement(timestamp=datetime.utcnow(), acknowledged_msg_id=msg.msg_id))
 
@@ -144,7 +429,7 @@ async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
     for item in msg.content:
         # Marks the start of a chat session
         if isinstance(item, StartSessionContent):
-            citizen_sessions[sender] = {"start": datetime.utcnow(), "messages": 0}
+            citizen_sessions.start(sender)
             ctx.logger.info(f"💬 New emergency session with citizen {sender[:8]}...")
 
             response = create_text_chat(
@@ -158,105 +443,167 @@ async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
             )
             await ctx.send(sender, response)
 
+        # Position shared by the citizen's client; it locates their later reports
+        elif isinstance(item, MetadataContent):
+            location = shared_location(item.metadata)
+            if location is not None:
+                citizen_sessions.locate(sender, location)
+
         # Handles plain text messages (from another agent or ASI:One)
         elif isinstance(item, TextContent):
-            ctx.logger.info(f"📝 Emergency report: {item.text[:50]}...")
-
-            if sender in citizen_sessions:
-                citizen_sessions[sender]["messages"] += 1
-
-            # MeTTa semantic analysis
-            analysis = analyze_with_metta(item.text)
-
-            ctx.logger.info(f"🧠 MeTTa Knowledge Graph Analysis:")
-            ctx.logger.info(f"   Type: {analysis['inferred_type']}")
-            ctx.logger.info(f"   Severity: {analysis['severity_score']:.1f}/10")
-            ctx.logger.info(f"   Resources: {', '.join(analysis['required_resources'])}")
-            ctx.logger.info(f"   Confidence: {analysis['confidence']:.1%}")
-
-            # Create emergency
-            emergency = EmergencyAlert(
-                alert_id=f"CHAT{int(datetime.now().timestamp())}",
-                timestamp=datetime.now().isoformat(),
-                location={"lat": 40.7128, "lng": -74.0060},
-                emergency_type=analysis["inferred_type"],
-                severity="CRITICAL" if analysis["severity_score"] > 7 else "HIGH" if analysis["severity_score"] > 5 else "MEDIUM",
-                description=item.text,
-                affected_count=1
-            )
-
-            active_emergencies[emergency.alert_id] = emergency
-
-            # Smart dispatch based on MeTTa
-            dispatched = []
-            if "ambulance" in analysis["required_resources"] or "medical" in analysis["inferred_type"]:
-                await ctx.send(MEDICAL_AGENT, emergency)
-                dispatched.append("🏥 Medical Response")
-
-            if any(r in analysis["required_resources"] for r in ["fire_equipment", "hazmat_team"]):
-                await ctx.send(RESOURCE_AGENT, emergency)
-                dispatched.append("📦 Resource Allocation")
-
-            if analysis["escalation_risk"] or analysis["severity_score"] > 6:
-                await ctx.send(SHELTER_AGENT, emergency)
-                dispatched.append("🏠 Shelter Coordinator")
-
-            # Detailed response
-            response_text = (
-                f"✅ Emergency Alert #{emergency.alert_id[-6:]}\n"
-                f"━━━━━━━━━━━━━━━━━━━━━\n"
-                f"📊 AI Analysis:\n"
-                f"• Type: {analysis['inferred_type'].upper()}\n"
-                f"• Severity: {'🔴' if emergency.severity == 'CRITICAL' else '🟡'} {emergency.severity}\n"
-                f"• Score: {analysis['severity_score']:.1f}/10\n\n"
-                f"🚀 Deployed Resources:\n"
-            )
-
-            for resource in analysis['required_resources']:
-                response_text += f"• {resource.replace('_', ' ').title()}\n"
-
-            response_text += f"\n📡 Dispatched to:\n"
-            for team in dispatched:
-                response_text += f"{team}\n"
-
-            if analysis['escalation_risk']:
-                response_text += f"\n⚠️ Risk Monitoring:\n"
-                for risk in analysis['escalation_risk']:
-                    response_text += f"• {risk.replace('_', ' ').title()} risk\n"
-
-            response_text += f"\n⏱️ ETA: 5-10 minutes\n"
-            response_text += f"📞 Stay on the line for updates"
-
-            response_message = create_text_chat(response_text)
-            await ctx.send(sender, response_message)
+            session = citizen_sessions.touch(sender)
+
+            # Analysis and dispatch run on the ingestion workers. This handler
+            # never waits for queue space: that would stall every inbound
+            # message, so a full queue turns the report away instead
+            urgent = is_urgent_report(item.text)
+            report = {"ctx": ctx, "sender": sender, "text": item.text, "received_at": time.monotonic(),
+                      "location": session.location if session is not None else None}
+            if not await ingestion.queue.try_put(report, urgent=urgent):
+                events.emit("report_rejected", logging.WARNING, citizen=sender, urgent=urgent, length=len(item.text))
+                await ctx.send(sender, create_text_chat(REJECTED_TEXT))
+                continue
+            if len(ingestion.queue) > ingestion.workers:
+                await ctx.send(sender, create_text_chat(
+                    QUEUED_TEXT + ("with priority." if urgent else "and will be analyzed shortly.")
+                ))
+            events.emit("report_received", citizen=sender, urgent=urgent, length=len(item.text))
 
         # Marks the end of a chat session
         elif isinstance(item, EndSessionContent):
-            if sender in citizen_sessions:
-                session_duration = (datetime.utcnow() - citizen_sessions[sender]["start"]).seconds
-                ctx.logger.info(f"👋 Session ended. Duration: {session_duration}s, Messages: {citizen_sessions[sender]['messages']}")
-                del citizen_sessions[sender]
+            session = citizen_sessions.end(sender)
+            if session is not None:
+                ctx.logger.info(f"👋 Session ended. Duration: {int(session.duration())}s, Messages: {session.messages}")
         # Catches anything unexpected
         else:
             ctx.logger.info(f"Received unexpected content type from {sender}")
 
 # Handle acknowledgements for messages this agent has sent out
 @chat_proto.on_message(ChatAcknowledgement)
+@recorder.handler
 async def handle_acknowledgement(ctx: Context, sender: str, msg: ChatAcknowledgement):
     ctx.logger.info(f"✅ ASI:One acknowledged message {msg.acknowledged_msg_id[:8]}...")
 
 @agent.on_event("startup")
+@recorder.handler
 async def startup(ctx: Context):
+    ingestion.start()
     ctx.logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
     ctx.logger.info(f"🚀 ERAIN Emergency Coordinator Online")
     ctx.logger.info(f"📍 Address: {agent.address}")
     ctx.logger.info(f"✅ Chat Protocol: ENABLED for ASI:One")
     ctx.logger.info(f"✅ MeTTa Knowledge Graph: INTEGRATED")
     ctx.logger.info(f"✅ Multi-Agent Network: CONNECTED")
+    if router.sharded:
+        ctx.logger.info(f"🗺️ Geographic Shards: 1 of {len(router.ring)} instances (region precision {router.precision})")
+        await dispatcher.send_all(ctx, router.peers, ShardMembership(joining=True))
     ctx.logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
 
+@agent.on_event("shutdown")
+@recorder.handler
+async def shutdown(ctx: Context):
+    # Hand every open incident to its next owner before leaving the ring
+    if not router.sharded:
+        return
+    peers = router.peers
+    router.ring.remove(agent.address)
+    await hand_off_incidents(ctx)
+    await dispatcher.send_all(ctx, peers, ShardMembership(joining=False))
+
+async def hand_off_incidents(ctx: Context):
+    """Send incidents whose region this instance no longer owns to their new owners"""
+    # Incidents without a real location stay with this instance unless it is leaving
+    leaving = agent.address not in router.ring.nodes
+    moves = router.misplaced(
+        (incident.alert.location, incident) for incident in incidents
+        if incident.state != CLOSED and (incident.located or leaving)
+    )
+    for owner, moved in moves.items():
+        handoff = ShardHandoff(incidents=[
+            ShardIncident(
+                alert=incident.alert,
+                state=incident.state,
+                expected=sorted(incident.expected),
+                responses=dict(incident.responses),
+                reports=incident.reports,
+                located=incident.located,
+                stages=latency.hand_off(incident.alert_id)
+            )
+            for incident in moved
+        ])
+        delivery = await dispatcher.send(ctx, owner, handoff)
+        if not delivery.delivered:
+            ctx.logger.info(f"❌ Shard handoff to {owner[:16]}... failed, keeping {len(moved)} incidents: {delivery.error}")
+            for handed in handoff.incidents:
+                latency.adopt(handed.alert.alert_id, handed.stages)
+            continue
+        for incident in moved:
+            incidents.pop(incident.alert_id)
+            router.record_handoff(incident.alert_id, owner)
+        ctx.logger.info(f"📤 Handed off {len(moved)} incidents to shard {owner[:16]}...")
+
+@agent.on_message(model=ShardMembership)
+@recorder.handler
+async def handle_shard_membership(ctx: Context, sender: str, msg: ShardMembership):
+    if msg.joining:
+        if router.join(sender):
+            ctx.logger.info(f"🗺️ Shard {sender[:16]}... joined ({len(router.ring)} instances)")
+            await hand_off_incidents(ctx)
+    elif router.leave(sender):
+        ctx.logger.info(f"🗺️ Shard {sender[:16]}... left ({len(router.ring)} instances)")
+
+@agent.on_message(model=ShardHandoff)
+@recorder.handler
+async def handle_shard_handoff(ctx: Context, sender: str, msg: ShardHandoff):
+    for handed in msg.incidents:
+        incidents.adopt(handed.alert, handed.state, handed.expected, handed.responses, handed.reports, handed.located)
+        latency.adopt(handed.alert.alert_id, handed.stages)
+        deduplicator.index(handed.alert.alert_id, handed.alert.location if handed.located else None,
+                           handed.alert.emergency_type, handed.alert.description)
+    router.adopted += len(msg.incidents)
+    ctx.logger.info(f"📥 Adopted {len(msg.incidents)} incidents from shard {sender[:16]}...")
+
+@agent.on_message(model=ShardForward)
+@recorder.handler
+async def handle_shard_forward(ctx: Context, sender: str, msg: ShardForward):
+    router.received += 1
+    report = {"ctx": ctx, "sender": msg.citizen, "text": msg.text, "location": msg.location,
+              "origin": sender, "received_at": time.monotonic()}
+    if not await ingestion.queue.try_put(report, urgent=is_urgent_report(msg.text)):
+        events.emit("report_rejected", logging.WARNING, citizen=msg.citizen, shard=sender, length=len(msg.text))
+        await reply_to_citizen(report, REJECTED_TEXT)
+
+@agent.on_message(model=ShardReply)
+@recorder.handler
+async def handle_shard_reply(ctx: Context, sender: str, msg: ShardReply):
+    await ctx.send(msg.citizen, create_text_chat(msg.text))
+
+@agent.on_message(model=ShardResponse)
+@recorder.handler
+async def handle_shard_response(ctx: Context, sender: str, msg: ShardResponse):
+    await record_agent_response(ctx, msg.agent, msg.response)
+
+@agent.on_message(model=EmergencyAlert)
+@recorder.handler
+async def handle_direct_alert(ctx: Context, sender: str, msg: EmergencyAlert):
+    received_at = time.monotonic()
+    # Alerts from other instances were routed here already; never bounce them back
+    if sender not in router.peers and not router.owns(msg.location):
+        owner = router.owner(msg.location)
+        delivery = await dispatcher.send(ctx, owner, msg)
+        if delivery.delivered:
+            router.forwarded += 1
+            events.emit("alert_forwarded", alert_id=msg.alert_id, severity=msg.severity,
+                        region=router.region(msg.location), shard=owner)
+            return
+        events.emit("shard_unreachable", logging.WARNING, shard=owner, error=str(delivery.error))
+    if sender in router.peers:
+        router.received += 1
+    await dispatch_alert(ctx, msg, analyze_with_metta(msg.description), received_at, source="direct")
+
 # Realistic emergency scenarios with MeTTa
 @agent.on_interval(period=45.0)
+@recorder.handler
 async def demo_emergency_generator(ctx: Context):
     realistic_scenarios = [
         {
@@ -290,25 +637,11 @@ async def demo_emergency_generator(ctx: Context):
         scenario = random.choice(realistic_scenarios)
 
         # Full MeTTa analysis
+        received_at = time.monotonic()
         metta_analysis = analyze_with_metta(scenario["desc"])
 
-        ctx.logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-        ctx.logger.info(f"🚨 EMERGENCY DETECTED")
-        ctx.logger.info(f"📝 {scenario['desc']}")
-        ctx.logger.info(f"📍 Location: {scenario['location']}")
-        ctx.logger.info(f"👥 Affected: {scenario['count']} people")
-
-        ctx.logger.info(f"\n🧠 MeTTa Semantic Analysis:")
-        ctx.logger.info(f"   Type Inference: {metta_analysis['inferred_type']}")
-        ctx.logger.info(f"   Severity Score: {metta_analysis['severity_score']:.1f}/10")
-        ctx.logger.info(f"   Confidence: {metta_analysis['confidence']:.1%}")
-        ctx.logger.info(f"   Resources Required: {', '.join(metta_analysis['required_resources'])}")
-
-        if metta_analysis['escalation_risk']:
-            ctx.logger.info(f"   ⚠️ Escalation Risks: {', '.join(metta_analysis['escalation_risk'])}")
-
         emergency = EmergencyAlert(
-            alert_id=f"EM{int(datetime.now().timestamp())}",
+            alert_id=f"EM{int(datetime.now().timestamp())}{uuid4().hex[:6]}",
             timestamp=datetime.now().isoformat(),
             location={
                 "lat": 40.7128 + random.uniform(-0.05, 0.05),
@@ -320,40 +653,138 @@ async def demo_emergency_generator(ctx: Context):
             affected_count=scenario["count"]
         )
 
-        active_emergencies[emergency.alert_id] = emergency
-
-        # Smart dispatch
-        ctx.logger.info(f"\n🚀 Dispatching Response Teams:")
-
-        if "medical" in metta_analysis['required_resources'] or metta_analysis['inferred_type'] == "medical":
-            await ctx.send(MEDICAL_AGENT, emergency)
-            ctx.logger.info(f"   → Medical Response Team")
-
-        if any(r in metta_analysis['required_resources'] for r in ["fire_equipment", "rescue_boats"]):
-            await ctx.send(RESOURCE_AGENT, emergency)
-            ctx.logger.info(f"   → Resource Allocation Unit")
-
-        if scenario["count"] > 20 or metta_analysis['escalation_risk']:
-            await ctx.send(SHELTER_AGENT, emergency)
-            ctx.logger.info(f"   → Shelter Coordination")
+        if not router.owns(emergency.location):
+            owner = router.owner(emergency.location)
+            delivery = await dispatcher.send(ctx, owner, emergency)
+            if delivery.delivered:
+                router.forwarded += 1
+                events.emit("alert_forwarded", alert_id=emergency.alert_id, severity=emergency.severity,
+                            region=router.region(emergency.location), shard=owner)
+                return
+            events.emit("shard_unreachable", logging.WARNING, shard=owner, error=str(delivery.error))
+
+        await dispatch_alert(ctx, emergency, metta_analysis, received_at, source="demo", place=scenario["location"])
+
+async def dispatch_alert(ctx: Context, emergency: EmergencyAlert, metta_analysis: Dict, received_at: float,
+                         **fields):
+    """Open an incident for an alert this instance owns and dispatch response teams"""
+    # An alert repeating a recent nearby incident merges into it, as chat reports do
+    decision = deduplicator.check(emergency.location, emergency.emergency_type, emergency.description)
+    if decision.duplicate_of is not None:
+        incident = incidents.merge_report(decision.duplicate_of, emergency.affected_count)
+        events.emit("report_merged", alert_id=decision.duplicate_of, severity=incident.alert.severity,
+                    similarity=decision.similarity, cell=decision.cell, candidates=decision.candidates,
+                    lookup_us=round(decision.lookup_time * 1e6), reports=incident.reports,
+                    affected=incident.alert.affected_count, merged_alert=emergency.alert_id, **fields)
+        return
+
+    incidents.open(emergency)
+    deduplicator.register(decision, emergency.alert_id)
+    latency.start(emergency.alert_id, received_at)
+
+    # Smart dispatch
+    targets = alert_targets(metta_analysis, emergency.affected_count)
+
+    async def delivered(deliveries: Dict):
+        record_dispatch(emergency, deliveries)
+        log_dispatch(emergency, metta_analysis, targets, deliveries, cell=decision.cell,
+                     candidates=decision.candidates, **fields)
+
+    await scheduler.run(
+        lambda: batcher.queue_all(ctx, targets, emergency, delivered),
+        metta_analysis["severity_score"], emergency.affected_count, emergency.severity
+    )
 
-        ctx.logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+async def record_agent_response(ctx: Context, sender: str, msg: EmergencyResponse):
+    agent_names = {MEDICAL_AGENT: "medical", RESOURCE_AGENT: "resource", SHELTER_AGENT: "shelter"}
+
+    if msg.alert_id not in incidents and router.handoff_owner(msg.alert_id):
+        # The incident moved to another shard after dispatch; the response follows it
+        await ctx.send(router.handoff_owner(msg.alert_id), ShardResponse(agent=sender, response=msg))
+        events.emit("response_forwarded", alert_id=msg.alert_id, agent=agent_names.get(sender, sender),
+                    shard=router.handoff_owner(msg.alert_id))
+        return
+
+    # The new owner of a handed-off incident took its stage times along
+    elapsed = latency.responded(msg.alert_id, sender)
+    incident = incidents.record_response(msg.alert_id, sender, msg.details)
+    events.emit(
+        "response_recorded",
+        alert_id=msg.alert_id,
+        agent=agent_names.get(sender, sender),
+        severity=incident.alert.severity if incident is not None else None,
+        state=incident.state if incident is not None else None,
+        end_to_end_ms=round(elapsed * 1000) if elapsed is not None else None,
+        teams=msg.teams_assigned,
+        details=msg.details
+    )
 
 @agent.on_message(model=EmergencyResponse)
+@recorder.handler
 async def handle_response_from_agents(ctx: Context, sender: str, msg: EmergencyResponse):
-    agent_names = {
-        MEDICAL_AGENT: "🏥 Medical",
-        RESOURCE_AGENT: "📦 Resources",
-        SHELTER_AGENT: "🏠 Shelter"
-    }
-    agent_name = agent_names.get(sender, "Unknown")
-    ctx.logger.info(f"✅ {agent_name} confirmed: {msg.details}")
+    await record_agent_response(ctx, sender, msg)
+
+@agent.on_message(model=EmergencyResponseBatch)
+@recorder.handler
+async def handle_response_batch_from_agents(ctx: Context, sender: str, msg: EmergencyResponseBatch):
+    for response in msg.responses:
+        await record_agent_response(ctx, sender, response)
 
 @agent.on_interval(period=60.0)
+@recorder.handler
 async def system_status(ctx: Context):
-    if active_emergencies:
-        critical = sum(1 for e in active_emergencies.values() if e.severity == "CRITICAL")
-        ctx.logger.info(f"📊 System Status: {len(active_emergencies)} active | {critical} critical | {len(citizen_sessions)} citizens online")
+    incidents.evict_expired()
+    citizen_sessions.expire()
+    if len(incidents):
+        by_state = incidents.stats()["by_state"]
+        ctx.logger.info(f"📊 System Status: {incidents.active()} active | {incidents.active_by_severity('CRITICAL')} critical | {len(citizen_sessions)} citizens online")
+        ctx.logger.info(f"🗂️ Incidents: {by_state['open']} open | {by_state['dispatched']} dispatched | {by_state['confirmed']} confirmed | {by_state['closed']} closed | {incidents.evicted} evicted")
+
+    if latency.histograms:
+        ctx.logger.info(f"⏱️ Alert Latency (received -> response):")
+        for line in latency.report_lines():
+            ctx.logger.info(f"   {line}")
+        if os.environ.get("ERAIN_LATENCY_EXPORT"):
+            latency.export(os.environ["ERAIN_LATENCY_EXPORT"])
+
+    sessions = citizen_sessions.stats()
+    if sessions["started"]:
+        ctx.logger.info(f"💬 Sessions: {sessions['active']} active | {sessions['ended']} ended | {sessions['expired']} expired idle | {sessions['evicted']} evicted at cap")
+
+    queue = ingestion.stats()
+    if queue["enqueued"]:
+        ctx.logger.info(f"📥 Ingestion: depth {queue['depth']}/{ingestion.queue.max_depth} (peak {queue['peak_depth']}) | wait avg {queue['avg_wait']:.2f}s max {queue['max_wait']:.2f}s | {queue['busy']}/{queue['workers']} workers busy | utilization {queue['utilization']:.0%} | {queue['rejected']} rejected")
+
+    agent_names = {MEDICAL_AGENT: "Medical", RESOURCE_AGENT: "Resources", SHELTER_AGENT: "Shelter"}
+    for destination, agent_stats in dispatcher.latency_stats().items():
+        ctx.logger.info(f"📡 {agent_names.get(destination, destination[:12])}: {agent_stats['sent']} sent | {agent_stats['failed']} failed | avg {agent_stats['avg_latency'] * 1000:.0f}ms | max {agent_stats['max_latency'] * 1000:.0f}ms")
+
+    schedule = scheduler.stats()
+    if schedule["scheduled"]:
+        pending = ", ".join(f"{count} {label}" for label, count in schedule["pending_by_label"].items()) or "none"
+        ctx.logger.info(f"🚦 Dispatch Scheduler: {schedule['running']}/{schedule['slots']} slots busy | pending: {pending} | {schedule['contended']} waited for a slot")
+        for label, label_stats in schedule["latency_by_label"].items():
+            ctx.logger.info(f"   {label}: {label_stats['scheduled']} scheduled | wait avg {label_stats['avg_latency'] * 1000:.0f}ms max {label_stats['max_latency'] * 1000:.0f}ms")
+
+    if router.sharded:
+        shards = router.stats()
+        ctx.logger.info(f"🗺️ Shards: {shards['members']} instances | {shards['forwarded']} forwarded out | {shards['received']} received | {shards['handed_off']} handed off | {shards['adopted']} adopted")
+
+    dedup = deduplicator.stats()
+    if dedup["checked"]:
+        ctx.logger.info(f"🔗 Report Dedup: {dedup['merged']}/{dedup['checked']} merged ({dedup['merge_rate']:.0%}) | {dedup['unlocated']} without location | {dedup['indexed']} indexed | lookup avg {dedup['avg_lookup'] * 1e6:.0f}µs max {dedup['max_lookup'] * 1e6:.0f}µs")
+
+    batches = batcher.stats()
+    if batches["batches_sent"]:
+        ctx.logger.info(f"📦 Alert Batching: {batches['batches_sent']} batches | {batches['alerts_batched']} alerts | avg {batches['avg_batch_size']:.1f} per batch | {batches['singles_sent']} singles")
+
+    logged = events.stats()
+    if logged["emitted"] or logged["sampled_out"]:
+        ctx.logger.info(f"🧾 Event Log: {sum(logged['emitted'].values())} written | {sum(logged['sampled_out'].values())} sampled out | {logged['gated']} below level | {logged['dropped']} dropped")
+
+    cache = analysis_cache.stats()
+    if cache["hits"] or cache["misses"]:
+        ctx.logger.info(f"🧠 Analysis Cache: {cache['hits']} hits | {cache['misses']} misses | {cache['evictions']} evicted | {cache['expirations']} expired | {cache['size']} cached")
 
 # Include the chat protocol and publish the manifest to Agentverse
 agent.include(chat_proto, publish_manifest=True)
@@ -2,8 +2,11 @@ from uagents import Agent, Context, Protocol, Model
 from uagents.setup import fund_agent_if_low
 from datetime import datetime
 from uuid import uuid4
-from typing import Dict, List
-import random
+from typing import Dict, List, Tuple
+import json
+import logging
+import os
+import sys
 from uagents_core.contrib.protocols.chat import (
     ChatAcknowledgement,
     ChatMessage,
@@ -13,6 +16,13 @@ from uagents_core.contrib.protocols.chat import (
     chat_protocol_spec,
 )
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from runtime.deployment import agent_options
+from runtime.events import EventLogger
+from runtime.recording import MessageRecorder
+from runtime.fleet import AmbulanceFleet
+from runtime.spatial import SpatialIndex
+
 class EmergencyAlert(Model):
     alert_id: str
     timestamp: str
@@ -29,38 +39,73 @@ class EmergencyResponse(Model):
     teams_assigned: int
     details: str
 
+class EmergencyAlertBatch(Model):
+    alerts: List[EmergencyAlert]
+
+class EmergencyResponseBatch(Model):
+    responses: List[EmergencyResponse]
+
 agent = Agent(
     name="medical_response",
-    seed="medical_response_seed_2024"
+    seed="medical_response_seed_2024",
+    **agent_options("medical")
 )
 
-fund_agent_if_low(agent.wallet.address())
+# Funding needs the ledger; offline runs (benchmark.py) skip it
+if not os.environ.get("ERAIN_OFFLINE"):
+    fund_agent_if_low(agent.wallet.address())
 
-COORDINATOR = "agent1qf76r7qe6m2hc3qtm390q5xjuy38n66nnhfhh3dcwgsqn69sxeuqk0ejmhj"
+# One structured record per handled alert, written off the event loop
+events = EventLogger.from_env("medical")
 
-# Hospital network
+# Every message in and out, when ERAIN_RECORD_DIR is set (see replay.py)
+recorder = MessageRecorder.from_env("medical")
+
+# Hospital network; ERAIN_HOSPITALS_FILE (JSON, same shape) replaces it for a real region
 hospitals = {
     "Central Medical Center": {
         "capacity": 500,
         "current": 342,
         "icu": 12,
-        "distance": 2.5
+        "lat": 40.7350,
+        "lng": -74.0020,
+        "capabilities": ["trauma", "burn", "cardiac"]
     },
     "St. Mary's Hospital": {
         "capacity": 300,
         "current": 189,
         "icu": 8,
-        "distance": 4.0
+        "lat": 40.6790,
+        "lng": -73.9900,
+        "capabilities": ["trauma", "cardiac", "pediatric"]
     },
     "Emergency Care Unit": {
         "capacity": 150,
         "current": 98,
         "icu": 5,
-        "distance": 1.8
+        "lat": 40.7200,
+        "lng": -73.9880,
+        "capabilities": ["general"]
     }
 }
+if os.environ.get("ERAIN_HOSPITALS_FILE"):
+    with open(os.environ["ERAIN_HOSPITALS_FILE"]) as f:
+        hospitals = json.load(f)
+
+# Hospitals never move, so the index is built once; beds and ICU are checked live
+hospital_index = SpatialIndex((info["lat"], info["lng"], name) for name, info in hospitals.items())
+HOSPITAL_CANDIDATES = 3
+
+# Specialist care each emergency type needs at the receiving hospital
+REQUIRED_CAPABILITY = {
+    "fire": "burn",
+    "chemical": "burn",
+    "medical": "trauma",
+    "earthquake": "trauma"
+}
 
-ambulances = {"available": 15, "dispatched": 0}
+# Individual ambulance units, starting at the hospitals and returning as missions end
+fleet = AmbulanceFleet.from_env([(info["lat"], info["lng"]) for info in hospitals.values()])
 
 # Initialize the chat protocol with the standard chat spec - EXACTLY AS SHOWN
 chat_proto = Protocol(spec=chat_protocol_spec)
@@ -78,6 +123,7 @@ def create_text_chat(text: str, end_session: bool = False) -> ChatMessage:
 
 # Handle incoming chat messages - EXACTLY AS SHOWN IN DOCS
 @chat_proto.on_message(ChatMessage)
+@recorder.handler
 async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
     ctx.logger.info(f"Received message from {sender}")
 
@@ -97,7 +143,7 @@ async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
             # Respond with medical status
             response_text = (
                 f"Medical Response System Status:\n"
-                f"Ambulances Available: {ambulances['available']}/15\n"
+                f"Ambulances Available: {fleet.available}/{len(fleet.units)}\n"
                 f"Hospitals Connected: {len(hospitals)}\n"
                 f"Ready for emergencies"
             )
@@ -113,73 +159,127 @@ async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
 
 # Handle acknowledgements for messages this agent has sent out - EXACTLY AS SHOWN
 @chat_proto.on_message(ChatAcknowledgement)
+@recorder.handler
 async def handle_acknowledgement(ctx: Context, sender: str, msg: ChatAcknowledgement):
     ctx.logger.info(f"Received acknowledgement from {sender} for message {msg.acknowledged_msg_id}")
 
 @agent.on_event("startup")
+@recorder.handler
 async def startup(ctx: Context):
     ctx.logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
     ctx.logger.info(f"🏥 Medical Response Agent Online")
     ctx.logger.info(f"📍 Address: {agent.address}")
     ctx.logger.info(f"✅ Chat Protocol: ENABLED for ASI:One")
-    ctx.logger.info(f"🚑 Ambulances Available: {ambulances['available']}")
+    ctx.logger.info(f"🚑 Ambulances Available: {fleet.available}/{len(fleet.units)}")
     ctx.logger.info(f"🏥 Hospitals Connected: {len(hospitals)}")
     ctx.logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
 
-@agent.on_message(model=EmergencyAlert)
-async def handle_emergency_alert(ctx: Context, sender: str, msg: EmergencyAlert):
-    ctx.logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-    ctx.logger.info(f"🚨 MEDICAL EMERGENCY RECEIVED")
-    ctx.logger.info(f"📝 {msg.description}")
-    ctx.logger.info(f"📍 Alert ID: {msg.alert_id}")
-    ctx.logger.info(f"⚠️ Severity: {msg.severity}")
-    ctx.logger.info(f"👥 Affected: {msg.affected_count}")
+def select_hospitals(msg: EmergencyAlert) -> List[Tuple[float, str]]:
+    """Nearest hospitals (km, name) with a free bed, ICU space for CRITICAL alerts and the needed capability"""
+    lat, lng = msg.location["lat"], msg.location["lng"]
+    capability = REQUIRED_CAPABILITY.get(msg.emergency_type)
+    needs_icu = msg.severity == "CRITICAL"
+
+    def has_bed(name: str) -> bool:
+        return hospitals[name]["capacity"] > hospitals[name]["current"]
+
+    def suitable(name: str) -> bool:
+        info = hospitals[name]
+        return has_bed(name) and (not needs_icu or info["icu"] > 0) and \
+            (capability is None or capability in info["capabilities"])
 
-    # Find best hospital
-    best_hosp = min(hospitals.items(), key=lambda x: x[1]["distance"])
-    hosp_name = best_hosp[0]
-    hosp_info = best_hosp[1]
+    # Without a suitable hospital, the nearest one with any free bed stabilizes first
+    return hospital_index.nearest(lat, lng, HOSPITAL_CANDIDATES, suitable) or \
+        hospital_index.nearest(lat, lng, 1, has_bed) or hospital_index.nearest(lat, lng, 1)
+
+def allocate_medical_response(msg: EmergencyAlert) -> Dict:
+    """Select a hospital and commit ambulances for one alert"""
+    candidates = select_hospitals(msg)
+    distance, hosp_name = candidates[0]
+    hosp_info = hospitals[hosp_name]
 
     # Calculate ambulances needed
     if msg.severity == "CRITICAL":
-        needed = min(3, ambulances["available"])
+        needed = 3
     elif msg.severity == "HIGH":
-        needed = min(2, ambulances["available"])
+        needed = 2
     else:
-        needed = min(1, ambulances["available"])
-
-    ambulances["available"] -= needed
-    ambulances["dispatched"] += needed
+        needed = 1
 
-    ctx.logger.info(f"\n🏥 Hospital Selection:")
-    ctx.logger.info(f"   Selected: {hosp_name}")
-    ctx.logger.info(f"   Available Beds: {hosp_info['capacity'] - hosp_info['current']}")
-    ctx.logger.info(f"   ICU Available: {hosp_info['icu']}")
-    ctx.logger.info(f"   Distance: {hosp_info['distance']} km")
+    # Nearest available units; each is busy until it has handed over at the hospital
+    units = fleet.dispatch(msg.alert_id, msg.location["lat"], msg.location["lng"], needed,
+                           (hosp_info["lat"], hosp_info["lng"]))
 
-    ctx.logger.info(f"\n🚑 Ambulance Dispatch:")
-    ctx.logger.info(f"   Units Dispatched: {needed}")
-    ctx.logger.info(f"   ETA: {int(hosp_info['distance'] * 3)} minutes")
+    return {
+        "hospital": hosp_name,
+        "info": hosp_info,
+        "distance": distance,
+        "alternatives": [name for _, name in candidates[1:]],
+        "ambulances": len(units),
+        "units": [unit.unit_id for _, unit in units],
+        "free_at": [unit.free_at for _, unit in units],
+        "eta": max(1, round(units[0][0])) if units else None
+    }
 
-    # Send response to coordinator
-    response = EmergencyResponse(
+def build_response(msg: EmergencyAlert, allocation: Dict) -> EmergencyResponse:
+    return EmergencyResponse(
         alert_id=msg.alert_id,
         status="Medical teams dispatched",
         dispatch_time=datetime.now().isoformat(),
-        teams_assigned=needed,
-        details=f"{needed} ambulances to {hosp_name} | ETA: {int(hosp_info['distance'] * 3)}min"
+        teams_assigned=allocation["ambulances"],
+        details=f"{allocation['ambulances']} ambulances to {allocation['hospital']} | "
+                + (f"ETA: {allocation['eta']}min" if allocation["eta"] is not None else "ETA: awaiting a free unit")
     )
 
-    await ctx.send(COORDINATOR, response)
-    ctx.logger.info(f"✅ Response sent to Coordinator")
-    ctx.logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+def log_handled(msg: EmergencyAlert, allocation: Dict, batched: bool = False):
+    hosp_info = allocation["info"]
+    events.emit(
+        "alert_handled", logging.INFO if allocation["ambulances"] else logging.WARNING,
+        alert_id=msg.alert_id,
+        severity=msg.severity,
+        affected=msg.affected_count,
+        description=msg.description if msg.severity == "CRITICAL" else None,
+        hospital=allocation["hospital"],
+        beds_free=hosp_info["capacity"] - hosp_info["current"],
+        icu=hosp_info["icu"],
+        distance_km=round(allocation["distance"], 2),
+        alternatives=allocation["alternatives"],
+        ambulances=allocation["ambulances"],
+        units=allocation["units"],
+        free_at=allocation["free_at"],
+        ambulances_available=fleet.available,
+        eta_min=allocation["eta"],
+        batched=batched
+    )
+
+@agent.on_message(model=EmergencyAlert)
+@recorder.handler
+async def handle_emergency_alert(ctx: Context, sender: str, msg: EmergencyAlert):
+    allocation = allocate_medical_response(msg)
+
+    # Reply to the coordinator instance that owns this alert's region
+    await ctx.send(sender, build_response(msg, allocation))
+    log_handled(msg, allocation)
+
+@agent.on_message(model=EmergencyAlertBatch)
+@recorder.handler
+async def handle_emergency_alert_batch(ctx: Context, sender: str, msg: EmergencyAlertBatch):
+    # One pass over the batch, one reply envelope
+    allocations = [(alert, allocate_medical_response(alert)) for alert in msg.alerts]
+
+    await ctx.send(sender, EmergencyResponseBatch(
+        responses=[build_response(alert, allocation) for alert, allocation in allocations]
+    ))
+    for alert, allocation in allocations:
+        log_handled(alert, allocation, batched=True)
 
 @agent.on_interval(period=30.0)
+@recorder.handler
 async def update_status(ctx: Context):
-    if ambulances["dispatched"] > 0 and random.random() < 0.3:
-        ambulances["available"] += 1
-        ambulances["dispatched"] -= 1
-        ctx.logger.info(f"🚑 Ambulance returned to service")
+    # Units come back when their computed missions end; dispatches release them too
+    returned = fleet.release_due()
+    if returned:
+        ctx.logger.info(f"🚑 {len(returned)} ambulances returned to service ({', '.join(u.unit_id for u in returned)}) | {fleet.available}/{len(fleet.units)} available")
 
 # Include the chat protocol and publish the manifest to Agentverse - EXACTLY AS SHOWN
 agent.include(chat_proto, publish_manifest=True)
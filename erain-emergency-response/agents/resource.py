@@ -3,6 +3,9 @@ from uagents.setup import fund_agent_if_low
 from datetime import datetime
 from uuid import uuid4
 from typing import Dict, List
+import logging
+import os
+import sys
 from uagents_core.contrib.protocols.chat import (
     ChatAcknowledgement,
     ChatMessage,
@@ -12,6 +15,11 @@ from uagents_core.contrib.protocols.chat import (
     chat_protocol_spec,
 )
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from runtime.deployment import agent_options
+from runtime.events import EventLogger
+from runtime.recording import MessageRecorder
+
 class EmergencyAlert(Model):
     alert_id: str
     timestamp: str
@@ -28,14 +36,27 @@ class EmergencyResponse(Model):
     teams_assigned: int
     details: str
 
+class EmergencyAlertBatch(Model):
+    alerts: List[EmergencyAlert]
+
+class EmergencyResponseBatch(Model):
+    responses: List[EmergencyResponse]
+
 agent = Agent(
     name="resource_allocation",
-    seed="resource_allocation_seed_2024"
+    seed="resource_allocation_seed_2024",
+    **agent_options("resource")
 )
 
-fund_agent_if_low(agent.wallet.address())
+# Funding needs the ledger; offline runs (benchmark.py) skip it
+if not os.environ.get("ERAIN_OFFLINE"):
+    fund_agent_if_low(agent.wallet.address())
 
-COORDINATOR = "agent1qf76r7qe6m2hc3qtm390q5xjuy38n66nnhfhh3dcwgsqn69sxeuqk0ejmhj"
+# One structured record per handled alert, written off the event loop
+events = EventLogger.from_env("resource")
+
+# Every message in and out, when ERAIN_RECORD_DIR is set (see replay.py)
+recorder = MessageRecorder.from_env("resource")
 
 # Depots
 depots = {
@@ -78,6 +99,7 @@ def create_text_chat(text: str, end_session: bool = False) -> ChatMessage:
 
 # Handle incoming chat messages
 @chat_proto.on_message(ChatMessage)
+@recorder.handler
 async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
     ctx.logger.info(f"Received message from {sender}")
 
@@ -117,10 +139,12 @@ async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
 
 # Handle acknowledgements for messages this agent has sent out
 @chat_proto.on_message(ChatAcknowledgement)
+@recorder.handler
 async def handle_acknowledgement(ctx: Context, sender: str, msg: ChatAcknowledgement):
     ctx.logger.info(f"Received acknowledgement from {sender} for message {msg.acknowledged_msg_id}")
 
 @agent.on_event("startup")
+@recorder.handler
 async def startup(ctx: Context):
     ctx.logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
     ctx.logger.info(f"📦 Resource Allocation System Online")
@@ -135,15 +159,8 @@ async def startup(ctx: Context):
     ctx.logger.info(f"📊 Total Resources: {total_resources} units")
     ctx.logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
 
-@agent.on_message(model=EmergencyAlert)
-async def handle_emergency_alert(ctx: Context, sender: str, msg: EmergencyAlert):
-    ctx.logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-    ctx.logger.info(f"📦 RESOURCE REQUEST RECEIVED")
-    ctx.logger.info(f"📝 {msg.description}")
-    ctx.logger.info(f"🆔 Alert: {msg.alert_id}")
-    ctx.logger.info(f"🔥 Type: {msg.emergency_type}")
-    ctx.logger.info(f"👥 Affected: {msg.affected_count}")
-
+def allocate_resources(msg: EmergencyAlert) -> Dict:
+    """Pick a depot and draw down the resource this emergency type needs"""
     # Find best depot (closest)
     best_depot = min(depots.items(), key=lambda x: x[1]["distance"])
     depot_name = best_depot[0]
@@ -163,37 +180,74 @@ async def handle_emergency_alert(ctx: Context, sender: str, msg: EmergencyAlert)
         resource = "emergency_teams"
         quantity = 3 if msg.severity == "HIGH" else 1
 
-    ctx.logger.info(f"\n🎯 Resource Optimization:")
-    ctx.logger.info(f"   Resource Type: {resource}")
-    ctx.logger.info(f"   Quantity Needed: {quantity}")
-    ctx.logger.info(f"   Selected Depot: {depot_name}")
-    ctx.logger.info(f"   Distance: {depot_info['distance']} km")
-
     # Allocate if available
-    if resource in depot_info and depot_info[resource] >= quantity:
+    allocated = resource in depot_info and depot_info[resource] >= quantity
+    if allocated:
         depots[depot_name][resource] -= quantity
-        ctx.logger.info(f"   ✅ Allocated {quantity} {resource}")
         details = f"Allocated {quantity} {resource} from {depot_name} | ETA: {int(depot_info['distance'] * 10)}min"
         teams = quantity if resource == "emergency_teams" else 0
     else:
-        ctx.logger.info(f"   ⚠️ Insufficient {resource}")
         details = "Partial allocation due to shortage"
         teams = 0
 
-    # Send response to coordinator
-    response = EmergencyResponse(
+    return {
+        "depot": depot_name,
+        "info": depot_info,
+        "resource": resource,
+        "quantity": quantity,
+        "allocated": allocated,
+        "teams": teams,
+        "details": details
+    }
+
+def build_response(msg: EmergencyAlert, allocation: Dict) -> EmergencyResponse:
+    return EmergencyResponse(
         alert_id=msg.alert_id,
         status="Resources allocated",
         dispatch_time=datetime.now().isoformat(),
-        teams_assigned=teams,
-        details=details
+        teams_assigned=allocation["teams"],
+        details=allocation["details"]
     )
 
-    await ctx.send(COORDINATOR, response)
-    ctx.logger.info(f"✅ Allocation confirmed to Coordinator")
-    ctx.logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+def log_handled(msg: EmergencyAlert, allocation: Dict, batched: bool = False):
+    events.emit(
+        "alert_handled", logging.INFO if allocation["allocated"] else logging.WARNING,
+        alert_id=msg.alert_id,
+        severity=msg.severity,
+        emergency_type=msg.emergency_type,
+        affected=msg.affected_count,
+        description=msg.description if msg.severity == "CRITICAL" else None,
+        depot=allocation["depot"],
+        distance_km=allocation["info"]["distance"],
+        resource=allocation["resource"],
+        quantity=allocation["quantity"],
+        allocated=allocation["allocated"],
+        batched=batched
+    )
+
+@agent.on_message(model=EmergencyAlert)
+@recorder.handler
+async def handle_emergency_alert(ctx: Context, sender: str, msg: EmergencyAlert):
+    allocation = allocate_resources(msg)
+
+    # Reply to the coordinator instance that owns this alert's region
+    await ctx.send(sender, build_response(msg, allocation))
+    log_handled(msg, allocation)
+
+@agent.on_message(model=EmergencyAlertBatch)
+@recorder.handler
+async def handle_emergency_alert_batch(ctx: Context, sender: str, msg: EmergencyAlertBatch):
+    # One pass over the batch, one reply envelope
+    allocations = [(alert, allocate_resources(alert)) for alert in msg.alerts]
+
+    await ctx.send(sender, EmergencyResponseBatch(
+        responses=[build_response(alert, allocation) for alert, allocation in allocations]
+    ))
+    for alert, allocation in allocations:
+        log_handled(alert, allocation, batched=True)
 
 @agent.on_interval(period=45.0)
+@recorder.handler
 async def optimize_inventory(ctx: Context):
     # Check for critical shortages
     for resource in ["emergency_teams", "medical_supplies"]:
@@ -3,6 +3,9 @@ from uagents.setup import fund_agent_if_low
 from datetime import datetime
 from uuid import uuid4
 from typing import Dict, List
+import logging
+import os
+import sys
 from uagents_core.contrib.protocols.chat import (
     ChatAcknowledgement,
     ChatMessage,
@@ -12,6 +15,11 @@ from uagents_core.contrib.protocols.chat import (
     chat_protocol_spec,
 )
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from runtime.deployment import agent_options
+from runtime.events import EventLogger
+from runtime.recording import MessageRecorder
+
 class EmergencyAlert(Model):
     alert_id: str
     timestamp: str
@@ -28,14 +36,27 @@ class EmergencyResponse(Model):
     teams_assigned: int
     details: str
 
+class EmergencyAlertBatch(Model):
+    alerts: List[EmergencyAlert]
+
+class EmergencyResponseBatch(Model):
+    responses: List[EmergencyResponse]
+
 agent = Agent(
     name="shelter_coordinator",
-    seed="shelter_coordinator_seed_2024"
+    seed="shelter_coordinator_seed_2024",
+    **agent_options("shelter")
 )
 
-fund_agent_if_low(agent.wallet.address())
+# Funding needs the ledger; offline runs (benchmark.py) skip it
+if not os.environ.get("ERAIN_OFFLINE"):
+    fund_agent_if_low(agent.wallet.address())
 
-COORDINATOR = "agent1qf76r7qe6m2hc3qtm390q5xjuy38n66nnhfhh3dcwgsqn69sxeuqk0ejmhj"
+# One structured record per handled alert, written off the event loop
+events = EventLogger.from_env("shelter")
+
+# Every message in and out, when ERAIN_RECORD_DIR is set (see replay.py)
+recorder = MessageRecorder.from_env("shelter")
 
 # Shelter network
 shelters = {
@@ -81,6 +102,7 @@ def create_text_chat(text: str, end_session: bool = False) -> ChatMessage:
 
 # Handle incoming chat messages
 @chat_proto.on_message(ChatMessage)
+@recorder.handler
 async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
     ctx.logger.info(f"Received message from {sender}")
 
@@ -117,10 +139,12 @@ async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
 
 # Handle acknowledgements for messages this agent has sent out
 @chat_proto.on_message(ChatAcknowledgement)
+@recorder.handler
 async def handle_acknowledgement(ctx: Context, sender: str, msg: ChatAcknowledgement):
     ctx.logger.info(f"Received acknowledgement from {sender} for message {msg.acknowledged_msg_id}")
 
 @agent.on_event("startup")
+@recorder.handler
 async def startup(ctx: Context):
     ctx.logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
     ctx.logger.info(f"🏠 Shelter Coordination System Online")
@@ -133,14 +157,8 @@ async def startup(ctx: Context):
     ctx.logger.info(f"📊 Capacity: {total_occupied}/{total_capacity} ({(total_occupied/total_capacity)*100:.1f}%)")
     ctx.logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
 
-@agent.on_message(model=EmergencyAlert)
-async def handle_emergency_alert(ctx: Context, sender: str, msg: EmergencyAlert):
-    ctx.logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-    ctx.logger.info(f"🏠 SHELTER REQUEST RECEIVED")
-    ctx.logger.info(f"📝 {msg.description}")
-    ctx.logger.info(f"🆔 Alert: {msg.alert_id}")
-    ctx.logger.info(f"👥 People needing shelter: {msg.affected_count}")
-
+def assign_shelter(msg: EmergencyAlert) -> Dict:
+    """Pick the shelter with the best space/distance score and reserve the spaces"""
     # Find best shelter (most space and closest)
     best_shelter = None
     best_score = -1
@@ -154,42 +172,73 @@ async def handle_emergency_alert(ctx: Context, sender: str, msg: EmergencyAlert)
                 best_score = score
                 best_shelter = (name, info)
 
-    if best_shelter:
-        shelter_name = best_shelter[0]
-        shelter_info = best_shelter[1]
-
-        ctx.logger.info(f"\n🏘️ Shelter Assignment:")
-        ctx.logger.info(f"   Selected: {shelter_name}")
-        ctx.logger.info(f"   Address: {shelter_info['address']}")
-        ctx.logger.info(f"   Available Space: {shelter_info['capacity'] - shelter_info['current']}")
-        ctx.logger.info(f"   Distance: {shelter_info['distance']} km")
-        ctx.logger.info(f"   Amenities: {', '.join(shelter_info['amenities'][:3])}")
-
-        # Update occupancy
-        shelters[shelter_name]["current"] = min(
-            shelter_info["capacity"],
-            shelter_info["current"] + msg.affected_count
-        )
-
-        details = f"{shelter_name} assigned | {msg.affected_count} spaces | {shelter_info['address']}"
-    else:
-        ctx.logger.info(f"   ⚠️ No suitable shelter with enough space")
-        details = "All shelters at capacity - activating overflow protocol"
-
-    # Send response to coordinator
-    response = EmergencyResponse(
+    if not best_shelter:
+        return {"shelter": None, "details": "All shelters at capacity - activating overflow protocol"}
+
+    shelter_name, shelter_info = best_shelter
+    available = shelter_info["capacity"] - shelter_info["current"]
+
+    # Update occupancy
+    shelters[shelter_name]["current"] = min(
+        shelter_info["capacity"],
+        shelter_info["current"] + msg.affected_count
+    )
+
+    return {
+        "shelter": shelter_name,
+        "info": shelter_info,
+        "available": available,
+        "details": f"{shelter_name} assigned | {msg.affected_count} spaces | {shelter_info['address']}"
+    }
+
+def build_response(msg: EmergencyAlert, assignment: Dict) -> EmergencyResponse:
+    return EmergencyResponse(
         alert_id=msg.alert_id,
         status="Shelter assigned",
         dispatch_time=datetime.now().isoformat(),
         teams_assigned=msg.affected_count,
-        details=details
+        details=assignment["details"]
     )
 
-    await ctx.send(COORDINATOR, response)
-    ctx.logger.info(f"✅ Assignment confirmed to Coordinator")
-    ctx.logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+def log_handled(msg: EmergencyAlert, assignment: Dict, batched: bool = False):
+    shelter_info = assignment.get("info") or {}
+    events.emit(
+        "alert_handled", logging.INFO if assignment["shelter"] else logging.WARNING,
+        alert_id=msg.alert_id,
+        severity=msg.severity,
+        affected=msg.affected_count,
+        description=msg.description if msg.severity == "CRITICAL" else None,
+        shelter=assignment["shelter"],
+        address=shelter_info.get("address"),
+        available=assignment.get("available"),
+        distance_km=shelter_info.get("distance"),
+        amenities=shelter_info.get("amenities"),
+        batched=batched
+    )
+
+@agent.on_message(model=EmergencyAlert)
+@recorder.handler
+async def handle_emergency_alert(ctx: Context, sender: str, msg: EmergencyAlert):
+    assignment = assign_shelter(msg)
+
+    # Reply to the coordinator instance that owns this alert's region
+    await ctx.send(sender, build_response(msg, assignment))
+    log_handled(msg, assignment)
+
+@agent.on_message(model=EmergencyAlertBatch)
+@recorder.handler
+async def handle_emergency_alert_batch(ctx: Context, sender: str, msg: EmergencyAlertBatch):
+    # One pass over the batch, one reply envelope
+    assignments = [(alert, assign_shelter(alert)) for alert in msg.alerts]
+
+    await ctx.send(sender, EmergencyResponseBatch(
+        responses=[build_response(alert, assignment) for alert, assignment in assignments]
+    ))
+    for alert, assignment in assignments:
+        log_handled(alert, assignment, batched=True)
 
 @agent.on_interval(period=60.0)
+@recorder.handler
 async def shelter_status_update(ctx: Context):
     total_capacity = sum(s["capacity"] for s in shelters.values())
     total_occupied = sum(s["current"] for s in shelters.values())
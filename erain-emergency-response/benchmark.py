@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Offline Load Benchmark for the ERAIN Agents
+Loads the coordinator, medical, resource and shelter agents into one process,
+connects their handlers over the in-process local transport and drives the
+coordinator with synthetic citizen reports at a configurable arrival rate,
+incident mix and geographic spread. No network, ledger or Agentverse access
+
+Usage:
+    python benchmark.py --rate 50 --duration 30
+    python benchmark.py --rate 200 --reports 5000 --mix fire=0.5,medical=0.5 --spread 10
+    python benchmark.py --output bench.json --compare baseline.json
+    python benchmark.py --rate 300 --check-batching
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+# The agent modules are imported, not run: skip ledger funding and keep the
+# per-alert event log off the terminal unless asked for
+os.environ["ERAIN_OFFLINE"] = "1"
+os.environ.setdefault("ERAIN_EVENT_LOG", os.devnull)
+
+from runtime.deployment import load_agent
+from runtime.latency import LatencyHistogram
+from runtime.local_transport import LocalTransport
+
+# A batched run may answer this much slower than the unbatched one before --check-batching fails
+BATCHING_TOLERANCE = 0.05
+
+CENTER = {"lat": 40.7128, "lng": -74.0060}
+KM_PER_DEGREE = 111.32
+
+PLACES = ["Main St", "Riverside Dr", "Harbor Rd", "Elm Ave", "Station Sq", "Park Ln", "Mill Rd", "Bay St"]
+TEMPLATES = {
+    "fire": [
+        "Fire in apartment building on {place}, smoke on multiple floors, {n} residents inside",
+        "Warehouse blaze near {place}, flames spreading to the next building",
+        "Car on fire at {place}, fuel leak, driver trapped"
+    ],
+    "flood": [
+        "Flash flood on {place}, water rising fast, {n} families trapped on rooftops",
+        "River overflow at {place}, evacuation needed for {n} homes"
+    ],
+    "medical": [
+        "Multi-vehicle pile-up on {place}, multiple critical injuries",
+        "Man unconscious outside {place}, not breathing, heart attack suspected",
+        "Bus crash at {place}, {n} passengers injured and bleeding"
+    ],
+    "chemical": [
+        "Chemical spill at plant on {place}, toxic fumes spreading",
+        "Hazmat spill near {place}, toxic contamination, {n} workers with exposure symptoms"
+    ],
+    "earthquake": [
+        "Earthquake damage on {place}, building partly collapsed, {n} people trapped"
+    ]
+}
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for pair in text.split(","):
+        kind, weight = pair.split("=")
+        if kind.strip() not in TEMPLATES:
+            raise ValueError(f"Unknown incident type {kind!r}, expected one of {', '.join(TEMPLATES)}")
+        mix[kind.strip()] = float(weight)
+    return mix
+
+
+def random_location(rng: random.Random, spread_km: float) -> Dict[str, float]:
+    """Uniform point in a disc of `spread_km` around the center"""
+    distance = spread_km * math.sqrt(rng.random())
+    bearing = rng.uniform(0, 2 * math.pi)
+    return {
+        "lat": CENTER["lat"] + distance * math.cos(bearing) / KM_PER_DEGREE,
+        "lng": CENTER["lng"] + distance * math.sin(bearing) / (KM_PER_DEGREE * math.cos(math.radians(CENTER["lat"])))
+    }
+
+
+class ReportGenerator:
+    """Synthetic citizen reports; a share of them re-report a recent incident from nearby"""
+
+    def __init__(self, mix: Dict[str, float], spread_km: float, duplicates: float, seed: int):
+        self.rng = random.Random(seed)
+        self.kinds = list(mix)
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.spread_km = spread_km
+        self.duplicates = duplicates
+        self.recent: List[Dict] = []
+
+    def next(self) -> Dict:
+        rng = self.rng
+        if self.recent and rng.random() < self.duplicates:
+            original = rng.choice(self.recent)
+            location = {"lat": original["location"]["lat"] + rng.uniform(-2e-4, 2e-4),
+                        "lng": original["location"]["lng"] + rng.uniform(-2e-4, 2e-4)}
+            return {"text": original["text"], "location": location, "kind": original["kind"], "duplicate": True}
+
+        kind = rng.choices(self.kinds, self.weights)[0]
+        text = rng.choice(TEMPLATES[kind]).format(place=f"{rng.randrange(1, 999)} {rng.choice(PLACES)}",
+                                                  n=rng.randrange(2, 120))
+        report = {"text": text, "location": random_location(rng, self.spread_km), "kind": kind, "duplicate": False}
+        self.recent = (self.recent + [report])[-50:]
+        return report
+
+
+def connect_agents(transport: LocalTransport):
+    """Load the four agents and register their handlers on the transport under the coordinator's addresses"""
+    coordinator = load_agent("coordinator")
+    medical = load_agent("medical")
+    resource = load_agent("resource")
+    shelter = load_agent("shelter")
+
+    transport.register(coordinator.agent.address, "coordinator", {
+        coordinator.ChatMessage: coordinator.handle_message,
+        coordinator.ChatAcknowledgement: coordinator.handle_acknowledgement,
+        coordinator.EmergencyAlert: coordinator.handle_direct_alert,
+        coordinator.EmergencyResponse: coordinator.handle_response_from_agents,
+        coordinator.EmergencyResponseBatch: coordinator.handle_response_batch_from_agents
+    })
+    for address, module, name in ((coordinator.MEDICAL_AGENT, medical, "medical"),
+                                  (coordinator.RESOURCE_AGENT, resource, "resource"),
+                                  (coordinator.SHELTER_AGENT, shelter, "shelter")):
+        transport.register(address, name, {
+            module.EmergencyAlert: module.handle_emergency_alert,
+            module.EmergencyAlertBatch: module.handle_emergency_alert_batch
+        })
+    return coordinator, {"medical": medical, "resource": resource, "shelter": shelter}
+
+
+def citizen_report(coordinator, report: Dict):
+    """The chat message an ASI:One client sends: the shared position, then the report text"""
+    location = report["location"]
+    return coordinator.ChatMessage(
+        timestamp=datetime.utcnow(),
+        msg_id=uuid4(),
+        content=[coordinator.MetadataContent(metadata={"lat": str(location["lat"]), "lng": str(location["lng"])}),
+                 coordinator.TextContent(type="text", text=report["text"])]
+    )
+
+
+def final_reply(coordinator, replies: List[Tuple[float, object]]) -> Optional[Tuple[float, str]]:
+    """Time and text of the reply that answers a report: skips acknowledgements and queued notices"""
+    for at, message in replies:
+        for item in getattr(message, "content", ()):
+            text = getattr(item, "text", None)
+            if text is not None and not text.startswith(coordinator.QUEUED_TEXT):
+                return at, text
+    return None
+
+
+def _settled(coordinator, transport: LocalTransport, submitted: int, replied: int) -> bool:
+    return (replied >= submitted and not transport.in_flight and not coordinator.scheduler.stats()["running"]
+            and not coordinator.batcher.stats()["buffered"] and not coordinator.batcher.stats()["awaiting_delivery"]
+            and not len(coordinator.ingestion.queue))
+
+
+async def run_benchmark(args) -> Dict:
+    transport = LocalTransport(delay=args.network_delay / 1000)
+    coordinator, agents = connect_agents(transport)
+    ctx = transport.contexts[coordinator.agent.address]
+    for name, module in agents.items():
+        await module.startup(transport.contexts[getattr(coordinator, f"{name.upper()}_AGENT")])
+    await coordinator.startup(ctx)
+
+    generator = ReportGenerator(parse_mix(args.mix), args.spread, args.duplicates, args.seed)
+    total = args.reports or int(args.rate * args.duration)
+    arrivals: Dict[str, float] = {}
+
+    rng = random.Random(args.seed + 1)
+    started = next_at = time.monotonic()
+    for i in range(total):
+        # Open-loop Poisson arrivals through handle_message, as in production:
+        # a full ingestion queue turns reports away, it never slows the generator
+        next_at += rng.expovariate(args.rate)
+        wait = next_at - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        citizen = f"citizen-{i:06d}"
+        arrivals[citizen] = time.monotonic()
+        transport.deliver(citizen, coordinator.agent.address, citizen_report(coordinator, generator.next()))
+    generated = time.monotonic() - started
+
+    deadline = time.monotonic() + args.drain_timeout
+    while time.monotonic() < deadline:
+        replied = sum(1 for citizen in arrivals if final_reply(coordinator, transport.outbox.get(citizen, ())))
+        if _settled(coordinator, transport, len(arrivals), replied):
+            break
+        await asyncio.sleep(0.02)
+    await coordinator.ingestion.stop()
+    # One pass of the periodic status report over the final state, so a broken report fails the run
+    await coordinator.system_status(ctx)
+
+    reply_latency = LatencyHistogram()
+    rejected = 0
+    finished = started
+    for citizen, arrived in arrivals.items():
+        reply = final_reply(coordinator, transport.outbox.get(citizen, ()))
+        if reply is None:
+            continue
+        at, text = reply
+        if text == coordinator.REJECTED_TEXT:
+            rejected += 1
+            continue
+        reply_latency.record(at - arrived)
+        finished = max(finished, at)
+    elapsed = finished - started
+    replied = reply_latency.count
+
+    return {
+        "generated_at": time.time(),
+        "config": {
+            "rate": args.rate, "reports": total, "mix": parse_mix(args.mix), "spread_km": args.spread,
+            "duplicates": args.duplicates, "network_delay_ms": args.network_delay, "seed": args.seed,
+            "env": {k: v for k, v in os.environ.items() if k.startswith("ERAIN_") and k != "ERAIN_OFFLINE"}
+        },
+        "unit": "seconds",
+        "offered_rate": total / generated if generated else 0.0,
+        "throughput": replied / elapsed if elapsed else 0.0,
+        "elapsed": elapsed,
+        "reports": {"submitted": total, "answered": replied, "rejected": rejected, "lost": total - replied - rejected},
+        "stages": {"report_to_reply": reply_latency.summary(), **coordinator.latency.summary()},
+        "incidents": coordinator.incidents.stats(),
+        "ingestion": coordinator.ingestion.stats(),
+        "scheduler": coordinator.scheduler.stats(),
+        "dedup": coordinator.deduplicator.stats(),
+        "batching": coordinator.batcher.stats(),
+        "transport": transport.stats()
+    }
+
+
+def print_results(results: Dict, baseline: Optional[Dict] = None):
+    config = results["config"]
+    print(f"📊 {results['reports']['submitted']} reports at {config['rate']:.0f}/s offered "
+          f"({results['offered_rate']:.0f}/s achieved) | spread {config['spread_km']} km | "
+          f"mix {', '.join(f'{k} {v:g}' for k, v in config['mix'].items())}")
+    print(f"   Throughput: {results['throughput']:.1f} reports/s | answered {results['reports']['answered']} | "
+          f"rejected {results['reports']['rejected']} | lost {results['reports']['lost']} | "
+          f"{results['transport']['messages']} messages")
+    print(f"   {'stage':<26}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for stage, summary in results["stages"].items():
+        line = (f"   {stage:<26}{summary['count']:>7}{summary['p50'] * 1000:>10.1f}{summary['p95'] * 1000:>10.1f}"
+                f"{summary['p99'] * 1000:>10.1f}{summary['max'] * 1000:>10.1f}")
+        previous = (baseline or {}).get("stages", {}).get(stage)
+        if previous and previous["p95"]:
+            line += f"   p95 {(summary['p95'] / previous['p95'] - 1):+.0%}"
+        print(line)
+    if baseline:
+        print(f"   Throughput vs baseline: {results['throughput'] / baseline['throughput'] - 1:+.1%}")
+    if results["transport"]["failed"]:
+        print(f"   ⚠️ {results['transport']['failed']} handler failures, last: {results['transport']['last_error']}")
+
+
+def check_batching(args):
+    """The same load unbatched and batched; exits non-zero if batching costs throughput"""
+    os.environ["ERAIN_BATCH_PEERS"] = ""
+    unbatched = asyncio.run(run_benchmark(args))
+    print_results(unbatched)
+    os.environ["ERAIN_BATCH_PEERS"] = "medical,resource,shelter"
+    batched = asyncio.run(run_benchmark(args))
+    print_results(batched, unbatched)
+
+    batching = batched["batching"]
+    print(f"   Batching: avg {batching['avg_batch_size']:.1f} alerts per batch | "
+          f"{batched['transport']['messages']} vs {unbatched['transport']['messages']} messages")
+    if batched["throughput"] < unbatched["throughput"] * (1 - BATCHING_TOLERANCE):
+        print(f"❌ Batching lowered throughput: {batched['throughput']:.1f} vs {unbatched['throughput']:.1f} reports/s")
+        sys.exit(1)
+    print(f"✅ Batching kept throughput: {batched['throughput']:.1f} vs {unbatched['throughput']:.1f} reports/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rate", type=float, default=50.0, help="mean report arrivals per second (Poisson)")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of arrivals, unless --reports is set")
+    parser.add_argument("--reports", type=int, default=0, help="number of reports to send")
+    parser.add_argument("--mix", default="fire=0.3,flood=0.2,medical=0.3,chemical=0.15,earthquake=0.05",
+                        help="incident type weights")
+    parser.add_argument("--spread", type=float, default=25.0, help="radius in km around the city center")
+    parser.add_argument("--duplicates", type=float, default=0.1, help="share of reports repeating a recent incident")
+    parser.add_argument("--network-delay", type=float, default=0.0, help="simulated one-way delay per message (ms)")
+    parser.add_argument("--drain-timeout", type=float, default=30.0, help="seconds to wait for in-flight work")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--check-batching", action="store_true",
+                        help="run without batching, then batching all three responders; fail if throughput drops")
+    args = parser.parse_args()
+
+    if args.check_batching:
+        check_batching(args)
+        return
+
+    results = asyncio.run(run_benchmark(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, default=str)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
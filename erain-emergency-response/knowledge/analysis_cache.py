@@ -0,0 +1,131 @@
+"""
+Analysis Cache for Emergency Reports
+Bounded LRU cache with TTL expiry for report analysis results, keyed on a
+normalized form of the description
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+import copy
+import os
+import re
+import threading
+import time
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL = 300.0  # seconds
+
+_TOKEN = re.compile(r"[\w'-]+")
+
+
+def normalize_description(description: str) -> str:
+    """Reduce a description to lowercase words so near-identical reports share a key"""
+    return " ".join(_TOKEN.findall(description.lower()))
+
+
+class AnalysisCache:
+    """
+    Thread-safe LRU cache of analysis results with per-entry expiry
+    Results are deep-copied on the way in and out, so callers may change them
+    and their lists freely. Every invalidation starts a new `generation`; a
+    result computed under an older one is refused, so a computation that was
+    in flight across a knowledge base change cannot cache a stale answer
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+        if max_entries < 1:
+            raise ValueError(f"Cache size must be at least 1, got {max_entries}")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.generation = 0
+        self.stale_writes = 0
+
+    @classmethod
+    def from_env(cls) -> "AnalysisCache":
+        """Build a cache sized by ERAIN_ANALYSIS_CACHE_SIZE and ERAIN_ANALYSIS_CACHE_TTL"""
+        return cls(
+            max_entries=int(os.environ.get("ERAIN_ANALYSIS_CACHE_SIZE", DEFAULT_MAX_ENTRIES)),
+            ttl=float(os.environ.get("ERAIN_ANALYSIS_CACHE_TTL", DEFAULT_TTL))
+        )
+
+    def get(self, description: str) -> Optional[Dict]:
+        """Return the cached result for a description, or None on a miss"""
+        key = normalize_description(description)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, description: str, result: Dict, generation: Optional[int] = None):
+        """Cache a result, evicting the least recently used entry when full; refused if computed under an older generation"""
+        key = normalize_description(description)
+        result = copy.deepcopy(result)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                self.stale_writes += 1
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, description: str, compute: Callable[[str], Dict]) -> Dict:
+        """Return the cached result, computing and caching it on a miss"""
+        generation = self.generation
+        result = self.get(description)
+        if result is None:
+            result = compute(description)
+            self.put(description, result, generation)
+        return result
+
+    def advance(self):
+        """Start a new generation without dropping entries, refusing results computed before now"""
+        with self._lock:
+            self.generation += 1
+
+    def invalidate(self):
+        """Drop every entry, e.g. when the knowledge base is reloaded"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+            self.generation += 1
+
+    def invalidate_where(self, predicate: Callable[[Dict], bool]):
+        """Drop only the entries whose cached result matches the predicate"""
+        with self._lock:
+            stale = [key for key, (_, result) in self._entries.items() if predicate(result)]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self.invalidations += 1
+            # In-flight computations may depend on the change even if nothing cached did
+            self.generation += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "generation": self.generation,
+                "stale_writes": self.stale_writes
+            }
@@ -3,9 +3,288 @@ MeTTa Knowledge Graph Integration for Emergency Response
 Provides semantic reasoning and decision support using SingularityNET's MeTTa
 """
 
-from hyperon import MeTTa, GroundedAtom, ExpressionAtom, SymbolAtom, E, S
-from typing import Dict, List, Tuple, Optional
+from hyperon import MeTTa, GroundedAtom, ExpressionAtom, SymbolAtom, VariableAtom, E, S
+from typing import Dict, Iterator, List, Tuple, Optional
+from collections import deque
+from contextlib import contextmanager
+import functools
+import inspect
 import json
+import numpy as np
+import os
+import sys
+import threading
+
+if __package__ in (None, ""):
+    # Allow running this module directly as a script
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from knowledge.analysis_cache import AnalysisCache
+from knowledge.kb_snapshot import load_snapshot, source_hash, write_snapshot
+from knowledge.keyword_classifier import classify_description
+from knowledge.reasoning_executor import ReasoningExecutor
+
+# Relations whose ground facts are compiled into the FactIndex
+INDEXED_RELATIONS = (
+    "requires",
+    "optimal-resource",
+    "escalates-to",
+    "priority-for",
+    "should-collaborate",
+    "has-capability",
+)
+
+# Arithmetic rules compiled when every clause is a linear (* $x K) form
+LINEAR_RULES = ("triage-score", "estimate-response-time")
+
+# Query kinds accepted by EmergencyKnowledgeGraph.query_batch
+QUERY_KINDS = INDEXED_RELATIONS + LINEAR_RULES
+
+# Argument positions declared as String in the ontology; the rest are symbols
+STRING_ARGUMENTS = {
+    "has-capability": (0, 1),
+    "can-share-resource": (0, 1),
+}
+
+# Keyword classifier types that are named differently in the ontology
+ONTOLOGY_TYPES = {"chemical": "chemical-spill"}
+
+HOSPITAL_CAPABILITIES = ["trauma-center", "burn-unit", "cardiac-unit", "pediatric-icu"]
+
+
+class IndexParityError(AssertionError):
+    """Raised in verify mode when an indexed answer disagrees with MeTTa"""
+
+
+def _render_fact(relation: str, args: Tuple[str, ...], value: str) -> str:
+    """Render (= (relation args...) value) as MeTTa source, quoting String arguments"""
+    quoted = STRING_ARGUMENTS.get(relation, ())
+    rendered = [f'"{a}"' if position in quoted else a for position, a in enumerate(args)]
+    return f"(= ({relation} {' '.join(rendered)}) {value})"
+
+
+def _atom_text(atom) -> str:
+    """Render an atom as plain text, unquoting grounded strings"""
+    text = str(atom)
+    if len(text) >= 2 and text[0] == '"' and text[-1] == '"':
+        return text[1:-1]
+    return text
+
+
+class FactIndex:
+    """
+    Hash-keyed tables of the ground facts loaded into the knowledge base
+    Answers lookups in O(1) without a MeTTa round-trip
+    """
+
+    def __init__(self):
+        self._values: Dict[Tuple[str, Tuple[str, ...]], str] = {}
+        self._objects: Dict[Tuple[str, str], List[str]] = {}
+        self._coefficients: Dict[Tuple[str, Tuple[str, ...]], float] = {}
+        self._uncompiled = set()
+
+    def add_fact(self, relation: str, args: Tuple[str, ...], value: str):
+        """Index a fact of the form (= (relation args...) value)"""
+        self.remove_fact(relation, args)
+        self._values[(relation, args)] = value
+        if len(args) == 2 and value == "True":
+            self._objects.setdefault((relation, args[0]), []).append(args[1])
+
+    def remove_fact(self, relation: str, args: Tuple[str, ...]):
+        """Drop a fact, updating only the tables that hold its key"""
+        value = self._values.pop((relation, args), None)
+        if len(args) == 2 and value == "True":
+            objects = self._objects[(relation, args[0])]
+            objects.remove(args[1])
+            if not objects:
+                del self._objects[(relation, args[0])]
+
+    def add_linear_rule(self, relation: str, key: Tuple[str, ...], coefficient: float):
+        """Index a rule of the form (= (relation key... $x) (* $x coefficient))"""
+        self._coefficients[(relation, key)] = coefficient
+
+    def mark_uncompiled(self, relation: str):
+        """Route every query for a relation back to MeTTa"""
+        self._uncompiled.add(relation)
+
+    def is_compiled(self, relation: str) -> bool:
+        return (relation in INDEXED_RELATIONS or relation in LINEAR_RULES) and relation not in self._uncompiled
+
+    def value(self, relation: str, args: Tuple[str, ...]) -> Optional[str]:
+        return self._values.get((relation, args))
+
+    def objects(self, relation: str, subject: str) -> List[str]:
+        return list(self._objects.get((relation, subject), []))
+
+    def coefficient(self, relation: str, key: Tuple[str, ...]) -> Optional[float]:
+        return self._coefficients.get((relation, key))
+
+    def coefficient_table(self, relation: str) -> Dict[Tuple[str, ...], float]:
+        """Every compiled coefficient of a linear rule, keyed like coefficient()"""
+        return {key: c for (rule, key), c in self._coefficients.items() if rule == relation}
+
+    def keys(self) -> Iterator[Tuple[str, Tuple[str, ...]]]:
+        return iter(self._values)
+
+    def to_dict(self) -> Dict:
+        """Serialize the tables for a knowledge base snapshot"""
+        return {
+            "facts": [[relation, list(args), value] for (relation, args), value in self._values.items()],
+            "linear_rules": [[relation, list(key), c] for (relation, key), c in self._coefficients.items()],
+            "uncompiled": sorted(self._uncompiled)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "FactIndex":
+        index = cls()
+        for relation, args, value in data["facts"]:
+            index.add_fact(relation, tuple(args), value)
+        for relation, key, coefficient in data["linear_rules"]:
+            index.add_linear_rule(relation, tuple(key), coefficient)
+        for relation in data["uncompiled"]:
+            index.mark_uncompiled(relation)
+        return index
+
+
+# Emergency type hierarchy, resources and reasoning rules
+EMERGENCY_ONTOLOGY = """
+    ; Emergency type ontology
+    (: emergency-type Type)
+    (: medical emergency-type)
+    (: fire emergency-type)
+    (: flood emergency-type)
+    (: earthquake emergency-type)
+    (: chemical-spill emergency-type)
+
+    ; Severity levels
+    (: severity-level Type)
+    (: critical severity-level)
+    (: high severity-level)
+    (: medium severity-level)
+    (: low severity-level)
+
+    ; Resource types
+    (: resource-type Type)
+    (: ambulance resource-type)
+    (: fire-truck resource-type)
+    (: rescue-boat resource-type)
+    (: helicopter resource-type)
+    (: medical-supplies resource-type)
+    (: emergency-team resource-type)
+
+    ; Define relationships
+    (: requires (-> emergency-type resource-type Bool))
+    (: priority-for (-> severity-level resource-type Number))
+    (: compatible-with (-> resource-type emergency-type Bool))
+    (: escalates-to (-> emergency-type emergency-type Bool))
+
+    ; Emergency-Resource mappings
+    (= (requires medical ambulance) True)
+    (= (requires medical medical-supplies) True)
+    (= (requires medical emergency-team) True)
+    (= (requires fire fire-truck) True)
+    (= (requires fire emergency-team) True)
+    (= (requires flood rescue-boat) True)
+    (= (requires flood emergency-team) True)
+    (= (requires earthquake medical-supplies) True)
+    (= (requires earthquake emergency-team) True)
+    (= (requires chemical-spill hazmat-team) True)
+
+    ; Priority scoring
+    (= (priority-for critical ambulance) 10)
+    (= (priority-for critical helicopter) 10)
+    (= (priority-for critical emergency-team) 9)
+    (= (priority-for high ambulance) 8)
+    (= (priority-for high emergency-team) 7)
+    (= (priority-for medium emergency-team) 5)
+    (= (priority-for low emergency-team) 3)
+
+    ; Escalation patterns
+    (= (escalates-to fire chemical-spill) True)
+    (= (escalates-to flood medical) True)
+    (= (escalates-to earthquake fire) True)
+    (= (escalates-to earthquake medical) True)
+
+    ; Location types
+    (: location-type Type)
+    (: hospital location-type)
+    (: shelter location-type)
+    (: depot location-type)
+    (: danger-zone location-type)
+
+    ; Distance calculation function
+    (: calculate-distance (-> Number Number Number Number Number))
+    (= (calculate-distance $lat1 $lng1 $lat2 $lng2)
+       (sqrt (+ (pow (- $lat1 $lat2) 2)
+               (pow (- $lng1 $lng2) 2))))
+
+    ; Resource allocation rules
+    (: optimal-resource (-> emergency-type severity-level resource-type))
+    (= (optimal-resource medical critical) ambulance)
+    (= (optimal-resource medical high) ambulance)
+    (= (optimal-resource fire critical) fire-truck)
+    (= (optimal-resource flood critical) rescue-boat)
+
+    ; Response time estimation
+    (: estimate-response-time (-> Number severity-level Number))
+    (= (estimate-response-time $distance critical) (* $distance 1.5))
+    (= (estimate-response-time $distance high) (* $distance 2.0))
+    (= (estimate-response-time $distance medium) (* $distance 2.5))
+    (= (estimate-response-time $distance low) (* $distance 3.0))
+
+    ; Triage rules
+    (: triage-score (-> emergency-type severity-level Number Number))
+    (= (triage-score medical critical $affected)
+       (* $affected 10))
+    (= (triage-score medical high $affected)
+       (* $affected 7))
+    (= (triage-score fire critical $affected)
+       (* $affected 9))
+    (= (triage-score flood high $affected)
+       (* $affected 6))
+"""
+
+# Specific knowledge about resources and locations
+RESOURCE_KNOWLEDGE = """
+    ; Specific hospital capabilities
+    (: has-capability (-> String String Bool))
+    (= (has-capability "Central Medical Center" "trauma-center") True)
+    (= (has-capability "Central Medical Center" "burn-unit") True)
+    (= (has-capability "St. Mary's Hospital" "trauma-center") True)
+    (= (has-capability "Emergency Care Unit" "basic-emergency") True)
+
+    ; Resource availability patterns
+    (: peak-demand-time (-> resource-type Number))
+    (= (peak-demand-time ambulance) 18) ; 6 PM
+    (= (peak-demand-time fire-truck) 14) ; 2 PM
+    (= (peak-demand-time emergency-team) 12) ; Noon
+
+    ; Collaboration rules between agents
+    (: should-collaborate (-> emergency-type emergency-type Bool))
+    (= (should-collaborate medical fire) True)
+    (= (should-collaborate flood medical) True)
+    (= (should-collaborate earthquake medical) True)
+    (= (should-collaborate chemical-spill medical) True)
+
+    ; Resource sharing rules
+    (: can-share-resource (-> String String resource-type Bool))
+    (= (can-share-resource "depot_north" "depot_central" medical-supplies) True)
+    (= (can-share-resource "depot_central" "depot_south" emergency-team) True)
+"""
+
+KNOWLEDGE_BASE_SOURCES = (EMERGENCY_ONTOLOGY, RESOURCE_KNOWLEDGE)
+
+
+@functools.lru_cache(maxsize=1)
+def snapshot_digest() -> str:
+    """Snapshot key: the ontology sources plus every definition that shapes the compiled FactIndex"""
+    compiler = [repr(INDEXED_RELATIONS), repr(LINEAR_RULES)]
+    try:
+        compiler += [inspect.getsource(definition) for definition in
+                     (_atom_text, FactIndex, EmergencyKnowledgeGraph._compile_index)]
+    except OSError:
+        pass  # Deployed without sources; the relation lists are all there is to go on
+    return source_hash(KNOWLEDGE_BASE_SOURCES, compiler)
+
 
 class EmergencyKnowledgeGraph:
     """
@@ -13,286 +292,427 @@ class EmergencyKnowledgeGraph:
     Enables semantic reasoning about resources, locations, and emergency types
     """
 
-    def __init__(self):
-        self.metta = MeTTa()
-        self._initialize_knowledge_base()
+    def __init__(self, verify_index: bool = False, cache: Optional[AnalysisCache] = None,
+                 snapshot_path: Optional[str] = None):
+        self.verify_index = verify_index
+        self.cache = cache
+        # Cache generation this instance's facts match; set by KnowledgeGraphPool at checkout
+        self.cache_generation: Optional[int] = None
+        # Parsing is deferred until a query actually needs MeTTa, so a
+        # snapshot hit skips it entirely
+        self._metta: Optional[MeTTa] = None
+        # Serializes queries against live fact updates
+        self._lock = threading.RLock()
+        self.index = self._load_index(snapshot_path or os.environ.get("ERAIN_KB_SNAPSHOT"))
+
+    @property
+    def metta(self) -> MeTTa:
+        """The MeTTa interpreter, built and loaded on first use"""
+        if self._metta is None:
+            self._metta = MeTTa()
+            self._initialize_knowledge_base()
+        return self._metta
 
     def _initialize_knowledge_base(self):
         """Initialize the emergency response knowledge base"""
+        for source in KNOWLEDGE_BASE_SOURCES:
+            self._metta.add_parse(source)
 
-        # Define emergency type hierarchy
-        self.metta.add_parse("""
-            ; Emergency type ontology
-            (: emergency-type Type)
-            (: medical emergency-type)
-            (: fire emergency-type)
-            (: flood emergency-type)
-            (: earthquake emergency-type)
-            (: chemical-spill emergency-type)
-
-            ; Severity levels
-            (: severity-level Type)
-            (: critical severity-level)
-            (: high severity-level)
-            (: medium severity-level)
-            (: low severity-level)
-
-            ; Resource types
-            (: resource-type Type)
-            (: ambulance resource-type)
-            (: fire-truck resource-type)
-            (: rescue-boat resource-type)
-            (: helicopter resource-type)
-            (: medical-supplies resource-type)
-            (: emergency-team resource-type)
-
-            ; Define relationships
-            (: requires (-> emergency-type resource-type Bool))
-            (: priority-for (-> severity-level resource-type Number))
-            (: compatible-with (-> resource-type emergency-type Bool))
-            (: escalates-to (-> emergency-type emergency-type Bool))
-
-            ; Emergency-Resource mappings
-            (= (requires medical ambulance) True)
-            (= (requires medical medical-supplies) True)
-            (= (requires medical emergency-team) True)
-            (= (requires fire fire-truck) True)
-            (= (requires fire emergency-team) True)
-            (= (requires flood rescue-boat) True)
-            (= (requires flood emergency-team) True)
-            (= (requires earthquake medical-supplies) True)
-            (= (requires earthquake emergency-team) True)
-            (= (requires chemical-spill hazmat-team) True)
-
-            ; Priority scoring
-            (= (priority-for critical ambulance) 10)
-            (= (priority-for critical helicopter) 10)
-            (= (priority-for critical emergency-team) 9)
-            (= (priority-for high ambulance) 8)
-            (= (priority-for high emergency-team) 7)
-            (= (priority-for medium emergency-team) 5)
-            (= (priority-for low emergency-team) 3)
-
-            ; Escalation patterns
-            (= (escalates-to fire chemical-spill) True)
-            (= (escalates-to flood medical) True)
-            (= (escalates-to earthquake fire) True)
-            (= (escalates-to earthquake medical) True)
-
-            ; Location types
-            (: location-type Type)
-            (: hospital location-type)
-            (: shelter location-type)
-            (: depot location-type)
-            (: danger-zone location-type)
-
-            ; Distance calculation function
-            (: calculate-distance (-> Number Number Number Number Number))
-            (= (calculate-distance $lat1 $lng1 $lat2 $lng2)
-               (sqrt (+ (pow (- $lat1 $lat2) 2)
-                       (pow (- $lng1 $lng2) 2))))
-
-            ; Resource allocation rules
-            (: optimal-resource (-> emergency-type severity-level resource-type))
-            (= (optimal-resource medical critical) ambulance)
-            (= (optimal-resource medical high) ambulance)
-            (= (optimal-resource fire critical) fire-truck)
-            (= (optimal-resource flood critical) rescue-boat)
-
-            ; Response time estimation
-            (: estimate-response-time (-> Number severity-level Number))
-            (= (estimate-response-time $distance critical) (* $distance 1.5))
-            (= (estimate-response-time $distance high) (* $distance 2.0))
-            (= (estimate-response-time $distance medium) (* $distance 2.5))
-            (= (estimate-response-time $distance low) (* $distance 3.0))
-
-            ; Triage rules
-            (: triage-score (-> emergency-type severity-level Number Number))
-            (= (triage-score medical critical $affected)
-               (* $affected 10))
-            (= (triage-score medical high $affected)
-               (* $affected 7))
-            (= (triage-score fire critical $affected)
-               (* $affected 9))
-            (= (triage-score flood high $affected)
-               (* $affected 6))
-        """)
-
-        # Add specific knowledge about resources and locations
-        self.metta.add_parse("""
-            ; Specific hospital capabilities
-            (: has-capability (-> String String Bool))
-            (= (has-capability "Central Medical Center" "trauma-center") True)
-            (= (has-capability "Central Medical Center" "burn-unit") True)
-            (= (has-capability "St. Mary's Hospital" "trauma-center") True)
-            (= (has-capability "Emergency Care Unit" "basic-emergency") True)
-
-            ; Resource availability patterns
-            (: peak-demand-time (-> resource-type Number))
-            (= (peak-demand-time ambulance) 18) ; 6 PM
-            (= (peak-demand-time fire-truck) 14) ; 2 PM
-            (= (peak-demand-time emergency-team) 12) ; Noon
-
-            ; Collaboration rules between agents
-            (: should-collaborate (-> emergency-type emergency-type Bool))
-            (= (should-collaborate medical fire) True)
-            (= (should-collaborate flood medical) True)
-            (= (should-collaborate earthquake medical) True)
-            (= (should-collaborate chemical-spill medical) True)
-
-            ; Resource sharing rules
-            (: can-share-resource (-> String String resource-type Bool))
-            (= (can-share-resource "depot_north" "depot_central" medical-supplies) True)
-            (= (can-share-resource "depot_central" "depot_south" emergency-team) True)
-        """)
+    def _load_index(self, snapshot_path: Optional[str]) -> FactIndex:
+        """Load the fact index from a matching snapshot, or compile and save it"""
+        if not snapshot_path:
+            return self._compile_index()
+
+        digest = snapshot_digest()
+        payload = load_snapshot(snapshot_path, digest)
+        if payload is not None:
+            return FactIndex.from_dict(payload)
+
+        index = self._compile_index()
+        try:
+            write_snapshot(snapshot_path, digest, index.to_dict())
+        except OSError:
+            pass  # A read-only snapshot location only costs the next startup a parse
+        return index
+
+    def _compile_index(self) -> FactIndex:
+        """Compile ground facts and linear rules from the atomspace into a FactIndex"""
+        index = FactIndex()
+        for atom in self.metta.space().get_atoms():
+            if not isinstance(atom, ExpressionAtom):
+                continue
+            children = atom.get_children()
+            if len(children) != 3 or str(children[0]) != "=" or not isinstance(children[1], ExpressionAtom):
+                continue
+
+            head = children[1].get_children()
+            relation = str(head[0])
+            if relation not in INDEXED_RELATIONS and relation not in LINEAR_RULES:
+                continue
+
+            args, body = head[1:], children[2]
+            variables = [a for a in args if isinstance(a, VariableAtom)]
+            if not variables and not isinstance(body, ExpressionAtom):
+                index.add_fact(relation, tuple(_atom_text(a) for a in args), _atom_text(body))
+                continue
+
+            # Only rules of the form (= (rule ... $x ...) (* $x K)) can be compiled
+            coefficient = None
+            if relation in LINEAR_RULES and len(variables) == 1 and isinstance(body, ExpressionAtom):
+                terms = body.get_children()
+                if len(terms) == 3 and str(terms[0]) == "*" and str(terms[1]) == str(variables[0]):
+                    try:
+                        coefficient = float(_atom_text(terms[2]))
+                    except ValueError:
+                        coefficient = None
+
+            if coefficient is None:
+                index.mark_uncompiled(relation)
+            else:
+                key = tuple(_atom_text(a) for a in args if not isinstance(a, VariableAtom))
+                index.add_linear_rule(relation, key, coefficient)
+
+        return index
+
+    def _answer_from_index(self, kind: str, args: Tuple):
+        """Answer a query from the compiled fact index"""
+        if kind in ("requires", "escalates-to"):
+            return self.index.objects(kind, args[0])
+        if kind == "has-capability":
+            known = set(self.index.objects(kind, args[0]))
+            return [c for c in HOSPITAL_CAPABILITIES if c in known]
+        if kind == "should-collaborate":
+            return self.index.value(kind, args) == "True"
+        if kind == "optimal-resource":
+            return self.index.value(kind, args)
+        if kind == "priority-for":
+            value = self.index.value(kind, args)
+            return float(value) if value is not None else None
+        if kind == "triage-score":
+            emergency_type, severity, affected_count = args
+            coefficient = self.index.coefficient(kind, (emergency_type, severity))
+            return coefficient * affected_count if coefficient is not None else 0.0
+        distance, severity = args
+        coefficient = self.index.coefficient(kind, (severity,))
+        return distance * coefficient if coefficient is not None else distance * 2
+
+    def _metta_expression(self, kind: str, args: Tuple) -> str:
+        """Render a query as a single MeTTa expression to evaluate"""
+        if kind in ("requires", "escalates-to"):
+            return f"!(match &self (= ({kind} {args[0]} $x) True) $x)"
+        if kind == "has-capability":
+            return f'!(match &self (= (has-capability "{args[0]}" $x) True) $x)'
+        if kind == "should-collaborate":
+            return f"!(match &self (= (should-collaborate {args[0]} {args[1]}) True) True)"
+        if kind in ("optimal-resource", "priority-for"):
+            return f"!(match &self (= ({kind} {args[0]} {args[1]}) $x) $x)"
+        return f"!({kind} {' '.join(map(str, args))})"
+
+    def _answer_from_metta(self, kind: str, args: Tuple, atoms: List):
+        """Decode the atoms MeTTa returned for one query"""
+        values = [_atom_text(a) for a in atoms]
+        if kind in ("requires", "escalates-to"):
+            return values
+        if kind == "has-capability":
+            return [c for c in HOSPITAL_CAPABILITIES if c in values]
+        if kind == "should-collaborate":
+            return bool(values)
+        if kind == "optimal-resource":
+            return values[0] if values else None
+        if kind == "priority-for":
+            return float(values[0]) if values else None
+
+        fallback = 0.0 if kind == "triage-score" else args[0] * 2
+        try:
+            return float(values[0]) if values else fallback
+        except ValueError:
+            # MeTTa returns the expression unreduced when no rule matches
+            return fallback
+
+    def _run_batch(self, queries: List[Tuple[str, Tuple]], verify: bool) -> Tuple[List, List[str]]:
+        """Answer queries from the index, sending the rest to MeTTa as one program"""
+        answers = [None] * len(queries)
+        indexed = set()
+        pending = []
+        for position, (kind, args) in enumerate(queries):
+            if kind not in QUERY_KINDS:
+                raise ValueError(f"Unknown knowledge graph query: {kind}")
+            if self.index.is_compiled(kind):
+                answers[position] = self._answer_from_index(kind, args)
+                indexed.add(position)
+                if not verify:
+                    continue
+            pending.append(position)
+
+        mismatches = []
+        if pending:
+            program = "\n".join(self._metta_expression(*queries[position]) for position in pending)
+            results = self.metta.run(program)
+            for position, atoms in zip(pending, results):
+                kind, args = queries[position]
+                expected = self._answer_from_metta(kind, args, atoms)
+                if position not in indexed:
+                    answers[position] = expected
+                    continue
+
+                answer = answers[position]
+                if isinstance(answer, list):
+                    answer, expected = sorted(answer), sorted(expected)
+                if answer != expected:
+                    mismatches.append(
+                        f"({kind} {' '.join(map(str, args))}): index={answer!r} metta={expected!r}"
+                    )
+
+        return answers, mismatches
+
+    def query_batch(self, queries: List[Tuple[str, Tuple]]) -> List:
+        """
+        Answer a list of (query-kind, args) tuples in one pass
+        Indexed queries never reach MeTTa; the remainder are composed into a
+        single program and run once, with results returned in query order
+        """
+        with self._lock:
+            answers, mismatches = self._run_batch(queries, self.verify_index)
+        if mismatches:
+            raise IndexParityError("; ".join(mismatches))
+        return answers
+
+    def _query(self, kind: str, *args):
+        return self.query_batch([(kind, args)])[0]
 
     def query_required_resources(self, emergency_type: str) -> List[str]:
         """Query which resources are required for an emergency type"""
-        result = self.metta.run(f"""
-            (match &self (requires {emergency_type} $resource)
-                   $resource)
-        """)
-        return [str(r) for r in result[0] if r]
+        return self._query("requires", emergency_type)
 
     def calculate_priority_score(self, emergency_type: str, severity: str, affected_count: int) -> float:
         """Calculate priority score for an emergency"""
-        result = self.metta.run(f"""
-            (triage-score {emergency_type} {severity} {affected_count})
-        """)
-        try:
-            return float(result[0][0]) if result[0] else 0.0
-        except:
-            return 0.0
+        return self._query("triage-score", emergency_type, severity, affected_count)
 
     def find_optimal_resource(self, emergency_type: str, severity: str) -> Optional[str]:
         """Find the optimal resource for an emergency"""
-        result = self.metta.run(f"""
-            (optimal-resource {emergency_type} {severity})
-        """)
-        return str(result[0][0]) if result[0] else None
+        return self._query("optimal-resource", emergency_type, severity)
+
+    def query_resource_priority(self, severity: str, resource: str) -> Optional[float]:
+        """Look up the dispatch priority of a resource at a severity level"""
+        return self._query("priority-for", severity, resource)
 
     def estimate_response_time(self, distance: float, severity: str) -> float:
         """Estimate response time based on distance and severity"""
-        result = self.metta.run(f"""
-            (estimate-response-time {distance} {severity})
-        """)
-        try:
-            return float(result[0][0]) if result[0] else distance * 2
-        except:
-            return distance * 2
+        return self._query("estimate-response-time", distance, severity)
 
     def check_escalation_risk(self, emergency_type: str) -> List[str]:
         """Check if an emergency might escalate to other types"""
-        result = self.metta.run(f"""
-            (match &self (escalates-to {emergency_type} $escalated)
-                   $escalated)
-        """)
-        return [str(r) for r in result[0] if r]
+        return self._query("escalates-to", emergency_type)
 
     def should_agents_collaborate(self, emergency1: str, emergency2: str) -> bool:
         """Determine if two emergency types should trigger agent collaboration"""
-        result = self.metta.run(f"""
-            (should-collaborate {emergency1} {emergency2})
-        """)
-        return bool(result[0][0]) if result[0] else False
+        return self._query("should-collaborate", emergency1, emergency2)
 
     def get_hospital_capabilities(self, hospital_name: str) -> List[str]:
         """Get capabilities of a specific hospital"""
-        capabilities = []
-        for capability in ["trauma-center", "burn-unit", "cardiac-unit", "pediatric-icu"]:
-            result = self.metta.run(f"""
-                (has-capability "{hospital_name}" "{capability}")
-            """)
-            if result[0] and result[0][0]:
-                capabilities.append(capability)
-        return capabilities
+        return self._query("has-capability", hospital_name)
+
+    def check_index_parity(self) -> List[str]:
+        """
+        Compare every indexed answer against a live MeTTa evaluation
+        Returns a description of each mismatch; an empty list means full parity
+        """
+        emergency_types = ["medical", "fire", "flood", "earthquake", "chemical-spill"]
+        severities = ["critical", "high", "medium", "low"]
+        resources = ["ambulance", "fire-truck", "rescue-boat", "helicopter", "medical-supplies", "emergency-team"]
+        hospitals = {args[0] for relation, args in self.index.keys() if relation == "has-capability"}
+
+        queries = []
+        for etype in emergency_types:
+            queries.append(("requires", (etype,)))
+            queries.append(("escalates-to", (etype,)))
+            for severity in severities:
+                queries.append(("optimal-resource", (etype, severity)))
+                queries.append(("triage-score", (etype, severity, 3)))
+            for other in emergency_types:
+                queries.append(("should-collaborate", (etype, other)))
+        for severity in severities:
+            queries.append(("estimate-response-time", (4.0, severity)))
+            for resource in resources:
+                queries.append(("priority-for", (severity, resource)))
+        for hospital in sorted(hospitals):
+            queries.append(("has-capability", (hospital,)))
+
+        return self._run_batch(queries, verify=True)[1]
+
+    def apply_changes(self, changes: List[Tuple]):
+        """
+        Apply a batch of live fact updates atomically
+        Each change is ("assert", relation, args, value) or ("retract", relation, args);
+        value defaults to True. Asserting replaces any existing value for the
+        same arguments. If any change fails, the whole batch is rolled back.
+        """
+        with self._lock:
+            validated = []
+            for change in changes:
+                operation, relation, args = change[0], change[1], tuple(str(a) for a in change[2])
+                if operation not in ("assert", "retract"):
+                    raise ValueError(f"Unknown fact change {operation!r}")
+                if relation in LINEAR_RULES:
+                    raise ValueError(f"{relation} is a rule and cannot be changed as a fact")
+                value = str(change[3]) if operation == "assert" and len(change) > 3 else "True"
+                self.metta.parse_single(_render_fact(relation, args, value))  # reject malformed facts up front
+                validated.append((operation, relation, args, value))
+
+            applied = []
+            try:
+                for operation, relation, args, value in validated:
+                    for existing in self._stored_values(relation, args):
+                        self._store_fact(relation, args, existing, add=False)
+                        applied.append((relation, args, existing, False))
+                    if operation == "assert":
+                        self._store_fact(relation, args, value, add=True)
+                        applied.append((relation, args, value, True))
+            except Exception:
+                for relation, args, value, added in reversed(applied):
+                    self._store_fact(relation, args, value, add=not added)
+                raise
+
+            self._invalidate_inferences({(relation, args) for relation, args, _, _ in applied})
+
+    def assert_fact(self, relation: str, args: Tuple, value: str = "True"):
+        """Add or replace a single fact"""
+        self.apply_changes([("assert", relation, args, value)])
+
+    def retract_fact(self, relation: str, args: Tuple):
+        """Remove a single fact"""
+        self.apply_changes([("retract", relation, args)])
+
+    def _stored_values(self, relation: str, args: Tuple[str, ...]) -> List[str]:
+        """Values currently stored for (relation args...), as MeTTa source text"""
+        pattern = _render_fact(relation, args, "$value")
+        result = self.metta.run(f"!(match &self {pattern} $value)")
+        return [str(atom) for atom in result[0]] if result else []
+
+    def _store_fact(self, relation: str, args: Tuple[str, ...], value: str, add: bool):
+        """Add or remove one fact in the atomspace and the fact index"""
+        atom = self.metta.parse_single(_render_fact(relation, args, value))
+        if add:
+            self.metta.space().add_atom(atom)
+        else:
+            self.metta.space().remove_atom(atom)
+
+        if relation in INDEXED_RELATIONS:
+            if add:
+                self.index.add_fact(relation, args, _atom_text(value))
+            else:
+                self.index.remove_fact(relation, args)
+
+    def _invalidate_inferences(self, changed: set):
+        """Drop cached inferences that depend on the changed facts"""
+        if self.cache is None:
+            return
+        affected_types = {args[0] for relation, args in changed if relation in ("requires", "escalates-to")}
+        affected_pairs = {args for relation, args in changed if relation == "optimal-resource"}
+        if affected_types or affected_pairs:
+            self.cache.invalidate_where(
+                lambda inference: inference["inferred_type"] in affected_types
+                or (inference["inferred_type"], inference["inferred_severity"]) in affected_pairs
+            )
 
     def infer_resource_needs(self, emergency_description: str) -> Dict[str, any]:
         """
         Use semantic reasoning to infer resource needs from emergency description
         """
-        # Keywords analysis for emergency type inference
-        keywords_emergency_map = {
-            "injured": "medical",
-            "bleeding": "medical",
-            "heart": "medical",
-            "fire": "fire",
-            "burning": "fire",
-            "smoke": "fire",
-            "flood": "flood",
-            "water": "flood",
-            "drowning": "flood",
-            "earthquake": "earthquake",
-            "chemical": "chemical-spill",
-            "toxic": "chemical-spill"
-        }
-
-        keywords_severity_map = {
-            "critical": "critical",
-            "dying": "critical",
-            "severe": "high",
-            "urgent": "high",
-            "minor": "low",
-            "stable": "medium"
-        }
-
-        desc_lower = emergency_description.lower()
-
-        # Infer emergency type
-        emergency_type = "medical"  # default
-        for keyword, etype in keywords_emergency_map.items():
-            if keyword in desc_lower:
-                emergency_type = etype
-                break
-
-        # Infer severity
-        severity = "medium"  # default
-        for keyword, sev in keywords_severity_map.items():
-            if keyword in desc_lower:
-                severity = sev
-                break
+        return self.infer_many([emergency_description])[0]
 
-        # Get required resources
-        resources = self.query_required_resources(emergency_type)
-
-        # Check escalation risks
-        escalation_risks = self.check_escalation_risk(emergency_type)
-
-        # Get optimal resource
-        optimal = self.find_optimal_resource(emergency_type, severity)
-
-        return {
-            "inferred_type": emergency_type,
-            "inferred_severity": severity,
-            "required_resources": resources,
-            "optimal_resource": optimal,
-            "escalation_risks": escalation_risks,
-            "priority_score": self.calculate_priority_score(emergency_type, severity, 1)
-        }
+    def infer_many(self, descriptions: List[str]) -> List[Dict[str, any]]:
+        """
+        Infer resource needs for many descriptions with a single batched query
+        """
+        if self.cache is None:
+            return self._infer_uncached(descriptions)
+
+        # A pooled instance answers for the facts it was synced to at checkout
+        generation = self.cache.generation if self.cache_generation is None else self.cache_generation
+        inferences = [self.cache.get(description) for description in descriptions]
+        misses = [position for position, inference in enumerate(inferences) if inference is None]
+        if misses:
+            computed = self._infer_uncached([descriptions[position] for position in misses])
+            for position, inference in zip(misses, computed):
+                self.cache.put(descriptions[position], inference, generation)
+                inferences[position] = inference
+        return inferences
+
+    def _infer_uncached(self, descriptions: List[str]) -> List[Dict[str, any]]:
+        classified = []
+        queries = []
+        for description in descriptions:
+            # One keyword scan yields both the type and the severity level
+            classification = classify_description(description)
+            emergency_type = ONTOLOGY_TYPES.get(classification["inferred_type"], classification["inferred_type"])
+            severity = classification["severity_level"]
+
+            classified.append((emergency_type, severity))
+            queries.extend([
+                ("requires", (emergency_type,)),
+                ("escalates-to", (emergency_type,)),
+                ("optimal-resource", (emergency_type, severity)),
+                ("triage-score", (emergency_type, severity, 1)),
+            ])
+
+        answers = self.query_batch(queries)
+
+        inferences = []
+        for position, (emergency_type, severity) in enumerate(classified):
+            resources, escalation_risks, optimal, priority_score = answers[position * 4:position * 4 + 4]
+            inferences.append({
+                "inferred_type": emergency_type,
+                "inferred_severity": severity,
+                "required_resources": resources,
+                "optimal_resource": optimal,
+                "escalation_risks": escalation_risks,
+                "priority_score": priority_score
+            })
+        return inferences
 
     def optimize_multi_agent_response(self, emergencies: List[Dict]) -> List[Dict]:
         """
         Optimize response across multiple emergencies using knowledge graph reasoning
         """
-        optimized_responses = []
+        # Infer each distinct description once
+        descriptions = list(dict.fromkeys(e.get("description", "") for e in emergencies))
+        inferences_by_description = dict(zip(descriptions, self.infer_many(descriptions)))
+        inferences = [inferences_by_description[e.get("description", "")] for e in emergencies]
+
+        # Resolve collaboration once per pair of inferred types, then list the
+        # partners of each type in input order
+        types = [inference["inferred_type"] for inference in inferences]
+        distinct_types = list(dict.fromkeys(types))
+        type_pairs = [(a, b) for a in distinct_types for b in distinct_types]
+        collaboration_matrix = dict(zip(
+            type_pairs,
+            self.query_batch([("should-collaborate", pair) for pair in type_pairs])
+        ))
+        partners_by_type = {
+            t: [i for i, other_type in enumerate(types) if collaboration_matrix[(t, other_type)]]
+            for t in distinct_types
+        }
+
+        # Triage every emergency in one vectorized call
+        priorities = self.batch_priority_scores(
+            types,
+            [inference["inferred_severity"] for inference in inferences],
+            [emergency.get("affected_count", 1) for emergency in emergencies]
+        )
 
-        for emergency in emergencies:
-            inference = self.infer_resource_needs(emergency.get("description", ""))
+        optimized_responses = []
 
-            # Check for collaboration opportunities
-            collaborations = []
-            for other in emergencies:
-                if other != emergency:
-                    other_inference = self.infer_resource_needs(other.get("description", ""))
-                    if self.should_agents_collaborate(
-                        inference["inferred_type"],
-                        other_inference["inferred_type"]
-                    ):
-                        collaborations.append(other.get("id"))
+        for position, (emergency, inference) in enumerate(zip(emergencies, inferences)):
+            collaborations = [
+                emergencies[other].get("id")
+                for other in partners_by_type[inference["inferred_type"]]
+                if other != position
+            ]
 
             response = {
                 "emergency_id": emergency.get("id"),
-                "priority": inference["priority_score"],
+                "priority": float(priorities[position]),
                 "assigned_resources": inference["required_resources"],
                 "optimal_resource": inference["optimal_resource"],
                 "collaborate_with": collaborations,
@@ -301,39 +721,126 @@ class EmergencyKnowledgeGraph:
 
             optimized_responses.append(response)
 
-        # Sort by priority
-        optimized_responses.sort(key=lambda x: x["priority"], reverse=True)
+        # Sort by priority, keeping input order among equal priorities
+        order = np.argsort(-priorities, kind="stable")
+        return [optimized_responses[i] for i in order]
+
+    def batch_priority_scores(self, emergency_types: List[str], severities: List[str],
+                              affected_counts: List[int]) -> np.ndarray:
+        """
+        Vectorized triage-score for arrays of (type, severity, affected_count)
+        Uses the coefficient table compiled from the knowledge base
+        """
+        affected = np.asarray(affected_counts, dtype=float)
+        if not self.index.is_compiled("triage-score"):
+            return np.array(self.query_batch([
+                ("triage-score", (t, s, int(n))) for t, s, n in zip(emergency_types, severities, affected)
+            ]), dtype=float)
+
+        coefficients = self.index.coefficient_table("triage-score")
+        unique_types, type_codes = np.unique(np.asarray(emergency_types, dtype=str), return_inverse=True)
+        unique_severities, severity_codes = np.unique(np.asarray(severities, dtype=str), return_inverse=True)
+        table = np.array([
+            [coefficients.get((t, s), 0.0) for s in unique_severities] for t in unique_types
+        ]).reshape(len(unique_types), len(unique_severities))
+        return table[type_codes, severity_codes] * affected
+
+    def batch_response_times(self, distances: List[float], severities: List[str]) -> np.ndarray:
+        """
+        Vectorized estimate-response-time for arrays of (distance, severity)
+        Severities without a rule fall back to twice the distance
+        """
+        distances = np.asarray(distances, dtype=float)
+        if not self.index.is_compiled("estimate-response-time"):
+            return np.array(self.query_batch([
+                ("estimate-response-time", (d, s)) for d, s in zip(distances.tolist(), severities)
+            ]), dtype=float)
+
+        coefficients = self.index.coefficient_table("estimate-response-time")
+        unique_severities, severity_codes = np.unique(np.asarray(severities, dtype=str), return_inverse=True)
+        factors = np.array([coefficients.get((s,), 2.0) for s in unique_severities])
+        return distances * factors[severity_codes]
+
+
+def _reason_about_emergency(kg: EmergencyKnowledgeGraph, emergency_data: Dict) -> Dict:
+    """Knowledge graph analysis of one emergency, run on a reasoning worker"""
+    inference = kg.infer_resource_needs(emergency_data.get("description", ""))
 
-        return optimized_responses
+    # Enhance with location-based reasoning if available
+    if "location" in emergency_data:
+        # Estimate response times for different severities
+        distance = emergency_data.get("distance_to_resources", 5.0)
+        inference["estimated_response_time"] = \
+            kg.estimate_response_time(distance, inference["inferred_severity"])
+
+    return inference
+
+
+def _reason_about_emergencies(kg: EmergencyKnowledgeGraph, emergencies: List[Dict]) -> List[Dict]:
+    """Multi-emergency optimization, run on a reasoning worker"""
+    return kg.optimize_multi_agent_response(emergencies)
+
+
+def keyword_inference(description: str) -> Dict:
+    """
+    Keyword-only analysis used when the reasoner is saturated
+    Has the same shape as infer_resource_needs but no knowledge base lookups
+    """
+    classification = classify_description(description)
+    return {
+        "inferred_type": ONTOLOGY_TYPES.get(classification["inferred_type"], classification["inferred_type"]),
+        "inferred_severity": classification["severity_level"],
+        "required_resources": [],
+        "optimal_resource": None,
+        "escalation_risks": [],
+        "priority_score": classification["severity_score"],
+        "degraded": True
+    }
+
+
+def keyword_response_plan(emergencies: List[Dict]) -> List[Dict]:
+    """Keyword-only fallback for optimize_multi_agent_response"""
+    plan = []
+    for emergency in emergencies:
+        inference = keyword_inference(emergency.get("description", ""))
+        plan.append({
+            "emergency_id": emergency.get("id"),
+            "priority": inference["priority_score"],
+            "assigned_resources": [],
+            "optimal_resource": None,
+            "collaborate_with": [],
+            "escalation_watch": [],
+            "degraded": True
+        })
+    plan.sort(key=lambda x: x["priority"], reverse=True)
+    return plan
 
 
 # Integration with uAgents
 class MeTTaReasoningAgent:
     """
     Wrapper to integrate MeTTa reasoning with uAgents framework
+    Async reasoning runs on a ReasoningExecutor so it never blocks the agent's
+    event loop; the backend is chosen via ERAIN_REASONING_BACKEND by default
     """
 
-    def __init__(self):
+    def __init__(self, executor: Optional[ReasoningExecutor] = None):
         self.knowledge_graph = EmergencyKnowledgeGraph()
+        self.executor = executor or ReasoningExecutor.from_env(EmergencyKnowledgeGraph)
 
     async def process_emergency(self, emergency_data: Dict) -> Dict:
         """Process emergency using knowledge graph reasoning"""
-        inference = self.knowledge_graph.infer_resource_needs(
-            emergency_data.get("description", "")
+        return await self.executor.submit(
+            _reason_about_emergency, emergency_data,
+            fallback=lambda: keyword_inference(emergency_data.get("description", ""))
         )
 
-        # Enhance with location-based reasoning if available
-        if "location" in emergency_data:
-            # Estimate response times for different severities
-            distance = emergency_data.get("distance_to_resources", 5.0)
-            inference["estimated_response_time"] = \
-                self.knowledge_graph.estimate_response_time(distance, inference["inferred_severity"])
-
-        return inference
-
     async def coordinate_multi_agent_response(self, emergencies: List[Dict]) -> List[Dict]:
         """Coordinate multiple agents using knowledge graph"""
-        return self.knowledge_graph.optimize_multi_agent_response(emergencies)
+        return await self.executor.submit(
+            _reason_about_emergencies, emergencies,
+            fallback=lambda: keyword_response_plan(emergencies)
+        )
 
     def get_resource_requirements(self, emergency_type: str) -> List[str]:
         """Get resource requirements for emergency type"""
@@ -351,11 +858,116 @@ class MeTTaReasoningAgent:
             return len(capabilities) > 0
 
 
+class KnowledgeGraphPool:
+    """
+    Pool of pre-warmed EmergencyKnowledgeGraph instances
+    Each caller checks out its own interpreter, so concurrent callers only
+    serialize once every instance in the pool is busy. Live fact changes are
+    logged and replayed on each instance when it is next checked out.
+    """
+
+    def __init__(self, size: int = 1):
+        if size < 1:
+            raise ValueError(f"Knowledge graph pool size must be at least 1, got {size}")
+        self.size = size
+        self.cache = AnalysisCache.from_env()
+        self._generation = 0
+        self._idle = deque((0, EmergencyKnowledgeGraph(cache=self.cache)) for _ in range(size))
+        self._available = threading.Condition()
+        self._changes: List[List[Tuple]] = []
+        self._synced: Dict[int, int] = {}  # id(kg) -> number of change batches applied
+        self._update_lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None):
+        """Check out a knowledge graph for the duration of the block"""
+        with self._available:
+            if not self._available.wait_for(lambda: self._idle, timeout):
+                raise TimeoutError(f"No knowledge graph available after {timeout}s")
+            generation, kg = self._idle.popleft()
+            pending = self._changes[self._synced.get(id(kg), 0):]
+            # Changes logged after this point make its cache writes stale
+            kg.cache_generation = self.cache.generation
+        try:
+            for batch in pending:
+                kg.apply_changes(batch)
+            self._synced[id(kg)] = self._synced.get(id(kg), 0) + len(pending)
+            yield kg
+        finally:
+            with self._available:
+                # Instances checked out across a reload are dropped on return
+                if generation == self._generation:
+                    self._idle.append((generation, kg))
+                    self._available.notify()
+                else:
+                    self._synced.pop(id(kg), None)
+                kg.cache_generation = None
+
+    def apply_changes(self, changes: List[Tuple]):
+        """
+        Apply a batch of live fact changes to every instance
+        The batch is validated on one instance first and only logged if it succeeds
+        """
+        changes = list(changes)
+        with self._update_lock:
+            with self.acquire() as kg:
+                kg.apply_changes(changes)
+                with self._available:
+                    self._changes.append(changes)
+                    self._synced[id(kg)] = len(self._changes)
+                    # Instances checked out before this batch was logged answer for the old facts
+                    self.cache.advance()
+
+    def reload(self):
+        """Rebuild every instance from the knowledge base and swap them in"""
+        fresh = [EmergencyKnowledgeGraph(cache=self.cache) for _ in range(self.size)]
+        with self._available:
+            self._generation += 1
+            self._idle = deque((self._generation, kg) for kg in fresh)
+            # Fresh instances replay the live changes on first checkout
+            self._synced = {}
+            self.cache.invalidate()
+            self._available.notify_all()
+
+
+_shared_pool: Optional[KnowledgeGraphPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_knowledge_graph_pool() -> KnowledgeGraphPool:
+    """Return the process-wide pool, building it on first use"""
+    global _shared_pool
+    if _shared_pool is None:
+        with _shared_pool_lock:
+            if _shared_pool is None:
+                _shared_pool = KnowledgeGraphPool(int(os.environ.get("ERAIN_METTA_POOL_SIZE", "1")))
+    return _shared_pool
+
+
+def configure_knowledge_graph_pool(size: int) -> KnowledgeGraphPool:
+    """Replace the process-wide pool with `size` pre-warmed interpreters"""
+    global _shared_pool
+    pool = KnowledgeGraphPool(size)
+    with _shared_pool_lock:
+        _shared_pool = pool
+    return pool
+
+
+def reload_knowledge_graph():
+    """Rebuild the shared knowledge graph, e.g. after the ontology changes"""
+    get_knowledge_graph_pool().reload()
+
+
+def apply_knowledge_changes(changes: List[Tuple]):
+    """Feed live status (capabilities, sharing rules, ...) into the shared knowledge graph"""
+    get_knowledge_graph_pool().apply_changes(changes)
+
+
 # Integration point for agents
 def get_metta_analysis(description: str) -> Dict:
     """Public API for agents to use MeTTa reasoning"""
-    kg = EmergencyKnowledgeGraph()
-    return kg.infer_resource_needs(description)
+    with get_knowledge_graph_pool().acquire() as kg:
+        return kg.infer_resource_needs(description)
 
 # Example usage and testing
 if __name__ == "__main__":
@@ -377,4 +989,8 @@ if __name__ == "__main__":
     optimized = kg.optimize_multi_agent_response(emergencies)
     print(f"\nOptimized Response Plan: {json.dumps(optimized, indent=2)}")
 
+    # Verify the compiled fact index against live MeTTa evaluation
+    mismatches = kg.check_index_parity()
+    print(f"\nFact Index Parity: {'OK' if not mismatches else mismatches}")
+
     print("\n✅ MeTTa Knowledge Graph Ready for Agent Integration")
\ No newline at end of file
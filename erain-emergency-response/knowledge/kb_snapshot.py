@@ -0,0 +1,109 @@
+"""
+Knowledge Base Snapshots
+Persists the compiled fact index to a versioned on-disk snapshot tagged with
+a content hash of the ontology sources and the compiler that indexed them,
+so agents can start without parsing
+
+Usage:
+    python knowledge/kb_snapshot.py build [path]
+    python knowledge/kb_snapshot.py bench [path] [runs]
+"""
+
+from typing import Dict, Iterable, Optional
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_MAGIC = b"ERAINKB\0"
+DEFAULT_SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "emergency_kb.snapshot")
+
+# magic, format version, hex sha256 of the sources and compiler
+_HEADER = struct.Struct("<8sI64s")
+
+
+def source_hash(sources: Iterable[str], compiler: Iterable[str] = ()) -> str:
+    """
+    Content hash of the knowledge base sources, the snapshot format and the
+    definitions that compile sources into an index, so a change to any of
+    them invalidates existing snapshots
+    """
+    digest = hashlib.sha256(f"v{SNAPSHOT_VERSION}".encode())
+    for source in sources:
+        digest.update(b"\0")
+        digest.update(source.encode())
+    digest.update(b"\1")
+    for definition in compiler:
+        digest.update(b"\0")
+        digest.update(definition.encode())
+    return digest.hexdigest()
+
+
+def write_snapshot(path: str, digest: str, payload: Dict):
+    """Atomically write a snapshot for the given source hash"""
+    data = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, digest.encode()) + \
+        json.dumps(payload, separators=(",", ":")).encode()
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path: str, digest: str) -> Optional[Dict]:
+    """
+    Memory-map a snapshot and return its payload
+    Returns None when the file is missing, from another format version or
+    built from different sources, so the caller rebuilds it
+    """
+    try:
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if len(mapped) < _HEADER.size:
+                    return None
+                magic, version, stored = _HEADER.unpack_from(mapped)
+                if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or stored != digest.encode():
+                    return None
+                return json.loads(mapped[_HEADER.size:])
+    except (OSError, ValueError):
+        return None
+
+
+def _bench(path: str, runs: int):
+    from knowledge.emergency_knowledge_graph import EmergencyKnowledgeGraph
+
+    def startup(**kwargs) -> float:
+        start = time.perf_counter()
+        kg = EmergencyKnowledgeGraph(**kwargs)
+        kg.infer_resource_needs("Fire in high-rise apartment, people trapped")
+        return time.perf_counter() - start
+
+    EmergencyKnowledgeGraph(snapshot_path=path)  # make sure the snapshot is current
+    cold = sorted(startup() for _ in range(runs))
+    warm = sorted(startup(snapshot_path=path) for _ in range(runs))
+
+    print(f"Startup + first inference over {runs} runs (median / min):")
+    print(f"   Cold parse:    {cold[runs // 2] * 1000:8.2f} ms / {cold[0] * 1000:8.2f} ms")
+    print(f"   Snapshot load: {warm[runs // 2] * 1000:8.2f} ms / {warm[0] * 1000:8.2f} ms")
+    print(f"   Speedup:       {cold[runs // 2] / warm[runs // 2]:.1f}x")
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    command = sys.argv[1] if len(sys.argv) > 1 else "build"
+    snapshot_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_SNAPSHOT_PATH
+
+    if command == "build":
+        from knowledge.emergency_knowledge_graph import EmergencyKnowledgeGraph, snapshot_digest
+        if os.path.exists(snapshot_path):
+            os.remove(snapshot_path)
+        EmergencyKnowledgeGraph(snapshot_path=snapshot_path)
+        print(f"✅ Snapshot written to {snapshot_path} ({snapshot_digest()[:12]})")
+    elif command == "bench":
+        _bench(snapshot_path, int(sys.argv[3]) if len(sys.argv) > 3 else 20)
+    else:
+        print(__doc__)
+        sys.exit(1)
@@ -0,0 +1,147 @@
+"""
+Keyword Classifier for Emergency Descriptions
+Scans a description once with a compiled multi-pattern regex and derives
+emergency type scores, severity modifiers and matched keyword positions together
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+# Emergency types, in tie-break order, with their trigger keywords and the
+# modifiers that raise severity when that type is inferred
+EMERGENCY_PATTERNS = {
+    "fire": {
+        "keywords": ["fire", "burning", "smoke", "flames", "blaze", "fuel", "leak"],
+        "severity_modifiers": {"trapped": +2, "explosion": +3, "spreading": +2, "fuel": +2}
+    },
+    "flood": {
+        "keywords": ["flood", "water", "drowning", "tsunami", "overflow"],
+        "severity_modifiers": {"rising": +2, "evacuation": +2, "dam": +3}
+    },
+    "medical": {
+        "keywords": ["injured", "heart", "bleeding", "unconscious", "accident", "injuries", "pile-up", "crash", "collision"],
+        "severity_modifiers": {"multiple": +2, "critical": +3, "mass": +3}
+    },
+    "chemical": {
+        "keywords": ["chemical", "toxic", "hazmat", "spill", "contamination"],
+        "severity_modifiers": {"leak": +2, "exposure": +3, "spreading": +2}
+    },
+    "earthquake": {
+        "keywords": ["earthquake"],
+        "severity_modifiers": {}
+    }
+}
+
+# Inflected forms that count as the keyword they belong to; keywords only
+# match whole words, so "damage" is not "dam" and "hearty" is not "heart"
+KEYWORD_VARIANTS = {
+    "fire": ["fires"],
+    "smoke": ["smoky", "smoking"],
+    "flames": ["flame", "flaming"],
+    "blaze": ["blazes", "blazing"],
+    "leak": ["leaks", "leaking", "leaked"],
+    "flood": ["floods", "flooding", "flooded"],
+    "overflow": ["overflows", "overflowing", "overflowed"],
+    "drowning": ["drown", "drowned"],
+    "dam": ["dams"],
+    "injured": ["injury"],
+    "accident": ["accidents"],
+    "crash": ["crashes", "crashed"],
+    "collision": ["collisions"],
+    "chemical": ["chemicals"],
+    "spill": ["spills", "spilled", "spilling"],
+    "contamination": ["contaminated"],
+    "explosion": ["explosions", "exploded"],
+    "earthquake": ["earthquakes"],
+    "critical": ["critically"],
+    "severe": ["severely"]
+}
+
+# Severity level keywords, in precedence order
+SEVERITY_LEVELS = {
+    "critical": "critical",
+    "dying": "critical",
+    "severe": "high",
+    "urgent": "high",
+    "minor": "low",
+    "stable": "medium"
+}
+
+DEFAULT_TYPE = "medical"
+DEFAULT_SEVERITY_LEVEL = "medium"
+BASE_SEVERITY_SCORE = 5.0
+
+
+class KeywordClassifier:
+    """
+    Single-pass classifier over every keyword in the pattern tables
+    Keywords match whole words only; an inflected form listed in `variants`
+    ("flooding") counts as its keyword ("flood")
+    """
+
+    def __init__(self, patterns: Dict[str, Dict] = EMERGENCY_PATTERNS,
+                 severity_levels: Dict[str, str] = SEVERITY_LEVELS,
+                 variants: Dict[str, List[str]] = KEYWORD_VARIANTS):
+        self.patterns = patterns
+        self.severity_levels = severity_levels
+
+        # keyword -> list of (role, emergency type or severity level, points)
+        self._roles: Dict[str, List[Tuple[str, str, int]]] = {}
+        for etype, pattern in patterns.items():
+            for keyword in pattern["keywords"]:
+                self._roles.setdefault(keyword, []).append(("type", etype, 0))
+            for modifier, points in pattern["severity_modifiers"].items():
+                self._roles.setdefault(modifier, []).append(("modifier", etype, points))
+        for keyword, level in severity_levels.items():
+            self._roles.setdefault(keyword, []).append(("severity", level, 0))
+
+        # Every form a keyword is written in -> the keyword
+        self._keyword_of = {keyword: keyword for keyword in self._roles}
+        for keyword, forms in variants.items():
+            if keyword in self._roles:
+                self._keyword_of.update((form, keyword) for form in forms)
+
+        # Longest forms first so the alternation prefers the most specific match
+        alternation = "|".join(re.escape(k) for k in sorted(self._keyword_of, key=len, reverse=True))
+        self._regex = re.compile(rf"\b(?:{alternation})\b")
+        self._severity_rank = {keyword: rank for rank, keyword in enumerate(severity_levels)}
+
+    def classify(self, description: str) -> Dict:
+        """Classify a description in one scan"""
+        positions = []
+        matched_keywords = {etype: [] for etype in self.patterns}
+        modifiers = {etype: {} for etype in self.patterns}
+        severity_keyword = None
+
+        for match in self._regex.finditer(description.lower()):
+            keyword = self._keyword_of[match.group()]
+            positions.append((keyword, match.start()))
+            for role, target, points in self._roles[keyword]:
+                if role == "type":
+                    if keyword not in matched_keywords[target]:
+                        matched_keywords[target].append(keyword)
+                elif role == "modifier":
+                    modifiers[target][keyword] = points
+                elif severity_keyword is None or self._severity_rank[keyword] < self._severity_rank[severity_keyword]:
+                    severity_keyword = keyword
+
+        keyword_counts = {etype: len(keywords) for etype, keywords in matched_keywords.items()}
+        best_count = max(keyword_counts.values())
+        best_type = max(keyword_counts, key=keyword_counts.get) if best_count > 0 else DEFAULT_TYPE
+
+        return {
+            "inferred_type": best_type,
+            "keyword_counts": keyword_counts,
+            "matched_keywords": matched_keywords,
+            "severity_score": min(10.0, BASE_SEVERITY_SCORE + sum(modifiers[best_type].values())),
+            "severity_level": self.severity_levels[severity_keyword] if severity_keyword else DEFAULT_SEVERITY_LEVEL,
+            "positions": positions
+        }
+
+
+_default_classifier = KeywordClassifier()
+
+
+def classify_description(description: str) -> Dict:
+    """Classify a description with the shared default classifier"""
+    return _default_classifier.classify(description)
@@ -0,0 +1,106 @@
+"""
+Reasoning Executor for MeTTa Workloads
+Runs blocking knowledge graph calls off the agent event loop on a thread or
+process pool, with bounded queue depth, per-call timeouts and a fallback
+when the reasoner is saturated
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import os
+import threading
+
+BACKENDS = ("inline", "thread", "process")
+
+# Each worker thread or process owns one knowledge graph
+_worker_state = threading.local()
+
+
+def _init_worker(graph_factory: Callable):
+    _worker_state.graph = graph_factory()
+
+
+def _call_in_worker(fn: Callable, args: tuple):
+    return fn(_worker_state.graph, *args)
+
+
+class ReasoningExecutor:
+    """
+    Dispatches `fn(graph, *args)` calls to a configurable backend
+    - inline: run on the caller's thread (blocks the event loop)
+    - thread: thread pool with one knowledge graph per thread
+    - process: process pool with one MeTTa instance per worker process
+    """
+
+    def __init__(self, graph_factory: Callable, backend: str = "thread", workers: int = 2,
+                 max_pending: int = 32, timeout: Optional[float] = 5.0):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown reasoning backend {backend!r}, expected one of {BACKENDS}")
+        self.backend = backend
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+
+        self._graph = graph_factory() if backend == "inline" else None
+        self._pool: Optional[Executor] = None
+        if backend == "thread":
+            self._pool = ThreadPoolExecutor(workers, initializer=_init_worker, initargs=(graph_factory,))
+        elif backend == "process":
+            self._pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(graph_factory,))
+
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    @classmethod
+    def from_env(cls, graph_factory: Callable) -> "ReasoningExecutor":
+        """Configure from ERAIN_REASONING_BACKEND/_WORKERS/_MAX_PENDING/_TIMEOUT"""
+        return cls(
+            graph_factory,
+            backend=os.environ.get("ERAIN_REASONING_BACKEND", "thread"),
+            workers=int(os.environ.get("ERAIN_REASONING_WORKERS", "2")),
+            max_pending=int(os.environ.get("ERAIN_REASONING_MAX_PENDING", "32")),
+            timeout=float(os.environ.get("ERAIN_REASONING_TIMEOUT", "5.0"))
+        )
+
+    def _release(self, _future):
+        self.pending -= 1
+        self.completed += 1
+
+    async def submit(self, fn: Callable, *args, fallback: Callable[[], Any]) -> Any:
+        """
+        Run `fn(graph, *args)` on the backend
+        Returns `fallback()` instead when the queue is full or the call times out
+        """
+        if self.backend == "inline":
+            self.completed += 1
+            return fn(self._graph, *args)
+
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            return fallback()
+
+        # The slot is held until the worker actually finishes, even after a timeout
+        self.pending += 1
+        future = asyncio.get_running_loop().run_in_executor(self._pool, _call_in_worker, fn, args)
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            return fallback()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts
+        }
+
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
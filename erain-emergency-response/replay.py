@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Replay Recorded Agent Traffic Locally
+Feeds the messages an agent received (recorded with ERAIN_RECORD_DIR set)
+back into freshly loaded local agents over the in-process transport, then
+diffs the decisions it makes now against the ones it made then: hospital
+for medical, depot for resource, shelter for shelter, and routing, type and
+severity of each alert for the coordinator
+
+Usage:
+    python replay.py recordings/medical.erec                  # as fast as possible
+    python replay.py recordings/medical.erec --speed 1        # original timing
+    python replay.py recordings/coordinator.erec --speed 10 --output replay.json
+"""
+
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import re
+import time
+
+from benchmark import connect_agents
+from runtime.local_transport import LocalTransport
+from runtime.recording import RecordedMessage, read_recording
+
+# Messages that come from outside the replayed agents; everything else
+# (agent responses to the coordinator) is produced again by the replay
+REPLAYED_KINDS = {
+    "coordinator": {"ChatMessage", "EmergencyAlert"},
+    "medical": {"EmergencyAlert", "EmergencyAlertBatch", "ChatMessage"},
+    "resource": {"EmergencyAlert", "EmergencyAlertBatch", "ChatMessage"},
+    "shelter": {"EmergencyAlert", "EmergencyAlertBatch", "ChatMessage"}
+}
+
+# The facility each agent chose, as named in its response details
+DECISION_PATTERNS = {
+    "medical": re.compile(r" to (.+?) \|"),
+    "resource": re.compile(r" from (.+?) \|"),
+    "shelter": re.compile(r"^(.+?) assigned")
+}
+
+
+def _responses(kind: str, body: Dict) -> List[Dict]:
+    if kind == "EmergencyResponse":
+        return [body]
+    if kind == "EmergencyResponseBatch":
+        return body["responses"]
+    return []
+
+
+def _alerts(kind: str, body: Dict) -> List[Dict]:
+    if kind == "EmergencyAlert":
+        return [body]
+    if kind == "EmergencyAlertBatch":
+        return body["alerts"]
+    return []
+
+
+class DecisionLog:
+    """Decisions an agent made, keyed so a recording and its replay line up"""
+
+    def __init__(self, agent: str, agent_names: Dict[str, str]):
+        self.agent = agent
+        self.agent_names = agent_names
+        # Agents keep alert ids; the coordinator mints new ones, so its alerts
+        # are matched by description and destination, in order
+        self.decisions: Dict[Tuple, List] = {}
+
+    def add(self, destination: str, kind: str, body: Dict):
+        if self.agent == "coordinator":
+            for alert in _alerts(kind, body):
+                if alert["alert_id"].startswith("EM"):
+                    continue  # raised by the demo generator, which a replay does not run
+                key = (alert["description"], self.agent_names.get(destination, destination))
+                self.decisions.setdefault(key, []).append((alert["emergency_type"], alert["severity"]))
+            return
+        pattern = DECISION_PATTERNS[self.agent]
+        for response in _responses(kind, body):
+            match = pattern.search(response["details"])
+            self.decisions.setdefault((response["alert_id"],), []).append(
+                match.group(1) if match else response["details"]
+            )
+
+    def diff(self, replayed: "DecisionLog") -> Dict:
+        matched, changed, missing, extra = 0, [], [], []
+        for key in sorted(set(self.decisions) | set(replayed.decisions)):
+            before, after = self.decisions.get(key, []), replayed.decisions.get(key, [])
+            for i in range(max(len(before), len(after))):
+                if i >= len(after):
+                    missing.append({"key": key, "recorded": before[i]})
+                elif i >= len(before):
+                    extra.append({"key": key, "replayed": after[i]})
+                elif before[i] == after[i]:
+                    matched += 1
+                else:
+                    changed.append({"key": key, "recorded": before[i], "replayed": after[i]})
+        return {"matched": matched, "changed": changed, "missing": missing, "extra": extra}
+
+
+async def replay(path: str, speed: Optional[float]) -> Dict:
+    records = list(read_recording(path))
+    if not records:
+        raise ValueError(f"{path} holds no messages")
+    agent_name = records[0].agent
+
+    transport = LocalTransport()
+    coordinator, agents = connect_agents(transport)
+    modules = dict(agents, coordinator=coordinator)
+    addresses = {
+        "coordinator": coordinator.agent.address,
+        "medical": coordinator.MEDICAL_AGENT,
+        "resource": coordinator.RESOURCE_AGENT,
+        "shelter": coordinator.SHELTER_AGENT
+    }
+    agent_names = {address: name for name, address in addresses.items()}
+    module, address = modules[agent_name], addresses[agent_name]
+
+    recorded = DecisionLog(agent_name, agent_names)
+    inputs: List[RecordedMessage] = []
+    for record in records:
+        if record.inbound and record.kind in REPLAYED_KINDS[agent_name]:
+            inputs.append(record)
+        elif not record.inbound:
+            recorded.add(record.peer, record.kind, json.loads(record.body))
+
+    replayed = DecisionLog(agent_name, agent_names)
+
+    def capture(sender: str, destination: str, message):
+        if sender == address:
+            replayed.add(destination, type(message).__name__, json.loads(message.json()))
+    transport.taps.append(capture)
+
+    for name, agent_module in modules.items():
+        await agent_module.startup(transport.contexts[addresses[name]])
+
+    started = time.monotonic()
+    first = inputs[0].timestamp if inputs else 0.0
+    for i, record in enumerate(inputs):
+        if speed:
+            wait = started + (record.timestamp - first) / speed - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+        elif i % 100 == 0:
+            await asyncio.sleep(0)  # let the agents keep up at max speed
+        transport.deliver(record.peer, address, record.parse(getattr(module, record.kind)))
+
+    await transport.drain()
+    # Alerts held for batching (ERAIN_BATCH_PEERS) are sent when their batch flushes
+    while (len(coordinator.ingestion.queue) or coordinator.ingestion.busy or coordinator.scheduler.stats()["running"]
+           or coordinator.batcher.stats()["buffered"] or coordinator.batcher.stats()["awaiting_delivery"]):
+        await asyncio.sleep(0.02)
+        await transport.drain()
+    elapsed = time.monotonic() - started
+    await coordinator.ingestion.stop()
+
+    recorded_span = inputs[-1].timestamp - first if inputs else 0.0
+    return {
+        "recording": path,
+        "agent": agent_name,
+        "speed": speed or "max",
+        "messages": {"recorded": len(records), "replayed": len(inputs), "by_kind": dict(Counter(r.kind for r in inputs))},
+        "recorded_span": recorded_span,
+        "replay_time": elapsed,
+        "throughput": len(inputs) / elapsed if elapsed else 0.0,
+        "decisions": recorded.diff(replayed),
+        "transport": transport.stats()
+    }
+
+
+def print_results(results: Dict, limit: int = 20):
+    decisions = results["decisions"]
+    speed = "max speed" if results["speed"] == "max" else f"{results['speed']:g}x"
+    print(f"🔁 Replayed {results['messages']['replayed']} of {results['messages']['recorded']} recorded messages "
+          f"to {results['agent']} at {speed}")
+    print(f"   Recorded span {results['recorded_span']:.1f}s | replayed in {results['replay_time']:.2f}s | "
+          f"{results['throughput']:.0f} msg/s")
+    print(f"   Decisions: {decisions['matched']} same | {len(decisions['changed'])} changed | "
+          f"{len(decisions['missing'])} missing | {len(decisions['extra'])} extra")
+    for change in decisions["changed"][:limit]:
+        print(f"   ≠ {change['key']}: {change['recorded']} -> {change['replayed']}")
+    for gone in decisions["missing"][:limit]:
+        print(f"   - {gone['key']}: {gone['recorded']} (not made in replay)")
+    for new in decisions["extra"][:limit]:
+        print(f"   + {new['key']}: {new['replayed']} (not in recording)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("recording", help="an .erec file written with ERAIN_RECORD_DIR set")
+    parser.add_argument("--speed", default="max", help="1 for original timing, N for N times faster, or max")
+    parser.add_argument("--output", help="write the results and full diff as JSON")
+    args = parser.parse_args()
+
+    speed = None if args.speed == "max" else float(args.speed)
+    results = asyncio.run(replay(args.recording, speed))
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, default=str)
+        print(f"💾 Results written to {args.output}")
+    if results["decisions"]["changed"] or results["decisions"]["missing"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Run ERAIN Agents Colocated in One Bureau
+Agents listed in ERAIN_COLOCATE (default: all four) run in this process and
+exchange messages in memory through the Bureau; the coordinator still
+reaches any agent left out over the network at its Agentverse address
+
+Usage:
+    python run_bureau.py                       # colocated deployment
+    ERAIN_COLOCATE=coordinator,medical python run_bureau.py
+    python run_bureau.py bench [alerts] [probes]   # alert round trips, colocated vs networked, on localhost
+"""
+
+from typing import Dict, Tuple
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+from runtime.deployment import colocated_agents, load_agent
+from runtime.latency import LatencyHistogram
+
+RESPONDERS = {
+    "medical": "medical_response_seed_2024",
+    "resource": "resource_allocation_seed_2024",
+    "shelter": "shelter_coordinator_seed_2024"
+}
+BENCH_PORT = 8110  # bench sender; responders use the next ports when networked
+
+
+def run_colocated():
+    from uagents import Bureau
+
+    names = colocated_agents()
+    modules = {}
+    # Responders first, so the coordinator is pointed at their local addresses
+    for name in [n for n in names if n != "coordinator"]:
+        modules[name] = load_agent(name)
+        os.environ[f"ERAIN_{name.upper()}_AGENT"] = modules[name].agent.address
+    if "coordinator" in names:
+        modules["coordinator"] = load_agent("coordinator")
+
+    port = int(os.environ.get("ERAIN_BUREAU_PORT", "8000"))
+    bureau = Bureau(port=port, endpoint=os.environ.get("ERAIN_BUREAU_ENDPOINT", f"http://127.0.0.1:{port}/submit"))
+    for name, module in modules.items():
+        bureau.add(module.agent)
+        print(f"🏢 {name}: {module.agent.address} (colocated)")
+    for name in [n for n in ("medical", "resource", "shelter") if n not in modules]:
+        print(f"🌐 {name}: remote")
+    bureau.run()
+
+
+def run_bench_mode(mode: str, alerts: int, probes: int, output: str):
+    """
+    One side of the comparison: a sender agent timing alert -> response round trips to each responder
+    `probes` alerts go out one at a time for the unloaded round trip; then
+    `alerts` go out in one burst for throughput, whose round trips include
+    the time spent queued behind the rest of the burst
+    """
+    from uagents import Agent, Bureau, Context, Model
+    from uagents.crypto import Identity
+    from uagents.resolver import RulesBasedResolver
+
+    class EmergencyAlert(Model):
+        alert_id: str
+        timestamp: str
+        location: Dict[str, float]
+        emergency_type: str
+        severity: str
+        description: str
+        affected_count: int
+
+    class EmergencyResponse(Model):
+        alert_id: str
+        status: str
+        dispatch_time: str
+        teams_assigned: int
+        details: str
+
+    addresses = {name: Identity.from_seed(seed, 0).address for name, seed in RESPONDERS.items()}
+    sender_seed = "erain_bureau_bench_seed_2024"
+    endpoints = {address: f"http://127.0.0.1:{BENCH_PORT + 1 + i}/submit" for i, address in enumerate(addresses.values())}
+    endpoints[Identity.from_seed(sender_seed, 0).address] = f"http://127.0.0.1:{BENCH_PORT}/submit"
+
+    processes = []
+    os.environ["ERAIN_OFFLINE"] = "1"
+    os.environ.setdefault("ERAIN_EVENT_LOG", os.devnull)
+    if mode == "networked":
+        for i, name in enumerate(RESPONDERS):
+            env = dict(os.environ, ERAIN_LOCAL_ENDPOINTS=json.dumps(endpoints))
+            env[f"ERAIN_{name.upper()}_PORT"] = str(BENCH_PORT + 1 + i)
+            log = open(f"bench_{name}.log", "w")
+            processes.append((subprocess.Popen([sys.executable, f"agents/{name}.py"], env=env, cwd=ROOT,
+                                               stdout=log, stderr=subprocess.STDOUT), log))
+        sender = Agent(name="bureau_bench", seed=sender_seed, port=BENCH_PORT,
+                       endpoint=[endpoints[Identity.from_seed(sender_seed, 0).address]],
+                       resolve=RulesBasedResolver(endpoints))
+    else:
+        sender = Agent(name="bureau_bench", seed=sender_seed)
+
+    sent: Dict[str, Tuple[str, float]] = {}  # alert_id:address -> (phase, sent at)
+    histograms = {phase: {name: LatencyHistogram() for name in RESPONDERS} for phase in ("unloaded", "burst")}
+    names_by_address = {address: name for name, address in addresses.items()}
+    progress = {"first_sent": 0.0, "last_response": 0.0, "responses": 0}
+
+    def bench_alert(alert_id: str) -> EmergencyAlert:
+        return EmergencyAlert(
+            alert_id=alert_id,
+            timestamp=time.strftime("%Y-%m-%dT%H:%M:%S"),
+            location={"lat": 40.7128, "lng": -74.0060},
+            emergency_type="fire",
+            severity="MEDIUM",
+            description="Bench alert: small kitchen fire, smoke in stairwell",
+            affected_count=2
+        )
+
+    async def send_to_all(ctx: Context, alert: EmergencyAlert, phase: str):
+        for address in addresses.values():
+            sent[f"{alert.alert_id}:{address}"] = (phase, time.monotonic())
+            await ctx.send(address, alert)
+
+    @sender.on_message(model=EmergencyResponse)
+    async def on_response(ctx: Context, sender_address: str, msg: EmergencyResponse):
+        key = f"{msg.alert_id}:{sender_address}"
+        if key in sent:
+            now = time.monotonic()
+            phase, sent_at = sent.pop(key)
+            histograms[phase][names_by_address[sender_address]].record(now - sent_at)
+            if phase == "burst":
+                progress["responses"] += 1
+                progress["last_response"] = now
+
+    @sender.on_event("startup")
+    async def send_alerts(ctx: Context):
+        await asyncio.sleep(5 if mode == "networked" else 1)  # let the responders come up
+
+        # Unloaded: the next probe goes out only once every responder answered the last
+        for i in range(probes):
+            alert = bench_alert(f"PROBE-{i:05d}")
+            await send_to_all(ctx, alert, "unloaded")
+            deadline = time.monotonic() + 5
+            while any(key.startswith(f"{alert.alert_id}:") for key in sent) and time.monotonic() < deadline:
+                await asyncio.sleep(0.001)
+        probes_lost = len(sent)
+        sent.clear()
+
+        progress["first_sent"] = time.monotonic()
+        for i in range(alerts):
+            await send_to_all(ctx, bench_alert(f"BENCH-{i:05d}"), "burst")
+
+        deadline = time.monotonic() + 30
+        while sent and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        elapsed = (progress["last_response"] or time.monotonic()) - progress["first_sent"]
+        with open(output, "w") as f:
+            json.dump({
+                "mode": mode,
+                "alerts": alerts,
+                "probes": probes,
+                "messages": alerts * len(addresses) + progress["responses"],
+                "responses": progress["responses"],
+                "lost": len(sent),
+                "probes_lost": probes_lost,
+                "elapsed": elapsed,
+                "throughput": progress["responses"] / elapsed if elapsed else 0.0,
+                "unloaded_round_trip": {name: h.summary() for name, h in histograms["unloaded"].items()},
+                "burst_round_trip": {name: h.summary() for name, h in histograms["burst"].items()}
+            }, f, indent=2)
+        for process, log in processes:
+            process.terminate()
+            process.wait(timeout=10)
+            log.close()
+        os._exit(0)
+
+    if mode == "networked":
+        sender.run()
+    else:
+        bureau = Bureau(port=BENCH_PORT, endpoint=f"http://127.0.0.1:{BENCH_PORT}/submit")
+        bureau.add(sender)
+        for name in RESPONDERS:
+            bureau.add(load_agent(name).agent)
+        bureau.run()
+
+
+def run_bench(alerts: int, probes: int):
+    results = {}
+    for mode in ("networked", "colocated"):
+        output = f"bureau_bench_{mode}.json"
+        subprocess.run([sys.executable, os.path.abspath(__file__), "_bench", mode, str(alerts), str(probes), output],
+                       cwd=ROOT, check=True)
+        with open(os.path.join(ROOT, output)) as f:
+            results[mode] = json.load(f)
+
+    print(f"📊 {probes} paced probes, then a burst of {alerts} alerts, to each of {', '.join(RESPONDERS)}")
+    for mode, result in results.items():
+        print(f"   {mode:<10} burst: {result['messages']} messages | {result['responses']} responses | "
+              f"{result['lost']} lost | {result['throughput']:.0f} responses/s")
+        for phase in ("unloaded", "burst"):
+            print(f"      {phase} round trip{' (includes queueing)' if phase == 'burst' else ''}:")
+            for name, summary in result[f"{phase}_round_trip"].items():
+                print(f"         {name:<9} p50 {summary['p50'] * 1000:7.2f}ms | p95 {summary['p95'] * 1000:7.2f}ms | "
+                      f"p99 {summary['p99'] * 1000:7.2f}ms")
+    with open(os.path.join(ROOT, "bureau_bench.json"), "w") as f:
+        json.dump(results, f, indent=2)
+    print("💾 Results written to bureau_bench.json")
+
+
+if __name__ == "__main__":
+    mode = sys.argv[1] if len(sys.argv) > 1 else "run"
+    if mode == "run":
+        run_colocated()
+    elif mode == "bench":
+        run_bench(int(sys.argv[2]) if len(sys.argv) > 2 else 200, int(sys.argv[3]) if len(sys.argv) > 3 else 50)
+    elif mode == "_bench":
+        run_bench_mode(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]), sys.argv[5])
+    else:
+        print(__doc__)
+        sys.exit(1)
@@ -0,0 +1,284 @@
+"""
+Spatio-temporal Report Deduplication
+Buckets citizen reports by geohash cell and time window and compares
+MinHash signatures of their descriptions, so repeated reports of the same
+incident merge into it instead of triggering another dispatch
+"""
+
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+import os
+import random
+import time
+import zlib
+
+import numpy as np
+
+from knowledge.analysis_cache import normalize_description
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_PRIME = 4294967311  # smallest prime above 2**32, so a * crc32 + b fits in uint64
+
+# Words that carry no information about the incident itself
+_STOPWORDS = frozenset(
+    "a an and are at be by for from has have in is it of on or our so the there "
+    "this to was we with".split()
+)
+
+
+def _grid_bits(precision: int) -> Tuple[int, int]:
+    # Geohash alternates bits starting with longitude
+    return 5 * precision // 2, (5 * precision + 1) // 2
+
+
+def cell_index(lat: float, lng: float, precision: int = 7) -> Tuple[int, int]:
+    """Row and column of the geohash cell containing a point"""
+    lat_bits, lng_bits = _grid_bits(precision)
+    rows, cols = 1 << lat_bits, 1 << lng_bits
+    row = min(rows - 1, max(0, int((lat + 90.0) / 180.0 * rows)))
+    col = min(cols - 1, max(0, int((lng + 180.0) / 360.0 * cols)))
+    return row, col
+
+
+def geohash_of_cell(row: int, col: int, precision: int = 7) -> str:
+    """Base-32 geohash for a cell index, interleaving column and row bits"""
+    lat_bits, lng_bits = _grid_bits(precision)
+    value = 0
+    for i in range(5 * precision):
+        if i % 2 == 0:
+            lng_bits -= 1
+            value = (value << 1) | ((col >> lng_bits) & 1)
+        else:
+            lat_bits -= 1
+            value = (value << 1) | ((row >> lat_bits) & 1)
+    return "".join(_BASE32[(value >> shift) & 31] for shift in range(5 * (precision - 1), -1, -5))
+
+
+def geohash(lat: float, lng: float, precision: int = 7) -> str:
+    """Standard base-32 geohash of a point"""
+    return geohash_of_cell(*cell_index(lat, lng, precision), precision)
+
+
+def shingles(description: str) -> set:
+    """
+    Content words of a description
+    Citizen reports are short and word order varies ("fire in the building" vs
+    "building on fire"), so single words compare better than word n-grams
+    """
+    return {w for w in normalize_description(description).split() if w not in _STOPWORDS}
+
+
+class MinHasher:
+    """Fixed family of hash permutations producing comparable MinHash signatures"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 2024):
+        rng = random.Random(seed)
+        self._a = np.array([rng.randrange(1, 1 << 31) for _ in range(num_perm)], dtype=np.uint64)[:, None]
+        self._b = np.array([rng.randrange(0, 1 << 31) for _ in range(num_perm)], dtype=np.uint64)[:, None]
+
+    def signature(self, description: str) -> Optional[np.ndarray]:
+        """None for a description with no content words, which has nothing to compare"""
+        words = shingles(description)
+        if not words:
+            return None
+        hashes = np.array([zlib.crc32(s.encode()) for s in words], dtype=np.uint64)
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1)
+
+    @staticmethod
+    def similarity(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        """Estimated Jaccard similarity of the underlying shingle sets; `right` may be a stack of signatures"""
+        return (right == left).mean(axis=-1)
+
+
+@dataclass
+class DedupDecision:
+    cell: Optional[str]  # geohash; None for a report without a location
+    grid: Optional[Tuple[int, int]]
+    bucket: int
+    emergency_type: str
+    signature: Optional[np.ndarray]  # None for a description with no content words
+    duplicate_of: Optional[str] = None
+    similarity: float = 0.0
+    candidates: int = 0
+    lookup_time: float = 0.0  # seconds
+
+
+class ReportDeduplicator:
+    """
+    Index of recent incidents by (geohash cell, time bucket, signature band)
+    A report is a duplicate when an incident of the same type in its cell or
+    a neighbouring one, reported in this or the previous time bucket, has a
+    description similarity at or above `threshold`. Signatures are split into
+    bands of `band_rows` values and only incidents sharing a band with the
+    report are compared, so a busy cell does not degrade into a linear scan.
+    Incidents match whatever their state, as long as `is_retained` still
+    holds them: responders having replied does not make a repeat report a
+    new incident.
+    Reports without a location are never matched or indexed, since similar
+    wording alone does not make two reports the same incident; neither are
+    descriptions made only of stopwords
+    """
+
+    def __init__(self, precision: int = 7, window: float = 300.0, threshold: float = 0.5,
+                 num_perm: int = 64, band_rows: int = 2, max_candidates: int = 64,
+                 is_retained: Callable[[str], bool] = lambda alert_id: True):
+        if num_perm % band_rows:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of band_rows ({band_rows})")
+        self.precision = precision
+        self.window = window
+        self.threshold = threshold
+        self.band_rows = band_rows
+        self.max_candidates = max_candidates
+        self.is_retained = is_retained
+        self.hasher = MinHasher(num_perm)
+        self._rows, self._cols = (1 << bits for bits in _grid_bits(precision))
+
+        # ((row, col), bucket) -> band key -> incidents; band key is (band number, band values)
+        self._index: Dict[Tuple[Tuple[int, int], int], Dict[tuple, List[Tuple[str, str, np.ndarray]]]] = {}
+        self._counts: Dict[Tuple[Tuple[int, int], int], int] = {}
+        self._buckets: "OrderedDict[int, List[tuple]]" = OrderedDict()
+        self.decisions: Deque[DedupDecision] = deque(maxlen=100)
+
+        self.checked = 0
+        self.merged = 0
+        self.registered = 0
+        self.unlocated = 0
+        self.contentless = 0
+        self.indexed = 0
+        self.truncated = 0
+        self._total_lookup = 0.0
+        self._max_lookup = 0.0
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "ReportDeduplicator":
+        """Configure from ERAIN_DEDUP_PRECISION, ERAIN_DEDUP_WINDOW and ERAIN_DEDUP_THRESHOLD"""
+        return cls(
+            precision=int(os.environ.get("ERAIN_DEDUP_PRECISION", "7")),
+            window=float(os.environ.get("ERAIN_DEDUP_WINDOW", "300")),
+            threshold=float(os.environ.get("ERAIN_DEDUP_THRESHOLD", "0.5")),
+            **kwargs
+        )
+
+    def _neighbourhood(self, row: int, col: int) -> List[Tuple[int, int]]:
+        # The report's cell first, then the eight around it (longitude wraps)
+        cells = [(row, col)]
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                if (dr or dc) and 0 <= row + dr < self._rows:
+                    cells.append((row + dr, (col + dc) % self._cols))
+        return cells
+
+    def _bands(self, signature: np.ndarray) -> List[tuple]:
+        rows = self.band_rows
+        return [(i, signature[i:i + rows].tobytes()) for i in range(0, len(signature), rows)]
+
+    def _candidates(self, cells: List[Tuple[int, int]], bucket: int, bands: List[tuple],
+                    emergency_type: str) -> Dict[str, np.ndarray]:
+        """Incidents of the same type sharing at least one band, at most `max_candidates`"""
+        candidates = {}
+        for cell in cells:
+            for key in ((cell, bucket), (cell, bucket - 1)):
+                banded = self._index.get(key)
+                if not banded:
+                    continue
+                for band in bands:
+                    for alert_id, entry_type, signature in banded.get(band, ()):
+                        if entry_type != emergency_type:
+                            continue
+                        candidates[alert_id] = signature
+                        if len(candidates) >= self.max_candidates:
+                            # Bounded work on a saturated cell; the report's own cell is searched first
+                            self.truncated += 1
+                            return candidates
+        return candidates
+
+    def check(self, location: Optional[Dict[str, float]], emergency_type: str, description: str,
+              now: Optional[float] = None) -> DedupDecision:
+        """Find the incident a report duplicates, if any; a report without a location never matches"""
+        started = time.perf_counter()
+        now = time.time() if now is None else now
+        bucket = int(now // self.window)
+        self._expire(bucket)
+
+        signature = self.hasher.signature(description)
+        candidates = {}
+        if location is None:
+            decision = DedupDecision(None, None, bucket, emergency_type, signature)
+            self.unlocated += 1
+        else:
+            row, col = cell_index(location["lat"], location["lng"], self.precision)
+            decision = DedupDecision(geohash_of_cell(row, col, self.precision), (row, col), bucket, emergency_type, signature)
+            if signature is None:
+                self.contentless += 1
+            else:
+                candidates = self._candidates(self._neighbourhood(row, col), bucket, self._bands(signature), emergency_type)
+        decision.candidates = len(candidates)
+        if candidates:
+            alert_ids = list(candidates)
+            similarities = self.hasher.similarity(decision.signature, np.stack(list(candidates.values())))
+            # Best match first, skipping incidents dropped since they were indexed
+            for i in np.argsort(-similarities, kind="stable"):
+                if similarities[i] < self.threshold:
+                    break
+                if self.is_retained(alert_ids[i]):
+                    decision.duplicate_of = alert_ids[i]
+                    decision.similarity = float(similarities[i])
+                    break
+
+        decision.lookup_time = time.perf_counter() - started
+        self.checked += 1
+        self._total_lookup += decision.lookup_time
+        self._max_lookup = max(self._max_lookup, decision.lookup_time)
+        if decision.duplicate_of is not None:
+            self.merged += 1
+        self.decisions.append(decision)
+        return decision
+
+    def register(self, decision: DedupDecision, alert_id: str):
+        """Index a new incident under the cell and bucket its report was checked in"""
+        if decision.grid is None or decision.signature is None:
+            return
+        key = (decision.grid, decision.bucket)
+        banded = self._index.get(key)
+        if banded is None:
+            banded = self._index[key] = {}
+            self._counts[key] = 0
+            self._buckets.setdefault(decision.bucket, []).append(key)
+        entry = (alert_id, decision.emergency_type, decision.signature)
+        for band in self._bands(decision.signature):
+            banded.setdefault(band, []).append(entry)
+        self._counts[key] += 1
+        self.registered += 1
+        self.indexed += 1
+
+    def index(self, alert_id: str, location: Optional[Dict[str, float]], emergency_type: str, description: str):
+        """Index an existing incident (e.g. one handed over from another instance) without counting a check"""
+        if location is None:
+            return
+        row, col = cell_index(location["lat"], location["lng"], self.precision)
+        bucket = int(time.time() // self.window)
+        self.register(DedupDecision(geohash_of_cell(row, col, self.precision), (row, col), bucket,
+                                    emergency_type, self.hasher.signature(description)), alert_id)
+
+    def _expire(self, bucket: int):
+        # Only this and the previous bucket are ever searched
+        while self._buckets and next(iter(self._buckets)) < bucket - 1:
+            _, keys = self._buckets.popitem(last=False)
+            for key in keys:
+                self._index.pop(key, None)
+                self.indexed -= self._counts.pop(key, 0)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "checked": self.checked,
+            "merged": self.merged,
+            "registered": self.registered,
+            "unlocated": self.unlocated,
+            "contentless": self.contentless,
+            "merge_rate": self.merged / self.checked if self.checked else 0.0,
+            "indexed": self.indexed,
+            "truncated": self.truncated,
+            "avg_lookup": self._total_lookup / self.checked if self.checked else 0.0,
+            "max_lookup": self._max_lookup
+        }
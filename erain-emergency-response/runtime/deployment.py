@@ -0,0 +1,52 @@
+"""
+Agent Deployment Options
+Per-agent endpoint and peer-address settings from the environment, so the
+same agent modules run standalone on Agentverse, as local processes, or
+colocated in one Bureau (run_bureau.py)
+"""
+
+from typing import Any, Dict, List
+import importlib.util
+import json
+import os
+
+AGENT_NAMES = ("coordinator", "medical", "resource", "shelter")
+AGENTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agents")
+
+
+def agent_options(name: str) -> Dict[str, Any]:
+    """
+    Agent() keyword arguments from ERAIN_<NAME>_PORT and ERAIN_LOCAL_ENDPOINTS
+    The port runs the agent on a local endpoint; ERAIN_LOCAL_ENDPOINTS (JSON
+    address -> endpoint) resolves peers without the Almanac
+    """
+    options: Dict[str, Any] = {}
+    port = os.environ.get(f"ERAIN_{name.upper()}_PORT")
+    if port:
+        options = {"port": int(port), "endpoint": [f"http://127.0.0.1:{port}/submit"]}
+    if os.environ.get("ERAIN_LOCAL_ENDPOINTS"):
+        from uagents.resolver import RulesBasedResolver
+        options["resolve"] = RulesBasedResolver(json.loads(os.environ["ERAIN_LOCAL_ENDPOINTS"]))
+    return options
+
+
+def peer_address(name: str, default: str) -> str:
+    """Address to reach another ERAIN agent at; ERAIN_<NAME>_AGENT overrides the Agentverse one"""
+    return os.environ.get(f"ERAIN_{name.upper()}_AGENT", default)
+
+
+def colocated_agents() -> List[str]:
+    """Agents to run together in one Bureau, from ERAIN_COLOCATE (default: all four)"""
+    names = [n.strip() for n in os.environ.get("ERAIN_COLOCATE", ",".join(AGENT_NAMES)).split(",") if n.strip()]
+    unknown = [n for n in names if n not in AGENT_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown agents in ERAIN_COLOCATE: {', '.join(unknown)} (expected {', '.join(AGENT_NAMES)})")
+    return names
+
+
+def load_agent(name: str):
+    """Import agents/<name>.py as a module without running it"""
+    spec = importlib.util.spec_from_file_location(f"erain_{name}", os.path.join(AGENTS_DIR, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
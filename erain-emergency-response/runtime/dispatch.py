@@ -0,0 +1,105 @@
+"""
+Concurrent Alert Dispatch
+Fans a message out to several agents at once with a per-destination timeout
+and retry budget, returning a delivery result for every destination
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional
+import asyncio
+import os
+import time
+
+
+@dataclass
+class Delivery:
+    destination: str
+    delivered: bool
+    attempts: int
+    latency: float  # seconds spent on the successful attempt, or on all attempts if none succeeded
+    error: Optional[str] = None
+
+
+def _send_failed(status: Any) -> Optional[str]:
+    """Interpret the MsgStatus that newer uAgents versions return from ctx.send"""
+    if status is None or not hasattr(status, "status"):
+        return None
+    if "fail" in str(status.status).lower():
+        return getattr(status, "detail", None) or str(status.status)
+    return None
+
+
+class Dispatcher:
+    """Sends to every destination concurrently and records per-agent send latency"""
+
+    def __init__(self, timeout: float = 5.0, retries: int = 2, backoff: float = 0.25,
+                 timeouts: Optional[Dict[str, float]] = None):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.timeouts = timeouts or {}
+        self._latency: Dict[str, Dict[str, float]] = {}
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "Dispatcher":
+        """Configure from ERAIN_DISPATCH_TIMEOUT and ERAIN_DISPATCH_RETRIES"""
+        return cls(
+            timeout=float(os.environ.get("ERAIN_DISPATCH_TIMEOUT", "5.0")),
+            retries=int(os.environ.get("ERAIN_DISPATCH_RETRIES", "2")),
+            **kwargs
+        )
+
+    async def send_all(self, ctx, destinations: Iterable[str], message) -> Dict[str, Delivery]:
+        """Send one message to every destination in parallel"""
+        destinations = list(dict.fromkeys(destinations))
+        results = await asyncio.gather(*(self.send(ctx, d, message) for d in destinations))
+        return dict(zip(destinations, results))
+
+    async def send(self, ctx, destination: str, message) -> Delivery:
+        """Send to one destination, retrying with backoff until the budget runs out"""
+        timeout = self.timeouts.get(destination, self.timeout)
+        started = time.monotonic()
+        error = None
+        for attempt in range(1, self.retries + 2):
+            attempt_started = time.monotonic()
+            try:
+                status = await asyncio.wait_for(ctx.send(destination, message), timeout)
+                error = _send_failed(status)
+            except asyncio.TimeoutError:
+                error = f"timed out after {timeout}s"
+            except Exception as e:
+                error = str(e) or type(e).__name__
+
+            if error is None:
+                latency = time.monotonic() - attempt_started
+                self._record(destination, latency, failed=False)
+                return Delivery(destination, True, attempt, latency)
+            if attempt <= self.retries:
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+
+        latency = time.monotonic() - started
+        self._record(destination, latency, failed=True)
+        return Delivery(destination, False, self.retries + 1, latency, error)
+
+    def _record(self, destination: str, latency: float, failed: bool):
+        stats = self._latency.setdefault(
+            destination, {"sent": 0, "failed": 0, "total_latency": 0.0, "max_latency": 0.0}
+        )
+        if failed:
+            stats["failed"] += 1
+            return
+        stats["sent"] += 1
+        stats["total_latency"] += latency
+        stats["max_latency"] = max(stats["max_latency"], latency)
+
+    def latency_stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-destination send counts and latency (seconds)"""
+        return {
+            destination: {
+                "sent": stats["sent"],
+                "failed": stats["failed"],
+                "avg_latency": stats["total_latency"] / stats["sent"] if stats["sent"] else 0.0,
+                "max_latency": stats["max_latency"]
+            }
+            for destination, stats in self._latency.items()
+        }
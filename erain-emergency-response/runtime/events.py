@@ -0,0 +1,124 @@
+"""
+Structured Event Log
+One JSON record per handling event, written by a background thread through
+a bounded queue. Events below the level, or sampled out for their type, are
+dropped before any formatting happens; CRITICAL incidents are always kept
+"""
+
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+
+LEVELS = {"DEBUG": logging.DEBUG, "INFO": logging.INFO, "WARNING": logging.WARNING, "ERROR": logging.ERROR}
+
+
+class JsonFormatter(logging.Formatter):
+    """Renders an event record's fields as one JSON line"""
+
+    def __init__(self, agent: str):
+        super().__init__()
+        self.agent = agent
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = {"ts": round(record.created, 6), "agent": self.agent, "level": record.levelname}
+        event.update(record.msg)
+        return json.dumps(event, default=str, ensure_ascii=False)
+
+
+class _DroppingQueueHandler(QueueHandler):
+    # Skip QueueHandler.prepare: the record's fields are formatted on the listener thread
+    def __init__(self, events: "EventLogger", event_queue: queue.Queue):
+        super().__init__(event_queue)
+        self.events = events
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.events.dropped += 1
+
+
+class EventLogger:
+    """
+    Per-agent structured event logger
+    `sample_rates` maps event types to the fraction kept (default 1.0); events
+    with severity CRITICAL bypass sampling. Writing never blocks the caller:
+    when the queue is full the event is counted as dropped
+    """
+
+    def __init__(self, agent: str, level: int = logging.INFO, sample_rates: Optional[Dict[str, float]] = None,
+                 stream=None, path: Optional[str] = None, max_queue: int = 10000):
+        self.level = level
+        self.sample_rates = sample_rates or {}
+        self.emitted: Counter = Counter()
+        self.sampled_out: Counter = Counter()
+        self.gated = 0
+        self.dropped = 0
+
+        target = logging.FileHandler(path) if path else logging.StreamHandler(stream or sys.stderr)
+        target.setFormatter(JsonFormatter(agent))
+        event_queue: queue.Queue = queue.Queue(max_queue)
+        self._listener = QueueListener(event_queue, target)
+        self._listener.start()
+        self._running = True
+        atexit.register(self.close)
+
+        self._logger = logging.getLogger(f"erain.events.{agent}")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.DEBUG)
+        self._logger.handlers = [_DroppingQueueHandler(self, event_queue)]
+
+    @classmethod
+    def from_env(cls, agent: str, **kwargs) -> "EventLogger":
+        """
+        Configure from ERAIN_EVENT_LEVEL, ERAIN_EVENT_SAMPLING and ERAIN_EVENT_LOG
+        ERAIN_EVENT_SAMPLING looks like "alert_handled=0.1,response_recorded=0.5"
+        """
+        rates = {}
+        for pair in os.environ.get("ERAIN_EVENT_SAMPLING", "").split(","):
+            if "=" in pair:
+                event, rate = pair.split("=", 1)
+                rates[event.strip()] = float(rate)
+        return cls(
+            agent,
+            level=LEVELS.get(os.environ.get("ERAIN_EVENT_LEVEL", "INFO").upper(), logging.INFO),
+            sample_rates=rates,
+            path=os.environ.get("ERAIN_EVENT_LOG") or None,
+            **kwargs
+        )
+
+    def emit(self, event: str, level: int = logging.INFO, **fields: Any):
+        """Queue one event record; fields are serialized on the writer thread"""
+        if level < self.level:
+            self.gated += 1
+            return
+        rate = self.sample_rates.get(event, 1.0)
+        if rate < 1.0 and fields.get("severity") != "CRITICAL" and random.random() >= rate:
+            self.sampled_out[event] += 1
+            return
+        self.emitted[event] += 1
+        self._logger.log(level, {"event": event, **fields})
+
+    def close(self):
+        """Flush queued events and stop the writer thread"""
+        if self._running:
+            self._running = False
+            self._listener.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "emitted": dict(self.emitted),
+            "sampled_out": dict(self.sampled_out),
+            "gated": self.gated,
+            "dropped": self.dropped
+        }
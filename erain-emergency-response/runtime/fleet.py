@@ -0,0 +1,201 @@
+"""
+Ambulance Fleet Model
+Tracks every unit's position, status and expected free time. Dispatched
+units come back through a heap of computed mission completions, and
+available units sit in a lat/lng grid for nearest-unit lookups
+"""
+
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+import heapq
+import math
+import os
+import time
+
+from runtime.spatial import haversine_km
+
+AVAILABLE = "available"
+DISPATCHED = "dispatched"
+
+KM_PER_DEGREE = 111.19
+
+
+class Ambulance:
+    """One unit; while dispatched, `free_at` is when its current mission ends (epoch seconds)"""
+
+    __slots__ = ("unit_id", "lat", "lng", "status", "free_at", "alert_id", "missions")
+
+    def __init__(self, unit_id: str, lat: float, lng: float):
+        self.unit_id = unit_id
+        self.lat = lat
+        self.lng = lng
+        self.status = AVAILABLE
+        self.free_at = 0.0
+        self.alert_id: Optional[str] = None
+        self.missions = 0
+
+
+class AmbulanceFleet:
+    """
+    Units start spread over `stations` and end each mission at the receiving
+    hospital, free again after driving to the scene, working it, driving to
+    the hospital and handing over. The grid keeps only available units, so a
+    lookup scans the few cells around the incident however busy the fleet is.
+    A ring never costs more cells than are occupied: once it would, the
+    lookup measures the available units directly instead
+    """
+
+    def __init__(self, stations: Sequence[Tuple[float, float]], size: int = 15, speed_kmh: float = 40.0,
+                 scene_minutes: float = 15.0, handover_minutes: float = 10.0, cell_degrees: float = 0.05):
+        if not stations:
+            raise ValueError("An ambulance fleet needs at least one station")
+        self.speed_kmh = speed_kmh
+        self.scene_minutes = scene_minutes
+        self.handover_minutes = handover_minutes
+        self.cell_degrees = cell_degrees
+
+        self.units: Dict[str, Ambulance] = {}
+        self._cells: Dict[Tuple[int, int], Set[str]] = {}
+        self._returns: List[Tuple[float, str]] = []
+        self._available = 0
+        for i in range(size):
+            lat, lng = stations[i % len(stations)]
+            unit = self.units[f"AMB-{i + 1:03d}"] = Ambulance(f"AMB-{i + 1:03d}", lat, lng)
+            self._index(unit)
+
+        self.dispatched = 0
+        self.returned = 0
+        self.shortfalls = 0  # units requested but not available
+        self.queries = 0
+        self.total_query = 0.0
+        self.max_query = 0.0
+
+    @classmethod
+    def from_env(cls, stations: Sequence[Tuple[float, float]]) -> "AmbulanceFleet":
+        """Configure from ERAIN_FLEET_SIZE, ERAIN_FLEET_SPEED_KMH, ERAIN_FLEET_SCENE_MINUTES and ERAIN_FLEET_HANDOVER_MINUTES"""
+        return cls(
+            stations,
+            size=int(os.environ.get("ERAIN_FLEET_SIZE", "15")),
+            speed_kmh=float(os.environ.get("ERAIN_FLEET_SPEED_KMH", "40")),
+            scene_minutes=float(os.environ.get("ERAIN_FLEET_SCENE_MINUTES", "15")),
+            handover_minutes=float(os.environ.get("ERAIN_FLEET_HANDOVER_MINUTES", "10"))
+        )
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees))
+
+    def _index(self, unit: Ambulance):
+        self._cells.setdefault(self._cell(unit.lat, unit.lng), set()).add(unit.unit_id)
+        self._available += 1
+
+    def _unindex(self, unit: Ambulance):
+        cell = self._cell(unit.lat, unit.lng)
+        members = self._cells[cell]
+        members.discard(unit.unit_id)
+        self._available -= 1
+        if not members:
+            del self._cells[cell]
+
+    @property
+    def available(self) -> int:
+        return self._available
+
+    def nearest_available(self, lat: float, lng: float, k: int = 1) -> List[Tuple[float, Ambulance]]:
+        """Up to k (km, unit) pairs, nearest first, scanning rings of grid cells outward"""
+        started = time.perf_counter()
+        row, col = self._cell(lat, lng)
+        remaining = self.available
+        found: List[Tuple[float, str]] = []
+        ring = scanned = 0
+        while remaining:
+            # Cells on this ring are at least (ring - 1) cells away along one axis
+            cos_lat = math.cos(math.radians(min(89.0, abs(lat) + (ring + 1) * self.cell_degrees)))
+            floor_km = max(0, ring - 1) * self.cell_degrees * KM_PER_DEGREE * cos_lat
+            if len(found) >= k and floor_km > found[k - 1][0]:
+                break
+            ring_cells = 8 * ring if ring else 1
+            if scanned + ring_cells > len(self._cells):
+                # Sparse availability: fewer occupied cells than the rings left to scan
+                units = (self.units[unit_id] for members in self._cells.values() for unit_id in members)
+                found = heapq.nsmallest(k, ((haversine_km(lat, lng, unit.lat, unit.lng), unit.unit_id) for unit in units))
+                break
+            scanned += ring_cells
+            for cell in self._ring(row, col, ring):
+                for unit_id in self._cells.get(cell, ()):
+                    unit = self.units[unit_id]
+                    found.append((haversine_km(lat, lng, unit.lat, unit.lng), unit_id))
+                    remaining -= 1
+            found.sort()
+            ring += 1
+
+        elapsed = time.perf_counter() - started
+        self.queries += 1
+        self.total_query += elapsed
+        self.max_query = max(self.max_query, elapsed)
+        return [(distance, self.units[unit_id]) for distance, unit_id in found[:k]]
+
+    @staticmethod
+    def _ring(row: int, col: int, ring: int):
+        if ring == 0:
+            yield (row, col)
+            return
+        for c in range(col - ring, col + ring + 1):
+            yield (row - ring, c)
+            yield (row + ring, c)
+        for r in range(row - ring + 1, row + ring):
+            yield (r, col - ring)
+            yield (r, col + ring)
+
+    def _minutes(self, km: float) -> float:
+        return km / self.speed_kmh * 60
+
+    def dispatch(self, alert_id: str, lat: float, lng: float, count: int,
+                 hospital: Tuple[float, float], now: Optional[float] = None) -> List[Tuple[float, Ambulance]]:
+        """Send the `count` nearest available units; returns (minutes to scene, unit) pairs"""
+        now = time.time() if now is None else now
+        self.release_due(now)
+        nearest = self.nearest_available(lat, lng, count)
+        self.shortfalls += count - len(nearest)
+        transport_minutes = self._minutes(haversine_km(lat, lng, *hospital))
+
+        assigned = []
+        for distance, unit in nearest:
+            to_scene = self._minutes(distance)
+            self._unindex(unit)
+            unit.status = DISPATCHED
+            unit.alert_id = alert_id
+            unit.missions += 1
+            unit.lat, unit.lng = hospital  # where the mission ends
+            unit.free_at = now + (to_scene + self.scene_minutes + transport_minutes + self.handover_minutes) * 60
+            heapq.heappush(self._returns, (unit.free_at, unit.unit_id))
+            assigned.append((to_scene, unit))
+        self.dispatched += len(assigned)
+        return assigned
+
+    def release_due(self, now: Optional[float] = None) -> List[Ambulance]:
+        """Return every unit whose mission has ended to service, at its receiving hospital"""
+        now = time.time() if now is None else now
+        released = []
+        while self._returns and self._returns[0][0] <= now:
+            _, unit_id = heapq.heappop(self._returns)
+            unit = self.units[unit_id]
+            unit.status = AVAILABLE
+            unit.alert_id = None
+            self._index(unit)
+            released.append(unit)
+        self.returned += len(released)
+        return released
+
+    def next_free_at(self) -> Optional[float]:
+        return self._returns[0][0] if self._returns else None
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "size": len(self.units),
+            "available": self.available,
+            "busy": len(self._returns),
+            "dispatched": self.dispatched,
+            "returned": self.returned,
+            "shortfalls": self.shortfalls,
+            "avg_query": self.total_query / self.queries if self.queries else 0.0,
+            "max_query": self.max_query
+        }
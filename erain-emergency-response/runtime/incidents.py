@@ -0,0 +1,234 @@
+"""
+Incident Lifecycle Store
+Tracks each alert from creation to resolution (open, dispatched, confirmed,
+closed), evicts closed incidents after a TTL and keeps per-state and
+per-severity counters up to date so status reports never scan the store
+"""
+
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, Optional, Set
+import os
+import time
+
+OPEN = "open"
+DISPATCHED = "dispatched"
+CONFIRMED = "confirmed"
+CLOSED = "closed"
+
+STATES = (OPEN, DISPATCHED, CONFIRMED, CLOSED)
+_RANK = {state: rank for rank, state in enumerate(STATES)}
+
+
+@dataclass
+class Incident:
+    alert: Any
+    state: str = OPEN
+    created: float = field(default_factory=time.monotonic)
+    updated: float = field(default_factory=time.monotonic)
+    expected: Set[str] = field(default_factory=set)  # agents the alert was delivered to
+    responses: Dict[str, str] = field(default_factory=dict)  # agent -> response details
+    dispatch_recorded: bool = False
+    reports: int = 1  # citizen reports merged into this incident
+    located: bool = True  # False when the alert carries a placeholder location
+
+    @property
+    def alert_id(self) -> str:
+        return self.alert.alert_id
+
+    @property
+    def severity(self) -> str:
+        return self.alert.severity
+
+
+class IncidentStore:
+    """
+    Incidents keyed by alert_id with forward-only state transitions
+    An incident closes once every agent it was delivered to has responded.
+    Closed incidents are dropped after `closed_ttl` seconds; incidents that
+    never resolve are closed as stale after `stale_ttl` seconds
+    """
+
+    def __init__(self, closed_ttl: float = 300.0, stale_ttl: float = 3600.0):
+        self.closed_ttl = closed_ttl
+        self.stale_ttl = stale_ttl
+        self._incidents: Dict[str, Incident] = {}
+        # Both ordered oldest first, so eviction only touches expired entries
+        self._unresolved: "OrderedDict[str, None]" = OrderedDict()
+        self._closed: "OrderedDict[str, float]" = OrderedDict()
+
+        self._by_state: Counter = Counter()
+        self._active_by_severity: Counter = Counter()
+        self.opened = 0
+        self.closed = 0
+        self.stale_closed = 0
+        self.evicted = 0
+        self.unknown_responses = 0
+
+    @classmethod
+    def from_env(cls) -> "IncidentStore":
+        """Configure from ERAIN_INCIDENT_CLOSED_TTL and ERAIN_INCIDENT_STALE_TTL"""
+        return cls(
+            closed_ttl=float(os.environ.get("ERAIN_INCIDENT_CLOSED_TTL", "300")),
+            stale_ttl=float(os.environ.get("ERAIN_INCIDENT_STALE_TTL", "3600"))
+        )
+
+    def __len__(self) -> int:
+        return len(self._incidents)
+
+    def __contains__(self, alert_id: str) -> bool:
+        return alert_id in self._incidents
+
+    def __iter__(self) -> Iterator[Incident]:
+        return iter(list(self._incidents.values()))
+
+    def get(self, alert_id: str) -> Optional[Incident]:
+        return self._incidents.get(alert_id)
+
+    def open(self, alert, located: bool = True) -> Incident:
+        """Register a new incident for an alert; `located=False` marks a placeholder location"""
+        self.evict_expired()
+        if alert.alert_id in self._incidents:
+            self._discard(alert.alert_id)
+
+        incident = Incident(alert, located=located)
+        self._incidents[alert.alert_id] = incident
+        self._unresolved[alert.alert_id] = None
+        self._by_state[OPEN] += 1
+        self._active_by_severity[incident.severity] += 1
+        self.opened += 1
+        return incident
+
+    def adopt(self, alert, state: str, expected: Iterable[str], responses: Dict[str, str],
+              reports: int = 1, located: bool = True) -> Incident:
+        """Take over an incident handed off by another coordinator instance, keeping its progress"""
+        incident = self.open(alert, located)
+        incident.expected.update(expected)
+        incident.responses.update(responses)
+        incident.reports = reports
+        # The previous owner already recorded the dispatch; no record will follow here
+        incident.dispatch_recorded = True
+        self._advance(incident, state)
+        self._close_if_resolved(incident)
+        return incident
+
+    def pop(self, alert_id: str) -> Optional[Incident]:
+        """Remove an incident outright, e.g. after handing it off"""
+        if alert_id not in self._incidents:
+            return None
+        incident = self._incidents[alert_id]
+        self._discard(alert_id)
+        return incident
+
+    def mark_dispatched(self, alert_id: str, destinations: Iterable[str]) -> Optional[Incident]:
+        """Record the agents an alert was delivered to"""
+        incident = self._incidents.get(alert_id)
+        if incident is None or incident.state == CLOSED:
+            return incident
+
+        incident.expected.update(destinations)
+        incident.dispatch_recorded = True
+        if incident.expected:
+            self._advance(incident, DISPATCHED)
+        self._close_if_resolved(incident)
+        return incident
+
+    def merge_report(self, alert_id: str, affected_count: int) -> Optional[Incident]:
+        """Fold a duplicate report into an incident, closed or not, adding to its affected count"""
+        incident = self._incidents.get(alert_id)
+        if incident is None:
+            return None
+        incident.reports += 1
+        incident.alert.affected_count += affected_count
+        incident.updated = time.monotonic()
+        return incident
+
+    def record_response(self, alert_id: str, sender: str, details: str) -> Optional[Incident]:
+        """Apply an agent's EmergencyResponse; returns None for unknown or evicted incidents"""
+        incident = self._incidents.get(alert_id)
+        if incident is None:
+            self.unknown_responses += 1
+            return None
+        if incident.state == CLOSED:
+            return incident
+
+        incident.responses[sender] = details
+        self._advance(incident, CONFIRMED)
+        self._close_if_resolved(incident)
+        return incident
+
+    def close(self, alert_id: str) -> Optional[Incident]:
+        """Close an incident regardless of outstanding responses"""
+        incident = self._incidents.get(alert_id)
+        if incident is not None and incident.state != CLOSED:
+            self._advance(incident, CLOSED)
+        return incident
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        """Close stale incidents and drop closed ones past their TTL; returns the number dropped"""
+        now = time.monotonic() if now is None else now
+
+        while self._unresolved:
+            alert_id = next(iter(self._unresolved))
+            if now - self._incidents[alert_id].created < self.stale_ttl:
+                break
+            self._advance(self._incidents[alert_id], CLOSED)
+            self.stale_closed += 1
+
+        evicted = 0
+        while self._closed:
+            alert_id, closed_at = next(iter(self._closed.items()))
+            if now - closed_at < self.closed_ttl:
+                break
+            self._discard(alert_id)
+            evicted += 1
+        self.evicted += evicted
+        return evicted
+
+    def _close_if_resolved(self, incident: Incident):
+        # Wait for the dispatch record so an early response can't close the
+        # incident before every recipient is known
+        if incident.dispatch_recorded and incident.expected and incident.expected <= incident.responses.keys():
+            self._advance(incident, CLOSED)
+
+    def _advance(self, incident: Incident, state: str):
+        if _RANK[state] <= _RANK[incident.state]:
+            return
+        self._by_state[incident.state] -= 1
+        self._by_state[state] += 1
+        incident.state = state
+        incident.updated = time.monotonic()
+
+        if state == CLOSED:
+            self._active_by_severity[incident.severity] -= 1
+            self._unresolved.pop(incident.alert_id, None)
+            self._closed[incident.alert_id] = incident.updated
+            self.closed += 1
+
+    def _discard(self, alert_id: str):
+        incident = self._incidents.pop(alert_id)
+        self._by_state[incident.state] -= 1
+        if incident.state != CLOSED:
+            self._active_by_severity[incident.severity] -= 1
+        self._unresolved.pop(alert_id, None)
+        self._closed.pop(alert_id, None)
+
+    def active(self) -> int:
+        """Incidents not yet closed"""
+        return len(self._incidents) - self._by_state[CLOSED]
+
+    def active_by_severity(self, severity: str) -> int:
+        return self._active_by_severity[severity]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active(),
+            "retained": len(self._incidents),
+            "by_state": {state: self._by_state[state] for state in STATES},
+            "active_by_severity": {severity: count for severity, count in self._active_by_severity.items() if count},
+            "opened": self.opened,
+            "closed": self.closed,
+            "stale_closed": self.stale_closed,
+            "evicted": self.evicted,
+            "unknown_responses": self.unknown_responses
+        }
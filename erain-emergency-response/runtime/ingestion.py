@@ -0,0 +1,167 @@
+"""
+Report Ingestion Pipeline
+Bounded priority queue between chat handlers and a pool of analysis workers,
+so handlers acknowledge immediately and surges cannot pile up unbounded work
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import heapq
+import itertools
+import os
+import time
+
+URGENT = 0
+NORMAL = 1
+
+
+class IngestionQueue:
+    """
+    Bounded queue with priority admission
+    Normal reports fill up to `max_depth`; urgent reports may use an extra
+    `urgent_reserve` slots and are always dequeued first
+    """
+
+    def __init__(self, max_depth: int = 100, urgent_reserve: int = 20):
+        self.max_depth = max_depth
+        self.urgent_reserve = urgent_reserve
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+        self._changed: Optional[asyncio.Condition] = None
+
+        self.enqueued = 0
+        self.urgent_admitted = 0
+        self.rejected = 0
+        self.peak_depth = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._dequeued = 0
+
+    @property
+    def _condition(self) -> asyncio.Condition:
+        # Created lazily so it binds to the agent's running loop
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        return self._changed
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def capacity(self, urgent: bool) -> int:
+        return self.max_depth + (self.urgent_reserve if urgent else 0)
+
+    def is_full(self, urgent: bool = False) -> bool:
+        return len(self._heap) >= self.capacity(urgent)
+
+    async def try_put(self, item: Any, urgent: bool = False) -> bool:
+        """Enqueue an item if there is space; returns False when the queue is full"""
+        async with self._condition:
+            if self.is_full(urgent):
+                self.rejected += 1
+                return False
+            if urgent and len(self._heap) >= self.max_depth:
+                self.urgent_admitted += 1
+            self._push(item, urgent)
+            return True
+
+    def _push(self, item: Any, urgent: bool):
+        priority = URGENT if urgent else NORMAL
+        heapq.heappush(self._heap, (priority, next(self._sequence), time.monotonic(), item))
+        self.enqueued += 1
+        self.peak_depth = max(self.peak_depth, len(self._heap))
+        self._condition.notify_all()
+
+    async def get(self) -> Any:
+        """Dequeue the most urgent, oldest item"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._heap)
+            _, _, enqueued_at, item = heapq.heappop(self._heap)
+            wait = time.monotonic() - enqueued_at
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            self._dequeued += 1
+            return item
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": len(self._heap),
+            "peak_depth": self.peak_depth,
+            "enqueued": self.enqueued,
+            "urgent_admitted": self.urgent_admitted,
+            "rejected": self.rejected,
+            "avg_wait": self._total_wait / self._dequeued if self._dequeued else 0.0,
+            "max_wait": self._max_wait
+        }
+
+
+class WorkerPool:
+    """Fixed set of asyncio workers draining an IngestionQueue"""
+
+    def __init__(self, queue: IngestionQueue, handler: Callable[[Any], Awaitable[None]],
+                 workers: int = 4, on_error: Optional[Callable[[Any, Exception], None]] = None):
+        self.queue = queue
+        self.handler = handler
+        self.workers = workers
+        self.on_error = on_error
+        self.processed = 0
+        self.failed = 0
+        self.busy = 0
+        self._busy_time = 0.0
+        self._started_at: Optional[float] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @classmethod
+    def from_env(cls, handler: Callable[[Any], Awaitable[None]], **kwargs) -> "WorkerPool":
+        """Configure from ERAIN_INGEST_QUEUE_DEPTH/_URGENT_RESERVE/_WORKERS"""
+        queue = IngestionQueue(
+            max_depth=int(os.environ.get("ERAIN_INGEST_QUEUE_DEPTH", "100")),
+            urgent_reserve=int(os.environ.get("ERAIN_INGEST_URGENT_RESERVE", "20"))
+        )
+        return cls(queue, handler, workers=int(os.environ.get("ERAIN_INGEST_WORKERS", "4")), **kwargs)
+
+    def start(self):
+        """Start the workers on the running event loop"""
+        if self._tasks:
+            return
+        self._started_at = time.monotonic()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _work(self):
+        while True:
+            item = await self.queue.get()
+            self.busy += 1
+            started = time.monotonic()
+            try:
+                await self.handler(item)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                if self.on_error is not None:
+                    self.on_error(item, e)
+            finally:
+                self._busy_time += time.monotonic() - started
+                self.busy -= 1
+
+    def utilization(self) -> float:
+        """Fraction of worker time spent handling items since start"""
+        if self._started_at is None:
+            return 0.0
+        elapsed = (time.monotonic() - self._started_at) * self.workers
+        return min(1.0, self._busy_time / elapsed) if elapsed > 0 else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.queue.stats()
+        stats.update({
+            "workers": self.workers,
+            "busy": self.busy,
+            "processed": self.processed,
+            "failed": self.failed,
+            "utilization": self.utilization()
+        })
+        return stats
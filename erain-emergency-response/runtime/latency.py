@@ -0,0 +1,195 @@
+"""
+End-to-end Alert Latency Tracking
+Correlates every stage of an alert's life by alert_id (report received,
+analysis done, delivered to each agent, each agent's response) and keeps
+log-bucketed latency histograms per stage and per agent
+"""
+
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+import json
+import math
+import os
+import time
+
+PERCENTILES = (50, 95, 99)
+
+
+class LatencyHistogram:
+    """
+    Fixed-memory histogram with geometrically growing buckets
+    Each bucket is `growth` times wider than the last, so percentiles are
+    accurate to about (growth - 1) relative error from `minimum` to `maximum`
+    """
+
+    __slots__ = ("minimum", "growth", "counts", "count", "total", "max", "_log_growth")
+
+    def __init__(self, minimum: float = 1e-4, maximum: float = 3600.0, growth: float = 1.05):
+        self.minimum = minimum
+        self.growth = growth
+        self._log_growth = math.log(growth)
+        self.counts = [0] * (int(math.log(maximum / minimum) / self._log_growth) + 2)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        seconds = max(0.0, seconds)
+        if seconds <= self.minimum:
+            bucket = 0
+        else:
+            bucket = min(len(self.counts) - 1, int(math.log(seconds / self.minimum) / self._log_growth) + 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile (seconds)"""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(q / 100 * self.count)
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.max, self.minimum * self.growth ** bucket)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        summary = {"count": self.count, "mean": self.total / self.count if self.count else 0.0, "max": self.max}
+        summary.update({f"p{q}": self.percentile(q) for q in PERCENTILES})
+        return summary
+
+
+class LatencyTracker:
+    """
+    Stage timestamps per alert_id plus histograms of the time between stages
+    Histograms: ingest_wait (received -> picked up), analysis (picked up ->
+    analyzed), and per agent dispatch (analyzed -> delivered), service
+    (delivered -> response) and end_to_end (received -> response).
+    Alerts are forgotten after `ttl` seconds or beyond `max_tracked`
+    """
+
+    def __init__(self, max_tracked: int = 10000, ttl: float = 3600.0,
+                 agent_names: Optional[Dict[str, str]] = None):
+        self.max_tracked = max_tracked
+        self.ttl = ttl
+        self.agent_names = agent_names or {}
+        self._alerts: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.uncorrelated = 0  # responses for alerts not (or no longer) tracked
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "LatencyTracker":
+        """Configure from ERAIN_LATENCY_MAX_TRACKED and ERAIN_LATENCY_TTL"""
+        return cls(
+            max_tracked=int(os.environ.get("ERAIN_LATENCY_MAX_TRACKED", "10000")),
+            ttl=float(os.environ.get("ERAIN_LATENCY_TTL", "3600")),
+            **kwargs
+        )
+
+    def _name(self, agent: str) -> str:
+        return self.agent_names.get(agent, agent[:16])
+
+    def _observe(self, key: str, seconds: float):
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def start(self, alert_id: str, received: float, picked_up: Optional[float] = None,
+              analyzed: Optional[float] = None):
+        """Begin tracking an alert from the monotonic times of its first stages"""
+        now = time.monotonic()
+        picked_up = received if picked_up is None else picked_up
+        analyzed = now if analyzed is None else analyzed
+        self._evict(now)
+
+        self._alerts[alert_id] = {"received": received, "picked_up": picked_up, "analyzed": analyzed}
+        self._observe("ingest_wait", picked_up - received)
+        self._observe("analysis", analyzed - picked_up)
+
+    def delivered(self, alert_id: str, agents: Iterable[str]):
+        """Mark the alert as delivered to each agent"""
+        stages = self._alerts.get(alert_id)
+        if stages is None:
+            return
+        now = time.monotonic()
+        for agent in agents:
+            stages[f"sent:{agent}"] = now
+            self._observe(f"dispatch:{self._name(agent)}", now - stages["analyzed"])
+
+    def responded(self, alert_id: str, agent: str) -> Optional[float]:
+        """Mark an agent's response; returns the end-to-end latency if the alert is tracked"""
+        stages = self._alerts.get(alert_id)
+        if stages is None:
+            self.uncorrelated += 1
+            return None
+        now = time.monotonic()
+        stages[f"responded:{agent}"] = now
+        name = self._name(agent)
+        if f"sent:{agent}" in stages:
+            self._observe(f"service:{name}", now - stages[f"sent:{agent}"])
+        self._observe(f"end_to_end:{name}", now - stages["received"])
+        return now - stages["received"]
+
+    def stages(self, alert_id: str) -> Optional[Dict[str, float]]:
+        """Stage offsets in seconds from when the report was received"""
+        stages = self._alerts.get(alert_id)
+        if stages is None:
+            return None
+        return {stage: at - stages["received"] for stage, at in stages.items()}
+
+    def hand_off(self, alert_id: str) -> Dict[str, float]:
+        """Stop tracking an alert; returns how long ago (seconds) each stage was, for adopt() elsewhere"""
+        stages = self._alerts.pop(alert_id, None)
+        if stages is None:
+            return {}
+        now = time.monotonic()
+        return {stage: now - at for stage, at in stages.items()}
+
+    def adopt(self, alert_id: str, ages: Dict[str, float]):
+        """
+        Continue tracking an alert handed off by another instance
+        Monotonic clocks differ between processes, so stages travel as ages
+        and are rebased on this clock; the transfer time itself is not counted
+        """
+        if "received" not in ages:
+            return
+        now = time.monotonic()
+        self._evict(now)
+        self._alerts[alert_id] = {stage: now - age for stage, age in ages.items()}
+
+    def _evict(self, now: float):
+        while self._alerts:
+            alert_id, stages = next(iter(self._alerts.items()))
+            if len(self._alerts) < self.max_tracked and now - stages["received"] < self.ttl:
+                break
+            del self._alerts[alert_id]
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {key: histogram.summary() for key, histogram in sorted(self.histograms.items())}
+
+    def export(self, path: str):
+        """Write the histogram summaries as JSON for dashboards and scripts"""
+        payload = {
+            "generated_at": time.time(),
+            "tracked_alerts": len(self._alerts),
+            "uncorrelated_responses": self.uncorrelated,
+            "unit": "seconds",
+            "histograms": self.summary()
+        }
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def report_lines(self) -> List[str]:
+        lines = []
+        for key, summary in self.summary().items():
+            lines.append(
+                f"{key}: n={summary['count']} | p50 {summary['p50'] * 1000:.0f}ms | "
+                f"p95 {summary['p95'] * 1000:.0f}ms | p99 {summary['p99'] * 1000:.0f}ms | max {summary['max'] * 1000:.0f}ms"
+            )
+        return lines
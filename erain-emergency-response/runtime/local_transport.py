@@ -0,0 +1,111 @@
+"""
+In-Process Local Transport
+Delivers messages between agent handlers loaded into one process, with an
+optional simulated network delay, so the whole alert pipeline can run
+offline for benchmarks and replays
+"""
+
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
+Handler = Callable[[Any, str, Any], Any]
+
+
+class LocalContext:
+    """The part of uagents.Context the agent handlers use: send() and logger"""
+
+    def __init__(self, transport: "LocalTransport", address: str, name: str):
+        self.transport = transport
+        self.address = address
+        self.name = name
+        self.logger = logging.getLogger(f"erain.local.{name}")
+
+    async def send(self, destination: str, message):
+        self.transport.deliver(self.address, destination, message)
+
+
+class LocalTransport:
+    """
+    Routes a message to the destination's handler for its model name
+    Each message is serialized and parsed into the receiving agent's own
+    model class, as it would be on the wire, and handled in its own task so
+    senders never wait on receivers. Messages to addresses with no local
+    agent (citizens, unknown peers) are kept in `outbox`. Each entry in
+    `taps` is called with (sender, destination, message) for every send
+    """
+
+    def __init__(self, delay: float = 0.0, serialize: bool = True):
+        self.delay = delay
+        self.serialize = serialize
+        self.contexts: Dict[str, LocalContext] = {}
+        self._handlers: Dict[str, Dict[str, Tuple[type, Handler]]] = {}
+        self._tasks = set()
+        self.outbox: Dict[str, List[Tuple[float, Any]]] = {}
+        self.taps: List[Callable[[str, str, Any], None]] = []
+
+        self.sent: Counter = Counter()
+        self.bytes_sent = 0
+        self.unhandled = 0
+        self.failed = 0
+        self.last_error: Optional[str] = None
+
+    def register(self, address: str, name: str, handlers: Dict[type, Handler]) -> LocalContext:
+        """Attach an agent's message handlers, keyed by the model class each one expects"""
+        self._handlers[address] = {model.__name__: (model, handler) for model, handler in handlers.items()}
+        context = self.contexts[address] = LocalContext(self, address, name)
+        return context
+
+    def deliver(self, sender: str, destination: str, message):
+        kind = type(message).__name__
+        self.sent[kind] += 1
+        for tap in self.taps:
+            tap(sender, destination, message)
+        payload = message.json() if self.serialize else None
+        if payload is not None:
+            self.bytes_sent += len(payload)
+
+        handlers = self._handlers.get(destination)
+        if handlers is None:
+            self.outbox.setdefault(destination, []).append((time.monotonic(), message))
+            return
+        if kind not in handlers:
+            self.unhandled += 1
+            return
+        model, handler = handlers[kind]
+        task = asyncio.ensure_future(self._handle(sender, destination, model, handler, message, payload))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _handle(self, sender: str, destination: str, model: type, handler: Handler, message, payload):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        try:
+            if payload is not None:
+                message = model.parse_raw(payload)
+            await handler(self.contexts[destination], sender, message)
+        except Exception as e:
+            self.failed += 1
+            self.last_error = f"{type(message).__name__} to {self.contexts[destination].name}: {e}"
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    async def drain(self, poll: float = 0.01):
+        """Wait until no delivered message is still being handled"""
+        while self._tasks:
+            await asyncio.sleep(poll)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sent": dict(self.sent),
+            "messages": sum(self.sent.values()),
+            "bytes": self.bytes_sent,
+            "in_flight": self.in_flight,
+            "unhandled": self.unhandled,
+            "failed": self.failed,
+            "last_error": self.last_error
+        }
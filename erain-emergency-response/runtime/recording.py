@@ -0,0 +1,162 @@
+"""
+Inter-Agent Message Recording
+Opt-in capture of every message an agent receives and sends into a
+length-prefixed binary log, read back by replay.py to reproduce traffic
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional
+import atexit
+import functools
+import os
+import struct
+import time
+
+MAGIC = b"ERAINREC1\n"
+INBOUND = 0
+OUTBOUND = 1
+
+# Record: u32 length, then f64 wall time, u8 direction, three u16-prefixed
+# UTF-8 strings (agent, peer, model name) and the message's JSON body
+_LENGTH = struct.Struct(">I")
+_HEADER = struct.Struct(">dB")
+_STRING = struct.Struct(">H")
+
+
+@dataclass
+class RecordedMessage:
+    timestamp: float
+    direction: int
+    agent: str
+    peer: str
+    kind: str
+    body: bytes
+
+    @property
+    def inbound(self) -> bool:
+        return self.direction == INBOUND
+
+    def parse(self, model: Any):
+        """Rebuild the message as an instance of `model`"""
+        return model.parse_raw(self.body)
+
+
+def _encode(timestamp: float, direction: int, agent: str, peer: str, kind: str, body: bytes) -> bytes:
+    parts = [_HEADER.pack(timestamp, direction)]
+    for text in (agent, peer, kind):
+        encoded = text.encode()
+        parts.append(_STRING.pack(len(encoded)))
+        parts.append(encoded)
+    parts.append(body)
+    payload = b"".join(parts)
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def _decode(payload: bytes) -> RecordedMessage:
+    timestamp, direction = _HEADER.unpack_from(payload)
+    offset = _HEADER.size
+    strings = []
+    for _ in range(3):
+        (length,) = _STRING.unpack_from(payload, offset)
+        offset += _STRING.size
+        strings.append(payload[offset:offset + length].decode())
+        offset += length
+    return RecordedMessage(timestamp, direction, *strings, payload[offset:])
+
+
+def read_recording(path: str) -> Iterator[RecordedMessage]:
+    """Records in file order; a record cut short by a crash ends the iteration"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an ERAIN message recording")
+        while True:
+            prefix = f.read(_LENGTH.size)
+            if len(prefix) < _LENGTH.size:
+                return
+            (length,) = _LENGTH.unpack(prefix)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            yield _decode(payload)
+
+
+class _RecordingContext:
+    """Wraps a handler's Context so everything it sends is recorded too"""
+
+    def __init__(self, ctx, recorder: "MessageRecorder"):
+        self._ctx = ctx
+        self._recorder = recorder
+
+    def __getattr__(self, name: str):
+        return getattr(self._ctx, name)
+
+    async def send(self, destination: str, message, *args, **kwargs):
+        self._recorder.record(OUTBOUND, destination, message)
+        return await self._ctx.send(destination, message, *args, **kwargs)
+
+
+class MessageRecorder:
+    """
+    Appends an agent's inbound and outbound messages to `path`
+    Disabled recorders (no path) leave handlers untouched, so recording
+    costs nothing unless switched on. Writes are buffered and flushed at
+    most every `flush_interval` seconds
+    """
+
+    def __init__(self, agent: str, path: Optional[str] = None, flush_interval: float = 1.0):
+        self.agent = agent
+        self.path = path
+        self.flush_interval = flush_interval
+        self.recorded = 0
+        self.bytes_written = 0
+        self._file = None
+        self._flushed_at = time.monotonic()
+        if path:
+            new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+            self._file = open(path, "ab")
+            if new_file:
+                self._file.write(MAGIC)
+            atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls, agent: str) -> "MessageRecorder":
+        """Record to ERAIN_RECORD_DIR/<agent>.erec when ERAIN_RECORD_DIR is set"""
+        directory = os.environ.get("ERAIN_RECORD_DIR")
+        if not directory:
+            return cls(agent)
+        os.makedirs(directory, exist_ok=True)
+        return cls(agent, os.path.join(directory, f"{agent}.erec"))
+
+    @property
+    def enabled(self) -> bool:
+        return self._file is not None
+
+    def record(self, direction: int, peer: str, message):
+        if self._file is None:
+            return
+        record = _encode(time.time(), direction, self.agent, peer, type(message).__name__, message.json().encode())
+        self._file.write(record)
+        self.recorded += 1
+        self.bytes_written += len(record)
+        now = time.monotonic()
+        if now - self._flushed_at >= self.flush_interval:
+            self._file.flush()
+            self._flushed_at = now
+
+    def handler(self, func: Callable) -> Callable:
+        """Decorator for message and interval handlers: records the message received and all sends"""
+        if not self.enabled:
+            return func
+
+        @functools.wraps(func)
+        async def recorded(ctx, *args):
+            if len(args) == 2:
+                sender, message = args
+                self.record(INBOUND, sender, message)
+            return await func(_RecordingContext(ctx, self), *args)
+        return recorded
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
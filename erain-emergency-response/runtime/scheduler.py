@@ -0,0 +1,126 @@
+"""
+Severity-ordered Dispatch Scheduler
+Admits analyzed incidents to a fixed number of dispatch slots in priority
+order (severity score, people affected, time waited) instead of arrival order
+"""
+
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+
+
+class DispatchScheduler:
+    """
+    Max-priority heap in front of the dispatch calls
+    priority = severity_score + affected_weight * log2(1 + affected_count)
+               + aging_rate * seconds_waited
+    Every waiting job ages at the same rate, so the ordering is fixed at
+    enqueue time (base priority minus aging_rate * enqueue time) and the heap
+    never needs rekeying, while low-priority jobs still rise over time.
+    A slot is held for as long as its job runs, so jobs should hand work off
+    (queue an alert for delivery) rather than wait for it to complete
+    """
+
+    def __init__(self, slots: int = 2, affected_weight: float = 1.0, aging_rate: float = 0.1):
+        if slots < 1:
+            raise ValueError(f"Scheduler needs at least one slot, got {slots}")
+        self.slots = slots
+        self.affected_weight = affected_weight
+        self.aging_rate = aging_rate
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+        self._running = 0
+
+        self._pending_by_label: Counter = Counter()
+        self.scheduled = 0
+        self.completed = 0
+        self.contended = 0  # jobs that had to wait for a slot
+        self._latency: Dict[str, Dict[str, float]] = {}
+
+    @classmethod
+    def from_env(cls) -> "DispatchScheduler":
+        """Configure from ERAIN_DISPATCH_SLOTS, ERAIN_SCHEDULER_AFFECTED_WEIGHT and ERAIN_SCHEDULER_AGING"""
+        return cls(
+            slots=int(os.environ.get("ERAIN_DISPATCH_SLOTS", "2")),
+            affected_weight=float(os.environ.get("ERAIN_SCHEDULER_AFFECTED_WEIGHT", "1.0")),
+            aging_rate=float(os.environ.get("ERAIN_SCHEDULER_AGING", "0.1"))
+        )
+
+    def priority(self, severity_score: float, affected_count: int) -> float:
+        """Base priority of an incident before aging"""
+        return severity_score + self.affected_weight * math.log2(1 + max(0, affected_count))
+
+    async def run(self, job: Callable[[], Awaitable[Any]], severity_score: float,
+                  affected_count: int, label: str = "") -> Any:
+        """Wait for a dispatch slot in priority order, then run the job and return its result"""
+        loop = asyncio.get_running_loop()
+        enqueued_at = time.monotonic()
+        key = self.priority(severity_score, affected_count) - self.aging_rate * enqueued_at
+        admitted = loop.create_future()
+
+        heapq.heappush(self._heap, (-key, next(self._sequence), enqueued_at, label, admitted))
+        self._pending_by_label[label] += 1
+        if self._running >= self.slots:
+            self.contended += 1
+        self._admit()
+
+        try:
+            await admitted
+        except asyncio.CancelledError:
+            # Cancelled after being admitted: hand the slot on
+            if not admitted.cancelled():
+                self._release()
+            raise
+        try:
+            return await job()
+        finally:
+            self.completed += 1
+            self._release()
+
+    def _release(self):
+        self._running -= 1
+        self._admit()
+
+    def _admit(self):
+        while self._heap and self._running < self.slots:
+            _, _, enqueued_at, label, admitted = heapq.heappop(self._heap)
+            self._pending_by_label[label] -= 1
+            if admitted.cancelled():
+                continue
+            self._running += 1
+            self.scheduled += 1
+            self._record(label, time.monotonic() - enqueued_at)
+            admitted.set_result(None)
+
+    def _record(self, label: str, latency: float):
+        stats = self._latency.setdefault(label, {"scheduled": 0, "total_latency": 0.0, "max_latency": 0.0})
+        stats["scheduled"] += 1
+        stats["total_latency"] += latency
+        stats["max_latency"] = max(stats["max_latency"], latency)
+
+    def pending(self, label: Optional[str] = None) -> int:
+        return len(self._heap) if label is None else self._pending_by_label[label]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "slots": self.slots,
+            "running": self._running,
+            "pending": len(self._heap),
+            "pending_by_label": {label: count for label, count in self._pending_by_label.items() if count},
+            "scheduled": self.scheduled,
+            "completed": self.completed,
+            "contended": self.contended,
+            "latency_by_label": {
+                label: {
+                    "scheduled": stats["scheduled"],
+                    "avg_latency": stats["total_latency"] / stats["scheduled"],
+                    "max_latency": stats["max_latency"]
+                }
+                for label, stats in self._latency.items()
+            }
+        }
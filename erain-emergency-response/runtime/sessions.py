@@ -0,0 +1,119 @@
+"""
+Citizen Session Store
+Bounded store of chat sessions with idle-timeout expiry and LRU eviction,
+since many ASI:One clients never send an EndSessionContent
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional
+import os
+import time
+
+
+class Session:
+    """Compact per-citizen session record"""
+
+    __slots__ = ("started", "last_seen", "messages", "location")
+
+    def __init__(self, now: float):
+        self.started = time.time()
+        self.last_seen = now  # monotonic
+        self.messages = 0
+        self.location: Optional[Dict[str, float]] = None  # last position the citizen's client shared
+
+    def duration(self) -> float:
+        return time.time() - self.started
+
+
+class SessionStore:
+    """
+    Sessions keyed by sender in least-recently-seen order
+    Touching a session moves it to the back, so both idle expiry and LRU
+    eviction only ever look at the front of the store
+    """
+
+    def __init__(self, max_sessions: int = 10000, idle_timeout: float = 1800.0):
+        if max_sessions < 1:
+            raise ValueError(f"Session cap must be at least 1, got {max_sessions}")
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+
+        self.started = 0
+        self.ended = 0
+        self.expired = 0
+        self.evicted = 0
+
+    @classmethod
+    def from_env(cls) -> "SessionStore":
+        """Configure from ERAIN_SESSION_MAX and ERAIN_SESSION_IDLE_TIMEOUT"""
+        return cls(
+            max_sessions=int(os.environ.get("ERAIN_SESSION_MAX", "10000")),
+            idle_timeout=float(os.environ.get("ERAIN_SESSION_IDLE_TIMEOUT", "1800"))
+        )
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, sender: str) -> bool:
+        return sender in self._sessions
+
+    def start(self, sender: str) -> Session:
+        """Open (or restart) a session, evicting the least recently seen one when full"""
+        now = time.monotonic()
+        self.expire(now)
+        self._sessions.pop(sender, None)
+        while len(self._sessions) >= self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+
+        session = self._sessions[sender] = Session(now)
+        self.started += 1
+        return session
+
+    def touch(self, sender: str) -> Optional[Session]:
+        """Count a message on an existing session; returns None if it has expired or never started"""
+        now = time.monotonic()
+        self.expire(now)
+        session = self._sessions.get(sender)
+        if session is None:
+            return None
+        session.messages += 1
+        session.last_seen = now
+        self._sessions.move_to_end(sender)
+        return session
+
+    def locate(self, sender: str, location: Dict[str, float]) -> Session:
+        """Remember where a citizen is, starting a session if they have none"""
+        session = self.touch(sender) or self.start(sender)
+        session.location = location
+        return session
+
+    def end(self, sender: str) -> Optional[Session]:
+        """Close a session and return it"""
+        session = self._sessions.pop(sender, None)
+        if session is not None:
+            self.ended += 1
+        return session
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop sessions idle longer than the timeout; returns the number dropped"""
+        now = time.monotonic() if now is None else now
+        dropped = 0
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_seen < self.idle_timeout:
+                break
+            self._sessions.popitem(last=False)
+            dropped += 1
+        self.expired += dropped
+        return dropped
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "active": len(self._sessions),
+            "started": self.started,
+            "ended": self.ended,
+            "expired": self.expired,
+            "evicted": self.evicted
+        }
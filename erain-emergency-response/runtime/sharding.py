@@ -0,0 +1,147 @@
+"""
+Geographic Sharding for Coordinator Instances
+Consistent hashing of geohash prefixes onto coordinator addresses, so each
+instance owns a stable set of regions and only the affected regions move
+when an instance joins or leaves
+"""
+
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple, TypeVar
+import bisect
+import hashlib
+import os
+
+from runtime.dedup import geohash
+
+T = TypeVar("T")
+
+
+def _point(value: str) -> int:
+    # Stable across processes, unlike the builtin hash()
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hash ring with `vnodes` virtual points per node"""
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = 128):
+        self.vnodes = vnodes
+        self._points: List[Tuple[int, str]] = []
+        self._nodes = set()
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(self._nodes)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def add(self, node: str) -> bool:
+        """Add a node; returns False if it was already a member"""
+        if node in self._nodes:
+            return False
+        self._nodes.add(node)
+        for i in range(self.vnodes):
+            bisect.insort(self._points, (_point(f"{node}#{i}"), node))
+        return True
+
+    def remove(self, node: str) -> bool:
+        """Remove a node; returns False if it was not a member"""
+        if node not in self._nodes:
+            return False
+        self._nodes.discard(node)
+        self._points = [point for point in self._points if point[1] != node]
+        return True
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        i = bisect.bisect(self._points, (_point(key), "")) % len(self._points)
+        return self._points[i][1]
+
+
+class ShardRouter:
+    """
+    Maps EmergencyAlert locations to the coordinator instance owning them
+    Regions are geohash prefixes of `precision` characters (5 is about 4.9 x 4.9 km,
+    giving a metro area a few hundred regions to spread over the instances).
+    Also remembers where recently handed-off incidents went, so late agent
+    responses can follow them
+    """
+
+    def __init__(self, self_address: str, peers: Iterable[str] = (), precision: int = 5,
+                 vnodes: int = 128, handoff_memory: int = 10000):
+        self.address = self_address
+        self.precision = precision
+        self.ring = HashRing([self_address, *peers], vnodes)
+        self.handoff_memory = handoff_memory
+        self._handed_off: "OrderedDict[str, str]" = OrderedDict()
+
+        self.forwarded = 0
+        self.received = 0
+        self.handed_off = 0
+        self.adopted = 0
+
+    @classmethod
+    def from_env(cls, self_address: str) -> "ShardRouter":
+        """Configure from ERAIN_SHARD_PEERS (comma-separated coordinator addresses) and ERAIN_SHARD_PRECISION"""
+        peers = [p.strip() for p in os.environ.get("ERAIN_SHARD_PEERS", "").split(",") if p.strip()]
+        return cls(
+            self_address,
+            [p for p in peers if p != self_address],
+            precision=int(os.environ.get("ERAIN_SHARD_PRECISION", "5"))
+        )
+
+    @property
+    def sharded(self) -> bool:
+        return len(self.ring) > 1
+
+    @property
+    def peers(self) -> List[str]:
+        return [node for node in self.ring.nodes if node != self.address]
+
+    def region(self, location: Dict[str, float]) -> str:
+        return geohash(location["lat"], location["lng"], self.precision)
+
+    def owner(self, location: Dict[str, float]) -> str:
+        return self.ring.owner(self.region(location))
+
+    def owns(self, location: Dict[str, float]) -> bool:
+        return not self.sharded or self.owner(location) == self.address
+
+    def join(self, address: str) -> bool:
+        return self.ring.add(address)
+
+    def leave(self, address: str) -> bool:
+        return address != self.address and self.ring.remove(address)
+
+    def misplaced(self, located: Iterable[Tuple[Dict[str, float], T]]) -> Dict[str, List[T]]:
+        """Group (location, item) pairs this instance no longer owns by their new owner"""
+        moves: Dict[str, List[T]] = {}
+        for location, item in located:
+            owner = self.owner(location)
+            if owner != self.address:
+                moves.setdefault(owner, []).append(item)
+        return moves
+
+    def record_handoff(self, alert_id: str, owner: str):
+        self._handed_off[alert_id] = owner
+        self._handed_off.move_to_end(alert_id)
+        while len(self._handed_off) > self.handoff_memory:
+            self._handed_off.popitem(last=False)
+        self.handed_off += 1
+
+    def handoff_owner(self, alert_id: str) -> Optional[str]:
+        """Where an incident this instance handed off now lives"""
+        return self._handed_off.get(alert_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "members": len(self.ring),
+            "forwarded": self.forwarded,
+            "received": self.received,
+            "handed_off": self.handed_off,
+            "adopted": self.adopted
+        }
@@ -0,0 +1,132 @@
+"""
+Spatial Index for Facilities and Units
+KD-tree over points on the unit sphere answering k-nearest queries by
+great-circle distance. Candidates are filtered by a predicate during the
+search, so live state (free beds, capabilities) never forces a rebuild
+"""
+
+from typing import Callable, Dict, Generic, Iterable, List, Optional, Tuple, TypeVar
+import heapq
+import itertools
+import math
+import time
+
+T = TypeVar("T")
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _unit(lat: float, lng: float) -> Tuple[float, float, float]:
+    phi, lmb = math.radians(lat), math.radians(lng)
+    return (math.cos(phi) * math.cos(lmb), math.cos(phi) * math.sin(lmb), math.sin(phi))
+
+
+def _chord_sq(km: float) -> float:
+    """Squared straight-line distance on the unit sphere for a great-circle distance"""
+    return (2 * math.sin(min(math.pi, km / EARTH_RADIUS_KM) / 2)) ** 2
+
+
+class _Node:
+    __slots__ = ("low", "high", "left", "right", "points")
+
+    def __init__(self, points: List[Tuple[Tuple[float, float, float], int]], leaf_size: int):
+        self.low = tuple(min(p[0][axis] for p in points) for axis in range(3))
+        self.high = tuple(max(p[0][axis] for p in points) for axis in range(3))
+        self.left = self.right = None
+        self.points = None
+        if len(points) <= leaf_size:
+            self.points = points
+            return
+        axis = max(range(3), key=lambda a: self.high[a] - self.low[a])
+        points.sort(key=lambda p: p[0][axis])
+        middle = len(points) // 2
+        self.left = _Node(points[:middle], leaf_size)
+        self.right = _Node(points[middle:], leaf_size)
+
+    def bound(self, q: Tuple[float, float, float]) -> float:
+        """Smallest squared distance from q to this node's bounding box"""
+        total = 0.0
+        for axis in range(3):
+            if q[axis] < self.low[axis]:
+                total += (self.low[axis] - q[axis]) ** 2
+            elif q[axis] > self.high[axis]:
+                total += (q[axis] - self.high[axis]) ** 2
+        return total
+
+
+class SpatialIndex(Generic[T]):
+    """
+    Static index of (lat, lng, item) entries
+    Queries walk the tree best-first, so the first `k` items passing the
+    predicate are exactly the k nearest suitable ones, and a selective
+    predicate only costs the extra nodes it makes the search open
+    """
+
+    def __init__(self, entries: Iterable[Tuple[float, float, T]], leaf_size: int = 16):
+        self._items: List[T] = []
+        self._coords: List[Tuple[float, float]] = []
+        points = []
+        for lat, lng, item in entries:
+            points.append((_unit(lat, lng), len(self._items)))
+            self._items.append(item)
+            self._coords.append((lat, lng))
+        self._root = _Node(points, leaf_size) if points else None
+
+        self.queries = 0
+        self.visited = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def nearest(self, lat: float, lng: float, k: int = 1, predicate: Optional[Callable[[T], bool]] = None,
+                max_km: Optional[float] = None) -> List[Tuple[float, T]]:
+        """Up to k (distance_km, item) pairs, nearest first, among items passing the predicate"""
+        started = time.perf_counter()
+        results: List[Tuple[float, T]] = []
+        limit = _chord_sq(max_km) if max_km is not None else math.inf
+        q = _unit(lat, lng)
+        tie = itertools.count()
+        # Heap entries: (squared distance, tiebreak, node or None, item index)
+        heap = [(self._root.bound(q), next(tie), self._root, -1)] if self._root else []
+
+        while heap and len(results) < k:
+            distance, _, node, index = heapq.heappop(heap)
+            if distance > limit:
+                break
+            if node is None:
+                self.visited += 1
+                item = self._items[index]
+                if predicate is None or predicate(item):
+                    results.append((haversine_km(lat, lng, *self._coords[index]), item))
+            elif node.points is not None:
+                for point, i in node.points:
+                    d = (point[0] - q[0]) ** 2 + (point[1] - q[1]) ** 2 + (point[2] - q[2]) ** 2
+                    heapq.heappush(heap, (d, next(tie), None, i))
+            else:
+                heapq.heappush(heap, (node.left.bound(q), next(tie), node.left, -1))
+                heapq.heappush(heap, (node.right.bound(q), next(tie), node.right, -1))
+
+        elapsed = time.perf_counter() - started
+        self.queries += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        return results
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "size": len(self._items),
+            "queries": self.queries,
+            "avg_visited": self.visited / self.queries if self.queries else 0.0,
+            "avg_query": self.total_time / self.queries if self.queries else 0.0,
+            "max_query": self.max_time
+        }
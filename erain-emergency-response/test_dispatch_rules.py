@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test Report Classification and Dispatch Targets
+Offline checks that descriptions are classified as intended, reach the
+right response agents and absorb repeat reports; runs under pytest or as a script
+
+Usage:
+    python test_dispatch_rules.py
+"""
+
+from types import SimpleNamespace
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# The coordinator is imported, not run: no ledger funding, no event log on the terminal
+os.environ["ERAIN_OFFLINE"] = "1"
+os.environ.setdefault("ERAIN_EVENT_LOG", os.devnull)
+
+from knowledge.keyword_classifier import classify_description
+from runtime.batching import AlertBatcher
+from runtime.dedup import ReportDeduplicator
+from runtime.deployment import load_agent
+from runtime.dispatch import Dispatcher
+from runtime.incidents import CLOSED, IncidentStore
+from runtime.scheduler import DispatchScheduler
+
+_coordinator = None
+
+
+def coordinator():
+    global _coordinator
+    if _coordinator is None:
+        _coordinator = load_agent("coordinator")
+    return _coordinator
+
+
+def test_earthquake_report_reaches_medical():
+    c = coordinator()
+    analysis = c.analyze_with_metta("Earthquake damage on 12 Main St, building partly collapsed, 5 people trapped")
+    assert analysis["inferred_type"] == "earthquake"
+    assert c.MEDICAL_AGENT in c.report_targets(analysis)
+    assert c.MEDICAL_AGENT in c.alert_targets(analysis, 5)
+
+
+def test_medical_report_reaches_medical():
+    c = coordinator()
+    analysis = c.analyze_with_metta("Man unconscious outside the station, not breathing")
+    assert c.MEDICAL_AGENT in c.report_targets(analysis)
+    assert c.MEDICAL_AGENT in c.alert_targets(analysis, 1)
+
+
+def test_fire_report_skips_medical():
+    c = coordinator()
+    analysis = c.analyze_with_metta("Warehouse blaze, flames spreading to the next building")
+    assert c.MEDICAL_AGENT not in c.report_targets(analysis)
+    assert c.RESOURCE_AGENT in c.report_targets(analysis)
+
+
+def test_keywords_match_whole_words():
+    result = classify_description("Hearty crowd at the damaged stadium gates")
+    assert result["keyword_counts"]["medical"] == 0
+    assert "dam" not in [keyword for keyword, _ in result["positions"]]
+
+
+def test_flood_damage_is_not_critical():
+    result = classify_description("Flood damage in basement")
+    assert result["inferred_type"] == "flood"
+    assert result["severity_score"] < 7
+
+
+def test_keyword_variants_count_once():
+    result = classify_description("Street flooded, basement flooding, the flood is still rising")
+    assert result["matched_keywords"]["flood"] == ["flood"]
+    assert result["severity_score"] == 7.0
+
+
+def test_shared_location_from_metadata():
+    c = coordinator()
+    assert c.shared_location({"lat": "40.71", "lng": "-74.0"}) == {"lat": 40.71, "lng": -74.0}
+    assert c.shared_location({"lat": "north"}) is None
+    assert c.shared_location({"lat": "91", "lng": "0"}) is None
+
+
+def test_repeat_report_merges_into_closed_incident():
+    incidents = IncidentStore()
+    deduplicator = ReportDeduplicator(is_retained=lambda alert_id: alert_id in incidents)
+    location = {"lat": 40.7128, "lng": -74.0060}
+    text = "Fire in apartment building on 12 Main St, smoke on multiple floors"
+
+    first = deduplicator.check(location, "fire", text)
+    incidents.open(SimpleNamespace(alert_id="A1", severity="HIGH", affected_count=1))
+    deduplicator.register(first, "A1")
+    incidents.mark_dispatched("A1", ["medical"])
+    incidents.record_response("A1", "medical", "ambulance sent")
+    assert incidents.get("A1").state == CLOSED
+
+    repeat = deduplicator.check(location, "fire", text)
+    assert repeat.duplicate_of == "A1"
+    assert incidents.merge_report("A1", 1).reports == 2
+
+
+
+def test_scheduler_slot_not_held_for_batch_window():
+    async def scenario():
+        sent = []
+
+        class Context:
+            async def send(self, destination, message):
+                sent.append(message)
+
+        batcher = AlertBatcher(Dispatcher(), lambda alerts: alerts, window=0.05, batch_peers=["medical"])
+        scheduler = DispatchScheduler(slots=1)
+        delivered = []
+
+        async def on_delivered(deliveries):
+            delivered.append(deliveries["medical"].delivered)
+
+        alerts = [SimpleNamespace(alert_id=f"A{i}") for i in range(5)]
+        await asyncio.gather(*(
+            scheduler.run(lambda alert=alert: batcher.queue_all(Context(), ["medical"], alert, on_delivered), 5.0, 1)
+            for alert in alerts
+        ))
+        # Every alert got through the single slot before the first flush
+        assert scheduler.stats()["completed"] == 5 and not sent
+        await asyncio.sleep(0.1)
+        assert sent == [alerts] and delivered == [True] * 5
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    failed = 0
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            try:
+                test()
+                print(f"✅ {name}")
+            except AssertionError as e:
+                failed += 1
+                print(f"❌ {name}: {e}")
+    sys.exit(1 if failed else 0)
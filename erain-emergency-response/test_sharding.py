@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Test Geographic Sharding of the Coordinator Locally
+Offline checks of shard ownership plus a live run of several coordinator
+processes on localhost
+
+Usage:
+    python test_sharding.py ring [instances]          # balance, handoff and multi-core intake, no agents
+    python test_sharding.py live [instances] [alerts]  # real coordinator processes on ports 8100+
+"""
+
+from multiprocessing import Pool
+from typing import Dict, List
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from runtime.sharding import ShardRouter
+
+CENTER = {"lat": 40.7128, "lng": -74.0060}
+SPREAD = 0.5  # degrees, roughly 55 km around the center
+
+DESCRIPTIONS = [
+    "Fire in high-rise apartment, smoke on multiple floors, elderly residents",
+    "Chemical spill in warehouse, toxic fumes spreading, evacuation needed",
+    "Multi-vehicle pile-up on highway, multiple critical injuries, fuel leak",
+    "Flash flood in residential area, families trapped on rooftops",
+    "Building collapse at construction site, workers trapped under debris"
+]
+
+
+def random_location(rng: random.Random) -> Dict[str, float]:
+    return {
+        "lat": CENTER["lat"] + rng.uniform(-SPREAD, SPREAD),
+        "lng": CENTER["lng"] + rng.uniform(-SPREAD, SPREAD)
+    }
+
+
+def instance_seeds(count: int) -> List[str]:
+    return [f"emergency_coordinator_seed_2024_shard{i}" for i in range(count)]
+
+
+def _intake(reports: List[Dict]) -> int:
+    """Run the coordinator's per-report intake work (analysis, dedup, incident tracking) on one core"""
+    from knowledge.keyword_classifier import classify_description
+    from runtime.dedup import ReportDeduplicator
+    from runtime.incidents import IncidentStore
+
+    incidents = IncidentStore()
+    deduplicator = ReportDeduplicator(is_retained=lambda alert_id: alert_id in incidents)
+    for i, report in enumerate(reports):
+        classification = classify_description(report["text"])
+        decision = deduplicator.check(report["location"], classification["inferred_type"], report["text"])
+        if decision.duplicate_of is None:
+            alert = type("Alert", (), {"alert_id": f"A{i}", "severity": "HIGH", "affected_count": 1})()
+            incidents.open(alert)
+            deduplicator.register(decision, alert.alert_id)
+    return len(reports)
+
+
+def run_ring(count: int):
+    rng = random.Random(7)
+    nodes = [f"coordinator-{i}" for i in range(count)]
+    router = ShardRouter(nodes[0], nodes[1:])
+    locations = [random_location(rng) for _ in range(20000)]
+
+    owners = [router.owner(location) for location in locations]
+    print(f"Ownership of {len(locations)} alert locations across {count} instances:")
+    for node in nodes:
+        print(f"   {node}: {owners.count(node) / len(owners):6.1%}")
+
+    joined = ShardRouter(nodes[0], nodes[1:] + [f"coordinator-{count}"])
+    moved = sum(1 for location, owner in zip(locations, owners) if joined.owner(location) != owner)
+    print(f"Join of one instance moves {moved / len(locations):.1%} of alerts (ideal {1 / (count + 1):.1%})")
+
+    left = ShardRouter(nodes[0], nodes[1:-1])
+    moved = sum(1 for location, owner in zip(locations, owners) if left.owner(location) != owner)
+    print(f"Leave of one instance moves {moved / len(locations):.1%} of alerts (ideal {1 / count:.1%})")
+
+    reports = [{"text": rng.choice(DESCRIPTIONS) + f" near block {rng.randrange(5000)}",
+                "location": location} for location in locations]
+    start = time.perf_counter()
+    _intake(reports)
+    single = time.perf_counter() - start
+
+    cores = os.cpu_count() or 1
+    print(f"Intake of {len(reports)} reports ({cores} cores available):")
+    print(f"   1 instance:   {len(reports) / single:8.0f} reports/s")
+    if cores == 1:
+        print(f"   {count} instances: skipped, a single core cannot show multi-core scaling")
+        return
+
+    partitions = {node: [] for node in nodes}
+    for report, owner in zip(reports, owners):
+        partitions[owner].append(report)
+    with Pool(count) as pool:
+        pool.map(_intake, [reports[:10]] * count)  # warm up imports in every worker
+        start = time.perf_counter()
+        pool.map(_intake, partitions.values())
+        sharded = time.perf_counter() - start
+
+    print(f"   {count} instances: {len(reports) / sharded:8.0f} reports/s ({single / sharded:.1f}x)")
+
+
+def run_live(count: int, alerts: int):
+    from uagents import Agent, Context, Model
+    from uagents.crypto import Identity
+    from uagents.resolver import RulesBasedResolver
+
+    class EmergencyAlert(Model):
+        alert_id: str
+        timestamp: str
+        location: Dict[str, float]
+        emergency_type: str
+        severity: str
+        description: str
+        affected_count: int
+
+    seeds = instance_seeds(count)
+    addresses = [Identity.from_seed(seed, 0).address for seed in seeds]
+    endpoints = {address: f"http://127.0.0.1:{8100 + i}/submit" for i, address in enumerate(addresses)}
+
+    processes = []
+    for i, seed in enumerate(seeds):
+        env = dict(os.environ,
+                   ERAIN_COORDINATOR_SEED=seed,
+                   ERAIN_COORDINATOR_PORT=str(8100 + i),
+                   ERAIN_SHARD_PEERS=",".join(addresses),
+                   ERAIN_LOCAL_ENDPOINTS=json.dumps(endpoints))
+        log = open(f"shard{i}.log", "w")
+        processes.append((subprocess.Popen([sys.executable, "agents/coordinator.py"], env=env,
+                                           stdout=log, stderr=subprocess.STDOUT), log))
+    print(f"🚀 Started {count} coordinator instances (logs in shard*.log)")
+
+    sender = Agent(name="shard_test_sender", seed="shard_test_sender_seed_2024", port=8099,
+                   endpoint=["http://127.0.0.1:8099/submit"], resolve=RulesBasedResolver(endpoints))
+
+    @sender.on_event("startup")
+    async def send_alerts(ctx: Context):
+        import asyncio
+        await asyncio.sleep(5)  # let the instances come up
+        rng = random.Random(11)
+        for i in range(alerts):
+            alert = EmergencyAlert(
+                alert_id=f"SHARD-{i:04d}",
+                timestamp=time.strftime("%Y-%m-%dT%H:%M:%S"),
+                location=random_location(rng),
+                emergency_type="fire",
+                severity=rng.choice(["CRITICAL", "HIGH", "MEDIUM"]),
+                description=rng.choice(DESCRIPTIONS),
+                affected_count=rng.randrange(1, 100)
+            )
+            # Deliberately sent to a random instance; misrouted alerts must be forwarded
+            await ctx.send(rng.choice(addresses), alert)
+        print(f"📤 Sent {alerts} alerts to random instances")
+
+        await asyncio.sleep(10)
+        # Graceful stop of the last instance hands its incidents to the others
+        processes[-1][0].send_signal(signal.SIGINT)
+        await asyncio.sleep(5)
+        for process, log in processes:
+            process.send_signal(signal.SIGINT)
+        for process, log in processes:
+            process.wait(timeout=10)
+            log.close()
+
+        for i in range(count):
+            with open(f"shard{i}.log") as f:
+                text = f.read()
+            dispatched = text.count('"event": "alert_dispatched"')
+            forwarded = text.count('"event": "alert_forwarded"')
+            print(f"   Shard {i}: {dispatched} dispatched | "
+                  f"{forwarded} forwarded | {text.count('Handed off')} handoffs | "
+                  f"{text.count('Adopted')} adoptions")
+        os._exit(0)
+
+    sender.run()
+
+
+if __name__ == "__main__":
+    mode = sys.argv[1] if len(sys.argv) > 1 else "ring"
+    instances = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    if mode == "ring":
+        run_ring(instances)
+    elif mode == "live":
+        run_live(instances, int(sys.argv[3]) if len(sys.argv) > 3 else 40)
+    else:
+        print(__doc__)
+        sys.exit(1)